@@ -0,0 +1,86 @@
+"""
+Lists Airtable items from a local stub answering every metadata call after `latency_ms`, fetching the tables
+of 1, 2, 4, ... bases at once. The crawl time falls about linearly with concurrency until the calls reach the
+token's quota (50 req/s less the limiter's headroom), where it levels off.
+Needs a real Redis (REDIS_HOST, default localhost) for the rate limiter:
+
+    python -m benchmarks.bench_airtable_crawl [bases] [latency_ms]
+"""
+import asyncio
+import json
+import sys
+import time
+from urllib.parse import parse_qs
+
+from benchmarks.stub_server import run_stub_server
+from config.constants import AIRTABLE_CONSTS
+from services.integrations.airtable import AirtableService
+from utils.http.http_client import http_client_registry
+from utils.redis.redis_client import redis_client
+
+ORG_ID = "bench_org"
+CONCURRENCY_LEVELS = (1, 2, 4, 8, 16, 32)
+
+
+def airtable_app(bases: int, latency: float, page_size: int = 100, tables_per_base: int = 3):
+    """Stub of the bases and tables metadata endpoints, paging bases by `offset` like Airtable."""
+    base_ids = [f"app{index:05d}" for index in range(bases)]
+
+    async def app(scope, receive, send):
+        if scope["type"] != "http":
+            return
+        await asyncio.sleep(latency)
+        path = scope["path"]
+        if path.endswith("/tables"):
+            base_id = path.split("/")[-2]
+            payload = {"tables": [{"id": f"tbl{base_id}{index}", "name": f"Table {index}"}
+                                  for index in range(tables_per_base)]}
+        else:
+            offset = int(parse_qs(scope["query_string"].decode()).get("offset", ["0"])[0])
+            payload = {"bases": [{"id": base_id, "name": base_id} for base_id in base_ids[offset:offset + page_size]]}
+            if offset + page_size < bases:
+                payload["offset"] = str(offset + page_size)
+        body = json.dumps(payload).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    return app
+
+
+async def main(bases: int, latency_ms: float) -> None:
+    http_client_registry.start()
+    service = AirtableService()
+    try:
+        with run_stub_server(airtable_app(bases, latency_ms / 1000)) as base_url:
+            AIRTABLE_CONSTS.BASES_API_URL = f"{base_url}/v0/meta/bases"
+            baseline = None
+            for concurrency in CONCURRENCY_LEVELS:
+                # a tenant per run, so no run starts with another's quota window or cached items
+                user_id = f"bench_user_{concurrency}"
+                await redis_client.add_key(
+                    redis_client.KeyNamer.get_access_token_key(ORG_ID, user_id, service.name),
+                    "bench_token",
+                    expire_seconds=600,
+                )
+                service.tables_fetch_concurrency = concurrency
+                started = time.perf_counter()
+                items = await service.get_items(ORG_ID, user_id)
+                elapsed = time.perf_counter() - started
+                baseline = baseline or elapsed
+                print(
+                    f"concurrency {concurrency:>3}: {elapsed:6.2f} s  {bases / elapsed:6.1f} bases/s"
+                    f"  speedup {baseline / elapsed:5.1f}x  ({len(items)} items)"
+                )
+                await service.items_cache.invalidate(ORG_ID, user_id)
+    finally:
+        await http_client_registry.aclose()
+
+
+if __name__ == "__main__":
+    bases = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    latency_ms = float(sys.argv[2]) if len(sys.argv) > 2 else 200
+    asyncio.run(main(bases, latency_ms))
@@ -0,0 +1,147 @@
+"""
+Validations per second of the request DTOs, before and after moving stripping and ID checks into pydantic-core.
+"Before" are the previous DTOs, which stripped and checked their fields in Python model validators. Both are
+first run over the same valid and invalid inputs to confirm they agree on them, and over the known exceptions,
+whitespace that only `str.strip()` removes, to confirm they differ there and nowhere else:
+
+    python -m benchmarks.bench_dto_validation [validations]
+"""
+import re
+import sys
+import time
+from typing import Optional
+
+from pydantic import BaseModel, Field, ValidationError, model_validator
+
+from dtos.hubspot import OAuthCallbackRequestDTO, UserOrgParamsDTO
+
+VALIDATIONS = 200000
+
+ID_INPUTS = [
+    ("org123", "user456"),
+    ("  org_123  ", "\tuser-456\n"),
+    ("o", "user456"),
+    ("org123", "  us  "),
+    ("org 123", "user456"),
+    ("org123", "user.456"),
+    ("org123", "ab\ncd"),
+    ("org123", "ünï"),
+    ("", ""),
+]
+CALLBACK_INPUTS = [
+    {"code": " code ", "state": " state "},
+    {"error": "access_denied", "error_description": " denied ", "state": "state"},
+    {"code": "   ", "state": "state"},
+    {"state": "state"},
+    {"code": "code"},
+]
+# str.strip() also removes the ASCII separators \x1c-\x1f, which pydantic-core's strip keeps: IDs wrapped in them
+# used to be accepted without them and are now rejected, and callback values keep them
+ID_STRIP_DIFFERENCES = [("\x1corg123", "user456"), ("org123", "user456\x1f"), ("\x1dorg123\x1e", "user456")]
+CALLBACK_STRIP_DIFFERENCES = [
+    {"code": "\x1c", "state": "state"},
+    {"code": "code\x1f", "state": "state"},
+]
+
+
+def _strip_string(value):
+    if value is not None and isinstance(value, str):
+        return value.strip()
+    return value
+
+
+def _validate_id_field(name: str, value: str) -> str:
+    if len(value) < 3:
+        raise ValueError(f"{name} must be at least 3 characters long")
+    if not re.match(r'^[a-zA-Z0-9-_]+$', value):
+        raise ValueError(f"{name} can only contain alphanumeric characters, dashes, and underscores")
+    return value
+
+
+class OldOAuthCallbackRequestDTO(BaseModel):
+    code: Optional[str] = Field(None)
+    state: str = Field(...)
+    error: Optional[str] = Field(None)
+    error_description: Optional[str] = Field(None)
+
+    @model_validator(mode="before")
+    @classmethod
+    def strip_strings(cls, values):
+        for key in ['code', 'state', 'error', 'error_description']:
+            if key in values:
+                values[key] = _strip_string(values[key])
+        return values
+
+    @model_validator(mode="after")
+    def check_code_or_error(self):
+        if not self.code and not self.error:
+            raise ValueError("OAuth callback is missing 'code' or 'error'")
+        return self
+
+
+class OldUserOrgParamsDTO(BaseModel):
+    user_id: str = Field(...)
+    org_id: str = Field(...)
+
+    @model_validator(mode="before")
+    @classmethod
+    def strip_strings(cls, values):
+        for key in ['user_id', 'org_id']:
+            if key in values:
+                values[key] = _strip_string(values[key])
+        return values
+
+    @model_validator(mode="after")
+    def validate_fields(self):
+        self.user_id = _validate_id_field('user_id', self.user_id)
+        self.org_id = _validate_id_field('org_id', self.org_id)
+        return self
+
+
+def _outcome(dto, data: dict):
+    try:
+        return dto(**data).model_dump()
+    except ValidationError as exc:
+        return sorted(error["loc"] for error in exc.errors())
+
+
+def _same_outcome(old, new, data: dict) -> bool:
+    before, after = _outcome(old, dict(data)), _outcome(new, dict(data))
+    # the old validators failed the whole model, so only whether it failed is comparable, not where
+    return isinstance(before, list) == isinstance(after, list) and (isinstance(before, list) or before == after)
+
+
+def _check_outcomes(old, new, inputs: list[dict], differences: list[dict]) -> None:
+    for data in inputs:
+        if not _same_outcome(old, new, data):
+            raise AssertionError(f"{new.__name__} disagrees on {data!r}")
+    for data in differences:
+        if _same_outcome(old, new, data):
+            raise AssertionError(f"{new.__name__} was expected to differ on {data!r}")
+
+
+def _throughput(dto, data: dict, validations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(validations):
+        dto(**data)
+    return validations / (time.perf_counter() - started)
+
+
+def main(validations: int) -> None:
+    id_inputs = [{"org_id": org_id, "user_id": user_id} for org_id, user_id in ID_INPUTS]
+    id_differences = [{"org_id": org_id, "user_id": user_id} for org_id, user_id in ID_STRIP_DIFFERENCES]
+    _check_outcomes(OldUserOrgParamsDTO, UserOrgParamsDTO, id_inputs, id_differences)
+    _check_outcomes(OldOAuthCallbackRequestDTO, OAuthCallbackRequestDTO, CALLBACK_INPUTS, CALLBACK_STRIP_DIFFERENCES)
+
+    cases = [
+        ("UserOrgParamsDTO", OldUserOrgParamsDTO, UserOrgParamsDTO, id_inputs[1]),
+        ("OAuthCallbackRequestDTO", OldOAuthCallbackRequestDTO, OAuthCallbackRequestDTO, CALLBACK_INPUTS[0]),
+    ]
+    print(f"valid requests validated per second, {validations} each")
+    for label, old, new, data in cases:
+        before, after = _throughput(old, data, validations), _throughput(new, data, validations)
+        print(f"  {label:<24} before {before:10.0f}/s  after {after:10.0f}/s  ({after / before:4.2f}x)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else VALIDATIONS)
@@ -0,0 +1,47 @@
+"""
+Compares per-call httpx clients against the pooled HttpClientRegistry.
+
+    python -m benchmarks.bench_http_client [requests] [concurrency]
+"""
+import asyncio
+import sys
+import time
+
+from benchmarks.stub_server import json_app, run_stub_server
+from config.constants import HTTP_METHODS
+from utils.http.http_client import fetch, http_client_registry
+
+
+async def _run(url: str, total: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            await fetch(HTTP_METHODS.GET, url)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    return time.perf_counter() - started
+
+
+async def main(total: int, concurrency: int) -> None:
+    with run_stub_server(json_app) as base_url:
+        url = f"{base_url}/crm/v3/objects/contacts"
+
+        per_call = await _run(url, total, concurrency)
+
+        http_client_registry.start()
+        try:
+            pooled = await _run(url, total, concurrency)
+        finally:
+            await http_client_registry.aclose()
+
+    for label, elapsed in (("per-call", per_call), ("pooled", pooled)):
+        print(f"{label:>9}: {total / elapsed:8.0f} req/s  {elapsed / total * 1000:6.2f} ms/req")
+    print(f"  speedup: {per_call / pooled:.2f}x")
+
+
+if __name__ == "__main__":
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    asyncio.run(main(total, concurrency))
@@ -0,0 +1,91 @@
+"""
+Size and cost of exporting contacts as NDJSON, an Arrow IPC stream and Parquet: encoding them page by page as
+/items does, and a client parsing the body into columns ready for a dataframe. Needs pyarrow:
+
+    python -m benchmarks.bench_item_export [items]
+"""
+import asyncio
+import json
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+from config.constants import HUBSPOT_CONSTS
+from dtos.standard import IntegrationItem
+from utils.http import columnar, streaming
+
+PAGE_SIZE = HUBSPOT_CONSTS.CONTACTS_PAGE_SIZE
+
+
+def _build(count: int) -> list[IntegrationItem]:
+    base = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    return [
+        IntegrationItem(
+            id=str(index),
+            name=f"Contact {index}",
+            type="hubspot_contact",
+            creation_time=base + timedelta(seconds=index),
+            last_modified_time=base + timedelta(seconds=index, milliseconds=250),
+            url=f"https://app.hubspot.com/contacts/{index}",
+        )
+        for index in range(count)
+    ]
+
+
+def _encode(items: list[IntegrationItem], media_type: str) -> bytes:
+    async def pages():
+        for start in range(0, len(items), PAGE_SIZE):
+            yield items[start:start + PAGE_SIZE]
+
+    async def collect():
+        return b"".join([chunk async for chunk in streaming.encode_item_pages(pages(), media_type)])
+
+    return asyncio.run(collect())
+
+
+def _parse_ndjson(body: bytes) -> dict:
+    rows = [json.loads(line) for line in body.splitlines()]
+    return {name: [row[name] for row in rows] for name in rows[0]}
+
+
+def _parse_arrow(body: bytes):
+    return columnar.pa.ipc.open_stream(body).read_all()
+
+
+def _parse_parquet(body: bytes):
+    return columnar.pq.read_table(columnar.pa.BufferReader(body))
+
+
+def _timed(function, *args):
+    started = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - started
+
+
+def main(count: int) -> None:
+    if not columnar.AVAILABLE:
+        sys.exit("pyarrow is not installed; pip install pyarrow to compare the columnar formats")
+    columnar.load_pyarrow()
+
+    items = _build(count)
+    formats = (
+        ("NDJSON", streaming.NDJSON_MEDIA_TYPE, _parse_ndjson),
+        ("Arrow", columnar.ARROW_STREAM_MEDIA_TYPE, _parse_arrow),
+        ("Parquet", columnar.PARQUET_MEDIA_TYPE, _parse_parquet),
+    )
+    encoder = "orjson" if streaming.orjson is not None else "stdlib json"
+    print(f"{count} contacts, pages of {PAGE_SIZE} (NDJSON encoded with {encoder})")
+    baseline = None
+    for label, media_type, parse in formats:
+        body, encode_seconds = _timed(_encode, items, media_type)
+        _, parse_seconds = _timed(parse, body)
+        baseline = baseline or (len(body), parse_seconds)
+        print(
+            f"  {label:<8}: {len(body) / 2**20:7.2f} MiB ({len(body) / baseline[0]:4.0%})"
+            f"  encode {encode_seconds * 1000:7.1f} ms  parse {parse_seconds * 1000:7.1f} ms"
+            f" ({parse_seconds / baseline[1]:4.0%})"
+        )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
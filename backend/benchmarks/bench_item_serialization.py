@@ -0,0 +1,101 @@
+"""
+Memory per IntegrationItem and NDJSON serialization throughput, before and after slotting the DTO.
+"Before" is the previous plain class encoded the way FastAPI would (jsonable_encoder + json.dumps)
+and the way the first NDJSON stream did (to_dict + json.dumps).
+
+    python -m benchmarks.bench_item_serialization [items]
+"""
+import json
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+
+from fastapi.encoders import jsonable_encoder
+
+from config.constants import HUBSPOT_CONSTS
+from dtos.standard import IntegrationItem
+from utils.http import streaming
+
+PAGE_SIZE = HUBSPOT_CONSTS.CONTACTS_PAGE_SIZE
+
+
+class DictIntegrationItem:
+    """IntegrationItem as it was before: a plain class with a per-instance __dict__."""
+
+    def __init__(self, **kwargs):
+        for name in (
+            "id", "type", "parent_path_or_name", "parent_id", "name", "creation_time", "last_modified_time",
+            "url", "children", "mime_type", "delta", "drive_id",
+        ):
+            setattr(self, name, kwargs.get(name))
+        self.directory = kwargs.get("directory", False)
+        self.visibility = kwargs.get("visibility", True)
+
+    def to_dict(self) -> dict:
+        data = dict(vars(self))
+        for key in ("creation_time", "last_modified_time"):
+            if data[key] is not None:
+                data[key] = data[key].isoformat()
+        return data
+
+
+def _build(cls, count: int) -> list:
+    base = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    return [
+        cls(
+            id=str(index),
+            name=f"Contact {index}",
+            type="hubspot_contact",
+            directory=False,
+            creation_time=base + timedelta(seconds=index),
+            last_modified_time=base + timedelta(seconds=index, milliseconds=250),
+            visibility=True,
+        )
+        for index in range(count)
+    ]
+
+
+def _bytes_per_item(cls, count: int) -> float:
+    tracemalloc.start()
+    items = _build(cls, count)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del items
+    return current / count
+
+
+def _object_bytes(item) -> int:
+    # the instance itself plus its attribute dict, if it has one; field values are shared by both layouts
+    return sys.getsizeof(item) + (sys.getsizeof(vars(item)) if hasattr(item, "__dict__") else 0)
+
+
+def _throughput(encode, items: list) -> float:
+    # page by page, as the NDJSON stream encodes them
+    started = time.perf_counter()
+    for start in range(0, len(items), PAGE_SIZE):
+        encode(items[start:start + PAGE_SIZE])
+    return len(items) / (time.perf_counter() - started)
+
+
+def main(count: int) -> None:
+    before_items = _build(DictIntegrationItem, count)
+    after_items = _build(IntegrationItem, count)
+
+    print(f"memory per item ({count} items): object / incl. field values")
+    for label, cls, items in (("plain class", DictIntegrationItem, before_items), ("slotted", IntegrationItem, after_items)):
+        print(f"  {label:<12}: {_object_bytes(items[0]):5d} B / {_bytes_per_item(cls, count):5.0f} B")
+
+    runs = {
+        "jsonable_encoder": (before_items, lambda items: json.dumps(jsonable_encoder(items))),
+        "to_dict + json": (before_items, lambda items: "".join(json.dumps(i.to_dict()) + "\n" for i in items)),
+        "encode_item": (after_items, lambda items: b"\n".join(map(streaming.encode_item, items))),
+    }
+    encoder = "orjson" if streaming.orjson is not None else "stdlib json, orjson not installed"
+    print(f"serialization throughput (encode_item uses {encoder})")
+    for label, (items, encode) in runs.items():
+        print(f"  {label:<16}: {_throughput(encode, items):10.0f} items/s")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50000)
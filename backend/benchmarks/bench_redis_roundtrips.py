@@ -0,0 +1,78 @@
+"""
+Measures the Redis side of the OAuth callback and token refresh paths before and after pipelining.
+Run against a real Redis (REDIS_HOST, default localhost) so round-trip latency is included:
+
+    python -m benchmarks.bench_redis_roundtrips [iterations]
+"""
+import asyncio
+import sys
+import time
+
+from utils.redis.redis_client import redis_client
+
+ACCESS_KEY = "bench:org:user:access_token"
+REFRESH_KEY = "bench:org:user:refresh_token"
+NONCE_KEY = "bench:org:user:oauth_state_nonce"
+SCHEDULE_KEY = "bench:token_expiry_schedule"
+
+
+async def callback_sequential(client) -> None:
+    await client.get(NONCE_KEY)
+    await client.delete(NONCE_KEY)
+    await client.set(ACCESS_KEY, "access")
+    await client.expire(ACCESS_KEY, 1800)
+    await client.set(REFRESH_KEY, "refresh")
+
+
+async def callback_pipelined(client) -> None:
+    await client.getdel(NONCE_KEY)
+    async with client.pipeline(transaction=True) as pipe:
+        pipe.set(ACCESS_KEY, "access", ex=1800)
+        pipe.set(REFRESH_KEY, "refresh")
+        pipe.zadd(SCHEDULE_KEY, {"org:user": time.time() + 1800})
+        await pipe.execute()
+
+
+async def refresh_sequential(client) -> None:
+    await client.get(ACCESS_KEY)
+    await client.get(REFRESH_KEY)
+    await client.set(ACCESS_KEY, "access")
+    await client.expire(ACCESS_KEY, 1800)
+    await client.set(REFRESH_KEY, "refresh")
+
+
+async def refresh_pipelined(client) -> None:
+    await client.mget(ACCESS_KEY, REFRESH_KEY)
+    async with client.pipeline(transaction=True) as pipe:
+        pipe.set(ACCESS_KEY, "access", ex=1800)
+        pipe.set(REFRESH_KEY, "refresh")
+        pipe.zadd(SCHEDULE_KEY, {"org:user": time.time() + 1800})
+        await pipe.execute()
+
+
+async def _time(operation, client, iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        await client.set(NONCE_KEY, "nonce")
+        await operation(client)
+    return (time.perf_counter() - started) / iterations
+
+
+async def main(iterations: int) -> None:
+    client = redis_client.redis_client
+    await client.ping()
+    for name, before, after in (
+        ("oauth callback", callback_sequential, callback_pipelined),
+        ("token refresh", refresh_sequential, refresh_pipelined),
+    ):
+        # the nonce re-seed is shared overhead, subtract it out
+        baseline = await _time(lambda c: asyncio.sleep(0), client, iterations)
+        old = await _time(before, client, iterations) - baseline
+        new = await _time(after, client, iterations) - baseline
+        print(f"{name:>15}: sequential {old * 1e6:8.1f} us  pipelined {new * 1e6:8.1f} us  ({old / new:.2f}x)")
+    await client.delete(ACCESS_KEY, REFRESH_KEY, NONCE_KEY, SCHEDULE_KEY)
+    await client.aclose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000))
@@ -0,0 +1,75 @@
+"""
+Latency and failure rate against a fault-injecting upstream (3% 503s and 2% one-second stalls),
+with no retries, with retries only, and with retries plus hedged GETs.
+The load is closed-loop and the stub shares the process: once hedges stop stalls from holding slots,
+more requests compete for the same CPU, so expect p50 to rise with throughput on small machines.
+
+    python -m benchmarks.bench_retry_hedging [requests] [concurrency]
+"""
+import asyncio
+import sys
+import time
+
+import httpx # type: ignore
+
+from benchmarks.stub_server import faulty_app, run_stub_server
+from config.constants import HTTP_METHODS
+from utils.http.http_client import fetch, http_client_registry
+from utils.http.retry import RetryPolicy
+
+POLICIES = {
+    "no retries": dict(max_attempts=1, hedging_enabled=False),
+    "retries": dict(hedging_enabled=False),
+    "retries + hedging": dict(hedging_enabled=True),
+}
+
+
+async def _run(url: str, total: int, concurrency: int, policy: RetryPolicy):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, failures = [], 0
+
+    async def one():
+        nonlocal failures
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await fetch(HTTP_METHODS.GET, url, hedge=True, retry_policy=policy)
+            except httpx.HTTPError:
+                failures += 1
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(one() for _ in range(total)))
+    latencies.sort()
+    return latencies, failures
+
+
+def _percentile(ordered: list, q: float) -> float:
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+
+
+async def main(total: int, concurrency: int) -> None:
+    http_client_registry.start()
+    try:
+        for label, settings in POLICIES.items():
+            app = faulty_app(error_rate=0.03, slow_rate=0.02)
+            with run_stub_server(app) as base_url:
+                policy = RetryPolicy(**settings)
+                # warm the latency tracker so hedges start at the observed p95
+                await _run(f"{base_url}/warmup", 100, concurrency, policy)
+                app.calls = 0
+                started = time.perf_counter()
+                latencies, failures = await _run(f"{base_url}/crm/v3/objects/contacts", total, concurrency, policy)
+                elapsed = time.perf_counter() - started
+            print(
+                f"{label:>18}: p50 {_percentile(latencies, 0.5):7.1f} ms  p99 {_percentile(latencies, 0.99):7.1f} ms"
+                f"  failed {failures / total:6.2%}  upstream calls/request {app.calls / total:.3f}"
+                f"  {total / elapsed:5.0f} req/s"
+            )
+    finally:
+        await http_client_registry.aclose()
+
+
+if __name__ == "__main__":
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    asyncio.run(main(total, concurrency))
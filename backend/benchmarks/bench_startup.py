@@ -0,0 +1,84 @@
+"""
+Cold start of the API, each sample in a fresh interpreter: the time to import `main`, and the time from
+spawning uvicorn to its first response, with HubSpot only and with every integration configured.
+Background consumers are disabled so no Redis is needed:
+
+    python -m benchmarks.bench_startup [runs]
+"""
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+_IMPORT_MAIN = "import time; started = time.perf_counter(); import main; print(time.perf_counter() - started)"
+
+SCENARIOS = {
+    "hubspot only": ("HUBSPOT",),
+    "all integrations": ("HUBSPOT", "NOTION", "AIRTABLE"),
+}
+
+
+def _env(integrations: tuple[str, ...]) -> dict:
+    env = {key: value for key, value in os.environ.items() if not key.endswith(("_CLIENT_ID", "_CLIENT_SECRET"))}
+    for name in integrations:
+        env[f"{name}_CLIENT_ID"] = "bench_client_id"
+        env[f"{name}_CLIENT_SECRET"] = "bench_client_secret"
+        env[f"{name}_CALLBACK_ENDPOINT"] = f"http://localhost:8000/v1/{name.lower()}/oauth2/callback"
+    env.update(TOKEN_REFRESH_SCHEDULER_ENABLED="false", WEBHOOK_CONSUMER_ENABLED="false", PYTHONPATH=str(BACKEND_DIR))
+    return env
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _import_seconds(env: dict) -> float:
+    result = subprocess.run(
+        [sys.executable, "-c", _IMPORT_MAIN], cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True
+    )
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def _first_response_seconds(env: dict) -> float:
+    port = _free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        with httpx.Client() as client:
+            while True:
+                try:
+                    if client.get(f"http://127.0.0.1:{port}/metrics").status_code == 200:
+                        return time.perf_counter() - started
+                except httpx.TransportError:
+                    pass
+                if server.poll() is not None:
+                    raise RuntimeError("uvicorn exited before answering")
+                time.sleep(0.005)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main(runs: int) -> None:
+    print(f"median of {runs} runs")
+    for label, integrations in SCENARIOS.items():
+        env = _env(integrations)
+        imported = statistics.median(_import_seconds(env) for _ in range(runs))
+        answered = statistics.median(_first_response_seconds(env) for _ in range(runs))
+        print(f"  {label:<17}: import main {imported * 1000:6.0f} ms  first response {answered * 1000:6.0f} ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
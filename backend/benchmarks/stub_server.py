@@ -0,0 +1,73 @@
+import asyncio
+import random
+import socket
+import threading
+import time
+from contextlib import contextmanager
+
+import uvicorn
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def run_stub_server(app):
+    """Runs an ASGI app on a local port in a background thread and yields its base url."""
+    port = _free_port()
+    config = uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning")
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    try:
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        server.should_exit = True
+        thread.join()
+
+
+async def json_app(scope, receive, send):
+    """Minimal upstream stub answering every request with a small JSON body."""
+    if scope["type"] != "http":
+        return
+    body = b'{"results": [], "paging": null}'
+    await send({
+        "type": "http.response.start",
+        "status": 200,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+def faulty_app(error_rate: float = 0.05, slow_rate: float = 0.05, slow_seconds: float = 1.0, seed: int = 7):
+    """
+    Upstream stub injecting faults: a share of requests get a 503, another share answer after `slow_seconds`.
+    Counts requests in `app.calls` so callers can measure load amplification.
+    """
+    rng = random.Random(seed)
+
+    async def app(scope, receive, send):
+        if scope["type"] != "http":
+            return
+        app.calls += 1
+        roll = rng.random()
+        if roll < error_rate:
+            status, body = 503, b'{"status": "error"}'
+        else:
+            status, body = 200, b'{"results": [], "paging": null}'
+            if roll < error_rate + slow_rate:
+                await asyncio.sleep(slow_seconds)
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    app.calls = 0
+    return app
@@ -32,10 +32,95 @@ class HUBSPOT_CONSTS():
     USER_AUTHORIZATION_REDIRECT_URL="https://app-eu1.hubspot.com/oauth/authorize"
     
     CONTACTS_API_URL = f"{API_BASE_URL}/crm/v3/objects/contacts"
+
+    CONTACTS_SEARCH_API_URL = f"{CONTACTS_API_URL}/search"
+
+    CONTACTS_BATCH_READ_API_URL = f"{CONTACTS_API_URL}/batch/read"
+
+    # Most ids one batch read accepts
+    CONTACTS_BATCH_READ_SIZE = 100
+
+    # Token metadata, including the id of the HubSpot account (portal) it belongs to
+    ACCESS_TOKEN_INFO_URL = f"{API_BASE_URL}/oauth/v1/access-tokens"
+
+    # HubSpot's API limits are per portal; each worker remembers the portal of this many tenants for a while
+    PORTAL_CACHE_ENTRIES = 10000
+    PORTAL_CACHE_SECONDS = 300
+
+    # The search API refuses to page past this many results for a single query
+    SEARCH_RESULTS_LIMIT = 10000
+
+    # Only what items are built from; every property requested adds to each contact HubSpot sends
+    CONTACT_PROPERTIES = ["firstname", "lastname", "createdate", "lastmodifieddate"]
+
+    # Maximum page size accepted by the CRM v3 list endpoints
+    CONTACTS_PAGE_SIZE = 100
+
+    # Number of pages fetched ahead of the consumer while streaming contacts
+    CONTACTS_PREFETCH_PAGES = 2
     
     INTEGRATION_NAME= "hubspot"
-    
-    
-    
-    
-        
+
+    # Most tenants one batch items request may ask for, and how many of them are fetched at once
+    BATCH_ITEMS_MAX_TENANTS = 100
+    BATCH_ITEMS_CONCURRENCY = 10
+
+    # Webhook deliveries signed longer ago than this are rejected as possible replays
+    WEBHOOK_SIGNATURE_MAX_AGE_SECONDS = 300
+
+    WEBHOOK_DELETION_EVENTS = ("contact.deletion", "contact.privacyDeletion")
+
+    SYNC_CONTACTS_JOB = "hubspot.sync_contacts"
+
+
+class NOTION_CONSTS():
+    API_BASE_URL = "https://api.notion.com/v1"
+
+    # Pinned Notion-Version header; results are parsed in the shape of this version
+    API_VERSION = "2022-06-28"
+
+    USER_AUTHORIZATION_REDIRECT_URL = f"{API_BASE_URL}/oauth/authorize"
+
+    TOKEN_URL = f"{API_BASE_URL}/oauth/token"
+
+    SEARCH_API_URL = f"{API_BASE_URL}/search"
+
+    BLOCKS_API_URL = f"{API_BASE_URL}/blocks"
+
+    # Search is walked once per object type, all walks at once
+    SEARCH_OBJECT_TYPES = ("database", "page")
+
+    # Maximum page size accepted by the search and block children endpoints
+    SEARCH_PAGE_SIZE = 100
+    BLOCK_CHILDREN_PAGE_SIZE = 100
+
+    # Notion page and block ids, with or without dashes
+    ID_PATTERN = r"^[0-9a-fA-F]{8}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{12}$"
+
+    # Notion allows an average of three requests per second per connection
+    RATE_LIMIT_MAX_REQUESTS = 3
+    RATE_LIMIT_INTERVAL_SECONDS = 1
+
+    INTEGRATION_NAME = "notion"
+
+
+class AIRTABLE_CONSTS():
+    API_BASE_URL = "https://api.airtable.com/v0"
+
+    SCOPES = "data.records:read schema.bases:read"
+
+    USER_AUTHORIZATION_REDIRECT_URL = "https://airtable.com/oauth2/v1/authorize"
+
+    TOKEN_URL = "https://airtable.com/oauth2/v1/token"
+
+    BASES_API_URL = f"{API_BASE_URL}/meta/bases"
+
+    # Airtable allows 50 requests per second per access token, and five per second per base whoever sends them
+    RATE_LIMIT_MAX_REQUESTS = 50
+    BASE_RATE_LIMIT_MAX_REQUESTS = 5
+    RATE_LIMIT_INTERVAL_SECONDS = 1
+
+    # Number of bases whose tables are fetched at once while listing items
+    TABLES_FETCH_CONCURRENCY = 10
+
+    INTEGRATION_NAME = "airtable"
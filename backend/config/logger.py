@@ -1,17 +1,88 @@
-import logging, sys
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import sys
+from logging.handlers import QueueHandler, QueueListener
 
-logger = logging.getLogger(__name__)
+ROOT_LOGGER_NAME = "nexus"
+
+# LOG_LEVEL sets the default, LOG_LEVELS overrides per module, e.g. "utils.http=DEBUG,utils.redis=WARNING"
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()
+# Fraction of DEBUG records kept; hot paths log at DEBUG so full-rate tracing stays affordable
+LOG_DEBUG_SAMPLE_RATE = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "1.0"))
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "file": record.filename,
+            "line": record.lineno,
+        }
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
+
+class DebugSamplingFilter(logging.Filter):
+    def __init__(self, rate: float) -> None:
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno > logging.DEBUG or self.rate >= 1.0 or random.random() < self.rate
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    Enqueues the record untouched. The stock QueueHandler formats the message on the calling thread,
+    which would put interpolation back on the event loop; here the listener thread does all of it.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Module logger under the app root, so LOG_LEVELS can target it by module path."""
+    return logging.getLogger(f"{ROOT_LOGGER_NAME}.{name}")
+
+
+def _configure_levels(root: logging.Logger) -> None:
+    root.setLevel(LOG_LEVEL)
+    for entry in LOG_LEVELS.split(","):
+        name, _, level = entry.partition("=")
+        if name.strip() and level.strip():
+            get_logger(name.strip()).setLevel(level.strip().upper())
+
+
+logger = logging.getLogger(ROOT_LOGGER_NAME)
 
 if not logger.handlers:
     stream_handler = logging.StreamHandler(sys.stdout)
-    formatter = logging.Formatter(
-        "[%(levelname)s] - %(asctime)s - %(message)s (%(filename)s:%(lineno)d)"
-    )
+    if LOG_FORMAT == "json":
+        formatter: logging.Formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter(
+            "[%(levelname)s] - %(asctime)s - %(message)s (%(filename)s:%(lineno)d)"
+        )
     stream_handler.setFormatter(formatter)
-    logger.addHandler(stream_handler)
-    logger.setLevel(logging.INFO)
-    
-    
 
-    
-    
\ No newline at end of file
+    # Formatting and stdout writes run on the listener's thread, off the event loop
+    queue_handler = DeferredQueueHandler(queue.SimpleQueue())
+    queue_handler.addFilter(DebugSamplingFilter(LOG_DEBUG_SAMPLE_RATE))
+    log_listener = QueueListener(queue_handler.queue, stream_handler, respect_handler_level=True)
+    log_listener.start()
+    atexit.register(log_listener.stop)
+
+    logger.addHandler(queue_handler)
+    logger.propagate = False
+    _configure_levels(logger)
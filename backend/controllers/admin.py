@@ -0,0 +1,34 @@
+import os
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from utils.http.circuit_breaker import circuit_breakers
+from utils.redis.redis_client import redis_client
+
+# The admin routes sit on the public app; only the read-only views are served unless this is set
+ADMIN_MUTATIONS_ENABLED = os.getenv("ADMIN_MUTATIONS_ENABLED", "false").lower() == "true"
+
+router = APIRouter()
+
+
+def require_admin_mutations():
+    if not ADMIN_MUTATIONS_ENABLED:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+
+
+@router.get("/redis/pool", response_model=dict)
+async def get_redis_pool_stats():
+    return redis_client.pool_stats()
+
+
+@router.get("/circuit-breakers", response_model=list)
+async def get_circuit_breakers():
+    return [await breaker.snapshot() for breaker in circuit_breakers.values()]
+
+
+@router.post("/circuit-breakers/{name}/reset", response_model=dict, dependencies=[Depends(require_admin_mutations)])
+async def reset_circuit_breaker(name: str):
+    breaker = circuit_breakers.get(name)
+    if breaker is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"No circuit breaker named {name}")
+    await breaker.reset()
+    return await breaker.snapshot()
@@ -1,58 +1,39 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
-from dtos.hubspot import OAuthCallbackRequestDTO, UserOrgParamsDTO
-from dtos.standard import IntegrationItem
-from fastapi.responses import RedirectResponse
-from config.logger import logger
-from services.integrations.hubspot import hubspot_service
+from fastapi import Depends, Request, Response, status
+from controllers.integrations import build_integration_router
+from dtos.hubspot import UserOrgParamsDTO
+from dtos.jobs import JobCreatedDTO
+from config.logger import get_logger
+from services.integrations.hubspot import HubspotService, get_hubspot_service
 import os
 
-FRONTEND_URL = os.getenv("FRONTEND_URL", "http://localhost:3000")
-router = APIRouter()
-
-
-@router.get("/oauth2/callback")
-async def oauth2callback(params: OAuthCallbackRequestDTO = Depends()):
-    frontend_redirect_url = f"{FRONTEND_URL}?status=success"
-    try:
-        await hubspot_service.handle_oauth2callback(
-            code=str(params.code), state=params.state
-        )
-    except Exception as e:
-        logger.error(f"Error in oauth2callback: {e}")
-        frontend_redirect_url = f"{FRONTEND_URL}?status=error"
-
-    return RedirectResponse(url=frontend_redirect_url)
-
-
-@router.get("/oauth2/authorize")
-async def authorize(params: UserOrgParamsDTO = Depends()):
-
-    hubspot_auth_url = await hubspot_service.handle_authorize(
-        params.org_id, params.user_id
-    )
-    return RedirectResponse(url=hubspot_auth_url)
-
-
-@router.get("/credentials", response_model=dict)
-async def get_credentials(params: UserOrgParamsDTO = Depends()):
-    credentials = await hubspot_service.get_credentials(params.org_id, params.user_id)
-    if not credentials:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="HubSpot credentials not found. Please authenticate.",
-        )
-    return {"access_token": credentials}
-
-
-@router.get("/items")
-async def get_items(params: UserOrgParamsDTO = Depends()):
-
-    contacts: List[IntegrationItem] = await hubspot_service.get_items(
-        params.org_id, params.user_id
-    )
-    logger.info(
-        f"Fetching HubSpot items for user {params.user_id} in org {params.org_id}. Contacts: {contacts}"
+logger = get_logger(__name__)
+
+# The public URL HubSpot posts webhooks to, when a proxy in front of us rewrites it; signatures cover it
+HUBSPOT_WEBHOOK_URL = os.getenv("HUBSPOT_WEBHOOK_URL")
+# OAuth, credentials and items endpoints come from the shared integration router
+router = build_integration_router(get_hubspot_service)
+
+
+@router.post("/sync", response_model=JobCreatedDTO, status_code=status.HTTP_202_ACCEPTED)
+async def sync_items(
+    params: UserOrgParamsDTO = Depends(), hubspot_service: HubspotService = Depends(get_hubspot_service)
+):
+    """Queues a full or incremental contact sync for a worker; poll /v1/jobs/{job_id} for progress."""
+    job_id = await hubspot_service.enqueue_contact_sync(params.org_id, params.user_id)
+    logger.info("Queued HubSpot sync job %s for user %s in org %s.", job_id, params.user_id, params.org_id)
+    return JobCreatedDTO(job_id=job_id)
+
+
+@router.post("/webhooks", status_code=status.HTTP_204_NO_CONTENT)
+async def receive_webhooks(request: Request, hubspot_service: HubspotService = Depends(get_hubspot_service)):
+    """Verifies and queues a webhook delivery; events are applied by the webhook consumer."""
+    body = await request.body()
+    hubspot_service.verify_webhook_signature(
+        request.method,
+        HUBSPOT_WEBHOOK_URL or str(request.url),
+        body,
+        request.headers.get("X-HubSpot-Request-Timestamp"),
+        request.headers.get("X-HubSpot-Signature-v3"),
     )
-
-    return contacts
+    await hubspot_service.webhook_queue.enqueue(body)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
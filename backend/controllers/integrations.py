@@ -0,0 +1,93 @@
+from typing import Awaitable, Callable
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.responses import RedirectResponse, StreamingResponse
+from config.logger import get_logger
+from dtos.hubspot import BatchItemsRequestDTO, OAuthCallbackRequestDTO, UserOrgParamsDTO
+from services.integrations.base import IntegrationProvider
+from utils.http.streaming import (
+    NDJSON_MEDIA_TYPE,
+    encode_item_pages,
+    ndjson_record_stream,
+    negotiate_item_media_type,
+    parse_item_fields,
+)
+import os
+
+logger = get_logger(__name__)
+
+FRONTEND_URL = os.getenv("FRONTEND_URL", "http://localhost:3000")
+
+
+def build_integration_router(get_provider: Callable[[], Awaitable[IntegrationProvider]]) -> APIRouter:
+    """
+    The OAuth, credentials and items endpoints every integration exposes. The provider is a dependency,
+    resolved by `get_provider` on each request, so it is only built once the integration is first used.
+    """
+    router = APIRouter()
+    current_provider = Depends(get_provider)
+
+    @router.get("/oauth2/callback")
+    async def oauth2callback(params: OAuthCallbackRequestDTO = Depends(), provider: IntegrationProvider = current_provider):
+        frontend_redirect_url = f"{FRONTEND_URL}?status=success"
+        try:
+            await provider.handle_oauth2callback(code=str(params.code), state=params.state)
+        except Exception as e:
+            logger.error("Error in %s oauth2callback: %s", provider.name, e)
+            frontend_redirect_url = f"{FRONTEND_URL}?status=error"
+
+        return RedirectResponse(url=frontend_redirect_url)
+
+    @router.get("/oauth2/authorize")
+    async def authorize(params: UserOrgParamsDTO = Depends(), provider: IntegrationProvider = current_provider):
+        auth_url = await provider.handle_authorize(params.org_id, params.user_id)
+        return RedirectResponse(url=auth_url)
+
+    @router.get("/credentials", response_model=dict)
+    async def get_credentials(params: UserOrgParamsDTO = Depends(), provider: IntegrationProvider = current_provider):
+        credentials = await provider.get_credentials(params.org_id, params.user_id)
+        if not credentials:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"{provider.display_name} credentials not found. Please authenticate.",
+            )
+        return {"access_token": credentials}
+
+    @router.get("/items")
+    async def get_items(
+        params: UserOrgParamsDTO = Depends(),
+        accept: str | None = Header(None),
+        fields: str | None = Query(None, description="Comma-separated item fields to return, e.g. id,name"),
+        provider: IntegrationProvider = current_provider,
+    ):
+        """
+        NDJSON by default. Analytics clients can ask for `application/vnd.apache.arrow.stream` (one record batch
+        per page) or `application/vnd.apache.parquet` (sent once complete) when the server has pyarrow.
+        `fields` returns only the item fields named, in that order, in any format.
+        """
+        # before fetching anything, so an unsupported format or field costs no upstream calls
+        media_type = negotiate_item_media_type(accept)
+        selected = parse_item_fields(fields)
+        logger.info(
+            "Fetching %s items for user %s in org %s as %s.",
+            provider.display_name, params.user_id, params.org_id, media_type,
+        )
+        item_pages = await provider.stream_items(params.org_id, params.user_id, fields=selected)
+
+        return StreamingResponse(encode_item_pages(item_pages, media_type, selected), media_type=media_type)
+
+    @router.post("/items/batch")
+    async def get_items_batch(body: BatchItemsRequestDTO, provider: IntegrationProvider = current_provider):
+        """
+        One NDJSON line per tenant, in completion order: `{"org_id", "user_id", "items": [...]}` on success,
+        `{"org_id", "user_id", "error": {"status_code", "detail"}}` when that tenant failed.
+        """
+        logger.info("Fetching %s items for %d tenants.", provider.display_name, len(body.tenants))
+        results = provider.get_items_batch([(params.org_id, params.user_id) for params in body.tenants])
+
+        return StreamingResponse(ndjson_record_stream(results), media_type=NDJSON_MEDIA_TYPE)
+
+    @router.get("/items/cache/stats", response_model=dict)
+    async def get_items_cache_stats(provider: IntegrationProvider = current_provider):
+        return provider.items_cache.stats.as_dict()
+
+    return router
@@ -0,0 +1,19 @@
+import json
+
+from fastapi import APIRouter, HTTPException, status
+from dtos.jobs import JobStatusDTO
+from services.job_queue import job_queue
+
+router = APIRouter()
+
+
+@router.get("/{job_id}", response_model=JobStatusDTO)
+async def get_job(job_id: str):
+    job = await job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found or expired.")
+    return JobStatusDTO(
+        **{key: value for key, value in job.items() if key in JobStatusDTO.model_fields and key not in ("error", "result")},
+        error=job.get("error") or None,
+        result=json.loads(job["result"]) if job.get("result") else None,
+    )
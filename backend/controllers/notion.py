@@ -0,0 +1,26 @@
+from fastapi import Depends, Path
+from fastapi.responses import StreamingResponse
+from config.constants import NOTION_CONSTS
+from config.logger import get_logger
+from controllers.integrations import build_integration_router
+from dtos.hubspot import UserOrgParamsDTO
+from services.integrations.notion import NotionService, get_notion_service
+from utils.http.streaming import NDJSON_MEDIA_TYPE, ndjson_stream
+
+logger = get_logger(__name__)
+
+# OAuth, credentials and items endpoints come from the shared integration router
+router = build_integration_router(get_notion_service)
+
+
+@router.get("/items/{item_id}/children")
+async def get_item_children(
+    item_id: str = Path(pattern=NOTION_CONSTS.ID_PATTERN),
+    params: UserOrgParamsDTO = Depends(),
+    notion_service: NotionService = Depends(get_notion_service),
+):
+    """The child blocks of a page or block; those with `directory` set can be expanded the same way."""
+    logger.info("Fetching children of Notion item %s for user %s in org %s.", item_id, params.user_id, params.org_id)
+    item_pages = await notion_service.stream_children(params.org_id, params.user_id, item_id)
+
+    return StreamingResponse(ndjson_stream(item_pages), media_type=NDJSON_MEDIA_TYPE)
@@ -0,0 +1,20 @@
+from typing import Any, Optional
+from pydantic import BaseModel, Field
+
+
+class JobCreatedDTO(BaseModel):
+    job_id: str = Field(..., description="Id to poll the job's status with")
+
+
+class JobStatusDTO(BaseModel):
+    id: str = Field(..., description="Job ID")
+    type: str = Field(..., description="What the job does, e.g. hubspot.sync_contacts")
+    org_id: str = Field(..., description="Organization ID")
+    user_id: str = Field(..., description="User ID")
+    status: str = Field(..., description="queued, running, retrying, succeeded or dead")
+    attempts: int = Field(..., description="Runs started so far")
+    progress: int = Field(..., description="Items processed by the current or last run")
+    error: Optional[str] = Field(None, description="Error of the last failed run")
+    result: Optional[Any] = Field(None, description="What the handler returned, once succeeded")
+    created_at: float = Field(..., description="Unix time the job was queued")
+    updated_at: float = Field(..., description="Unix time of the last status or progress change")
@@ -1,35 +1,56 @@
+from dataclasses import dataclass, fields
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional, List, Sequence
 
+from pydantic import BaseModel, Field
+
+@dataclass(slots=True)
 class IntegrationItem:
-    def __init__(
-        self,
-        id: Optional[str] = None,
-        type: Optional[str] = None,
-        directory: bool = False,
-        parent_path_or_name: Optional[str] = None,
-        parent_id: Optional[str] = None,
-        name: Optional[str] = None,
-        creation_time: Optional[datetime] = None,
-        last_modified_time: Optional[datetime] = None,
-        url: Optional[str] = None,
-        children: Optional[List[str]] = None,
-        mime_type: Optional[str] = None,
-        delta: Optional[str] = None,
-        drive_id: Optional[str] = None,
-        visibility: Optional[bool] = True,
-    ):
-        self.id = id
-        self.type = type
-        self.directory = directory
-        self.parent_path_or_name = parent_path_or_name
-        self.parent_id = parent_id
-        self.name = name
-        self.creation_time = creation_time
-        self.last_modified_time = last_modified_time
-        self.url = url
-        self.children = children
-        self.mime_type = mime_type
-        self.delta = delta
-        self.drive_id = drive_id
-        self.visibility = visibility
+    """
+    Slotted so tenants with tens of thousands of items don't pay for a per-instance __dict__;
+    orjson serializes slotted dataclasses natively, without going through `to_dict`.
+    """
+
+    id: Optional[str] = None
+    type: Optional[str] = None
+    directory: bool = False
+    parent_path_or_name: Optional[str] = None
+    parent_id: Optional[str] = None
+    name: Optional[str] = None
+    creation_time: Optional[datetime] = None
+    last_modified_time: Optional[datetime] = None
+    url: Optional[str] = None
+    children: Optional[List[str]] = None
+    mime_type: Optional[str] = None
+    delta: Optional[str] = None
+    drive_id: Optional[str] = None
+    visibility: Optional[bool] = True
+
+    def to_dict(self) -> dict:
+        """JSON-ready representation, datetimes rendered as ISO 8601 strings."""
+        data = {name: getattr(self, name) for name in _FIELD_NAMES}
+        for key in ("creation_time", "last_modified_time"):
+            if data[key] is not None:
+                data[key] = data[key].isoformat()
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict, fields: Optional[Sequence[str]] = None) -> "IntegrationItem":
+        """Inverse of `to_dict`; with `fields`, only those are read and the others keep their defaults."""
+        data = dict(data) if fields is None else {name: data[name] for name in fields if name in data}
+        for key in ("creation_time", "last_modified_time"):
+            if data.get(key) is not None:
+                data[key] = datetime.fromisoformat(data[key])
+        return cls(**data)
+
+
+_FIELD_NAMES = tuple(field.name for field in fields(IntegrationItem))
+
+
+class OAuthTokenResponseDTO(BaseModel):
+    """Token endpoint response; providers whose tokens don't expire omit `expires_in` and `refresh_token`."""
+
+    token_type: str = Field("bearer", description="Type of the token, e.g. bearer")
+    access_token: str = Field(..., description="Access token used for API authorization")
+    refresh_token: Optional[str] = Field(None, description="Refresh token for obtaining new access tokens")
+    expires_in: Optional[int] = Field(None, description="Number of seconds until the access token expires")
@@ -1,19 +1,57 @@
 from dotenv import load_dotenv
 load_dotenv()
 import os
+from contextlib import asynccontextmanager
 from fastapi import APIRouter, FastAPI, HTTPException
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from utils.errors.handlers import http_exception_handler, Request_validation_error, general_exception_handler
+from utils.errors.handlers import http_exception_handler, Request_validation_error, general_exception_handler, rate_limit_exceeded_handler, circuit_open_handler
 from controllers.hubspot import router as hubspot_router
+from controllers.integrations import build_integration_router
+from controllers.admin import router as admin_router
+from controllers.jobs import router as jobs_router
+from controllers.metrics import router as metrics_router
+from config.constants import AIRTABLE_CONSTS, NOTION_CONSTS
+from services.integrations.base import integration_providers
+from services.integrations.hubspot import get_hubspot_service
+from services.integrations.registry import enabled_provider_names, get_provider, provider_dependency
+from utils.http.circuit_breaker import CircuitOpenError
+from utils.http.http_client import http_client_registry
+from utils.http.rate_limiter import RateLimitExceeded
+from utils.metrics.middleware import MetricsMiddleware
 
+TOKEN_REFRESH_SCHEDULER_ENABLED = os.getenv("TOKEN_REFRESH_SCHEDULER_ENABLED", "true").lower() == "true"
+WEBHOOK_CONSUMER_ENABLED = os.getenv("WEBHOOK_CONSUMER_ENABLED", "true").lower() == "true"
+# Integrations without OAuth configuration are neither mounted nor imported
+ENABLED_PROVIDERS = enabled_provider_names()
 
-app = FastAPI(docs_url="/v1/docs", redoc_url="/v1/redoc", openapi_url="/v1/openapi.json")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    http_client_registry.start()
+    # built here rather than at import, so a missing required variable still fails startup
+    providers = [get_provider(name) for name in ENABLED_PROVIDERS]
+    if TOKEN_REFRESH_SCHEDULER_ENABLED:
+        for provider in providers:
+            provider.token_refresh_scheduler.start()
+    hubspot_service = await get_hubspot_service()
+    if WEBHOOK_CONSUMER_ENABLED:
+        hubspot_service.webhook_queue.start()
+    yield
+    await hubspot_service.webhook_queue.stop()
+    for provider in integration_providers.values():
+        await provider.token_refresh_scheduler.stop()
+    await http_client_registry.aclose()
+
+
+app = FastAPI(docs_url="/v1/docs", redoc_url="/v1/redoc", openapi_url="/v1/openapi.json", lifespan=lifespan)
 
 
 app.add_exception_handler(Exception, general_exception_handler)
 app.add_exception_handler(HTTPException, http_exception_handler)
 app.add_exception_handler(RequestValidationError,Request_validation_error)
+app.add_exception_handler(RateLimitExceeded, rate_limit_exceeded_handler)
+app.add_exception_handler(CircuitOpenError, circuit_open_handler)
 
 origins = ["http://localhost:5173", "http://localhost:3000"]
 frontend_url = os.getenv("FRONTEND_URL")
@@ -30,9 +68,22 @@ app.add_middleware(
     expose_headers=["*"],
     max_age=3600,  # 1 hour
 )
+app.add_middleware(MetricsMiddleware)
 
 
 api_router = APIRouter()
 api_router.include_router(hubspot_router, prefix="/hubspot", tags=["HubSpot"])
+if NOTION_CONSTS.INTEGRATION_NAME in ENABLED_PROVIDERS:
+    from controllers.notion import router as notion_router
+    api_router.include_router(notion_router, prefix="/notion", tags=["Notion"])
+if AIRTABLE_CONSTS.INTEGRATION_NAME in ENABLED_PROVIDERS:
+    api_router.include_router(
+        build_integration_router(provider_dependency(AIRTABLE_CONSTS.INTEGRATION_NAME)),
+        prefix="/airtable",
+        tags=["Airtable"],
+    )
+api_router.include_router(admin_router, prefix="/admin", tags=["Admin"])
+api_router.include_router(jobs_router, prefix="/jobs", tags=["Jobs"])
 app.include_router(api_router, prefix="/v1")
+app.include_router(metrics_router)
 
@@ -1,174 +1,133 @@
-# TODO Needs refactor and cleaning
-
-# # airtable.py
-
-# import datetime
-# import json
-# import secrets
-# from fastapi import Request, HTTPException
-# from fastapi.responses import HTMLResponse
-# import httpx
-# import asyncio
-# import base64
-# import hashlib
-
-# import requests
-# from integrations.integration_item import IntegrationItem
-
-# from redis_client import add_key_value, get_value_redis, delete_key_redis
-
-# # CLIENT_ID = 'XXX'
-# # CLIENT_SECRET = 'XXX'
-# CLIENT_ID = '329147ef-ac8b-4863-bced-77b7b195258f'
-# CLIENT_SECRET = 'e59aec7edddef2edf4388ef611b151ab5fc85c61f828df909c147085e8ffb4f1'
-# REDIRECT_URI = 'http://localhost:8000/integrations/airtable/oauth2callback'
-# authorization_url = f'https://airtable.com/oauth2/v1/authorize?client_id={CLIENT_ID}&response_type=code&owner=user&redirect_uri=http%3A%2F%2Flocalhost%3A8000%2Fintegrations%2Fairtable%2Foauth2callback'
-
-# encoded_client_id_secret = base64.b64encode(f'{CLIENT_ID}:{CLIENT_SECRET}'.encode()).decode()
-# scope = 'data.records:read data.records:write data.recordComments:read data.recordComments:write schema.bases:read schema.bases:write'
-
-# async def authorize_airtable(user_id, org_id):
-#     state_data = {
-#         'state': secrets.token_urlsafe(32),
-#         'user_id': user_id,
-#         'org_id': org_id
-#     }
-#     encoded_state = base64.urlsafe_b64encode(json.dumps(state_data).encode('utf-8')).decode('utf-8')
-
-#     code_verifier = secrets.token_urlsafe(32)
-#     m = hashlib.sha256()
-#     m.update(code_verifier.encode('utf-8'))
-#     code_challenge = base64.urlsafe_b64encode(m.digest()).decode('utf-8').replace('=', '')
-
-#     auth_url = f'{authorization_url}&state={encoded_state}&code_challenge={code_challenge}&code_challenge_method=S256&scope={scope}'
-#     await asyncio.gather(
-#         add_key_value(f'airtable_state:{org_id}:{user_id}', json.dumps(state_data), expire=600),
-#         add_key_value(f'airtable_verifier:{org_id}:{user_id}', code_verifier, expire=600),
-#     )
-
-#     return auth_url
-
-# async def oauth2callback_airtable(request: Request):
-#     if request.query_params.get('error'):
-#         raise HTTPException(status_code=400, detail=request.query_params.get('error_description'))
-#     code = request.query_params.get('code')
-#     encoded_state = request.query_params.get('state')
-#     state_data = json.loads(base64.urlsafe_b64decode(encoded_state).decode('utf-8'))
-
-#     original_state = state_data.get('state')
-#     user_id = state_data.get('user_id')
-#     org_id = state_data.get('org_id')
-
-#     saved_state, code_verifier = await asyncio.gather(
-#         get_value_redis(f'airtable_state:{org_id}:{user_id}'),
-#         get_value_redis(f'airtable_verifier:{org_id}:{user_id}'),
-#     )
-
-#     if not saved_state or original_state != json.loads(saved_state).get('state'):
-#         raise HTTPException(status_code=400, detail='State does not match.')
-
-#     async with httpx.AsyncClient() as client:
-#         response, _, _ = await asyncio.gather(
-#             client.post(
-#                 'https://airtable.com/oauth2/v1/token',
-#                 data={
-#                     'grant_type': 'authorization_code',
-#                     'code': code,
-#                     'redirect_uri': REDIRECT_URI,
-#                     'client_id': CLIENT_ID,
-#                     'code_verifier': code_verifier.decode('utf-8'),
-#                 },
-#                 headers={
-#                     'Authorization': f'Basic {encoded_client_id_secret}',
-#                     'Content-Type': 'application/x-www-form-urlencoded',
-#                 }
-#             ),
-#             delete_key_redis(f'airtable_state:{org_id}:{user_id}'),
-#             delete_key_redis(f'airtable_verifier:{org_id}:{user_id}'),
-#         )
-
-#     await add_key_value(f'airtable_credentials:{org_id}:{user_id}', json.dumps(response.json()), expire=600)
-    
-#     close_window_script = """
-#     <html>
-#         <script>
-#             window.close();
-#         </script>
-#     </html>
-#     """
-#     return HTMLResponse(content=close_window_script)
-
-# async def get_airtable_credentials(user_id, org_id):
-#     credentials = await get_value_redis(f'airtable_credentials:{org_id}:{user_id}')
-#     if not credentials:
-#         raise HTTPException(status_code=400, detail='No credentials found.')
-#     credentials = json.loads(credentials)
-#     await delete_key_redis(f'airtable_credentials:{org_id}:{user_id}')
-
-#     return credentials
-
-# def create_integration_item_metadata_object(
-#     response_json: str, item_type: str, parent_id=None, parent_name=None
-# ) -> IntegrationItem:
-#     parent_id = None if parent_id is None else parent_id + '_Base'
-#     integration_item_metadata = IntegrationItem(
-#         id=response_json.get('id', None) + '_' + item_type,
-#         name=response_json.get('name', None),
-#         type=item_type,
-#         parent_id=parent_id,
-#         parent_path_or_name=parent_name,
-#     )
-
-#     return integration_item_metadata
-
-
-# def fetch_items(
-#     access_token: str, url: str, aggregated_response: list, offset=None
-# ) -> dict:
-#     """Fetching the list of bases"""
-#     params = {'offset': offset} if offset is not None else {}
-#     headers = {'Authorization': f'Bearer {access_token}'}
-#     response = requests.get(url, headers=headers, params=params)
-
-#     if response.status_code == 200:
-#         results = response.json().get('bases', {})
-#         offset = response.json().get('offset', None)
-
-#         for item in results:
-#             aggregated_response.append(item)
-
-#         if offset is not None:
-#             fetch_items(access_token, url, aggregated_response, offset)
-#         else:
-#             return
-
-
-# async def get_items_airtable(credentials) -> list[IntegrationItem]:
-#     credentials = json.loads(credentials)
-#     url = 'https://api.airtable.com/v0/meta/bases'
-#     list_of_integration_item_metadata = []
-#     list_of_responses = []
-
-#     fetch_items(credentials.get('access_token'), url, list_of_responses)
-#     for response in list_of_responses:
-#         list_of_integration_item_metadata.append(
-#             create_integration_item_metadata_object(response, 'Base')
-#         )
-#         tables_response = requests.get(
-#             f'https://api.airtable.com/v0/meta/bases/{response.get("id")}/tables',
-#             headers={'Authorization': f'Bearer {credentials.get("access_token")}'},
-#         )
-#         if tables_response.status_code == 200:
-#             tables_response = tables_response.json()
-#             for table in tables_response['tables']:
-#                 list_of_integration_item_metadata.append(
-#                     create_integration_item_metadata_object(
-#                         table,
-#                         'Table',
-#                         response.get('id', None),
-#                         response.get('name', None),
-#                     )
-#                 )
-
-#     print(f'list_of_integration_item_metadata: {list_of_integration_item_metadata}')
-#     return list_of_integration_item_metadata
+import asyncio
+from collections import deque
+from typing import Any, AsyncIterator, Dict
+
+import httpx  # type: ignore
+
+from config.constants import AIRTABLE_CONSTS, HTTP_CONTENT_TYPE, HTTP_METHODS
+from config.logger import get_logger
+from dtos.standard import IntegrationItem
+from services.integrations.base import IntegrationProvider, TokenSession
+from utils.http.http_client import fetch
+from utils.http.pagination import paginate_cursor, prefetch
+from utils.http.rate_limiter import RateLimitBucket, RateLimiter
+
+logger = get_logger(__name__)
+
+
+class AirtableService(IntegrationProvider):
+    name = AIRTABLE_CONSTS.INTEGRATION_NAME
+    display_name = "Airtable"
+    authorization_url = AIRTABLE_CONSTS.USER_AUTHORIZATION_REDIRECT_URL
+    token_url = AIRTABLE_CONSTS.TOKEN_URL
+    scopes = AIRTABLE_CONSTS.SCOPES
+    authorize_params = {"response_type": "code"}
+    token_basic_auth = True
+    use_pkce = True
+    rate_limit = (AIRTABLE_CONSTS.RATE_LIMIT_MAX_REQUESTS, AIRTABLE_CONSTS.RATE_LIMIT_INTERVAL_SECONDS)
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.base_rate_limiter = RateLimiter(
+            self.name, AIRTABLE_CONSTS.BASE_RATE_LIMIT_MAX_REQUESTS, AIRTABLE_CONSTS.RATE_LIMIT_INTERVAL_SECONDS
+        )
+        self.tables_fetch_concurrency = AIRTABLE_CONSTS.TABLES_FETCH_CONCURRENCY
+
+    async def iter_item_pages(self, session: TokenSession) -> AsyncIterator[list[IntegrationItem]]:
+        """
+        One page per base, in listing order: the base followed by its tables, which link back to it.
+        Pages of bases are fetched offset after offset, one ahead of the consumer, while the tables of up to
+        `tables_fetch_concurrency` bases are fetched at once, across page boundaries. Every call takes a slot
+        of the tenant's token quota, and table calls also one of their base's.
+        """
+        semaphore = asyncio.Semaphore(self.tables_fetch_concurrency)
+
+        async def fetch_bases(offset: str | None) -> Dict[str, Any]:
+            return await session.call(lambda token: self._fetch_bases(token, offset, session.rate_limit))
+
+        async def load(airtable_base: Dict[str, Any]) -> list[IntegrationItem]:
+            async with semaphore:
+                tables = await self._fetch_base_tables(session, airtable_base)
+            return [self._base_item(airtable_base), *(self._table_item(table, airtable_base) for table in tables)]
+
+        pending: deque[asyncio.Task] = deque()
+        try:
+            async for page in prefetch(paginate_cursor(fetch_bases, self._next_page_cursor), 1):
+                pending.extend(asyncio.create_task(load(airtable_base)) for airtable_base in page.get("bases", []))
+                # keep listing while fewer bases are queued than can be fetched at once
+                while len(pending) > self.tables_fetch_concurrency or (pending and pending[0].done()):
+                    yield await pending.popleft()
+            while pending:
+                yield await pending.popleft()
+        finally:
+            # the consumer stopped or a base failed; don't keep fetching the rest
+            for task in pending:
+                task.cancel()
+
+    async def _fetch_base_tables(self, session: TokenSession, airtable_base: Dict[str, Any]) -> list[Dict[str, Any]]:
+        base_rate_limit = self.base_rate_limiter.scoped_bucket(airtable_base["id"], session.rate_limit.priority)
+        try:
+            response = await session.call(
+                lambda token: self._fetch_tables(token, airtable_base["id"], session.rate_limit, base_rate_limit)
+            )
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code not in (403, 404):
+                raise
+            # the token may list a base without being allowed to read its schema
+            logger.warning("Skipping tables of Airtable base %s: HTTP %s", airtable_base["id"], e.response.status_code)
+            return []
+        return response.get("tables", [])
+
+    @staticmethod
+    def _next_page_cursor(page: Dict[str, Any]) -> str | None:
+        return page.get("offset")
+
+    async def _fetch_bases(
+        self, access_token: str, offset: str | None = None, rate_limit: RateLimitBucket | None = None
+    ) -> Dict[str, Any]:
+        return await fetch(
+            method=HTTP_METHODS.GET,
+            url=AIRTABLE_CONSTS.BASES_API_URL,
+            params={"offset": offset} if offset else None,
+            headers={"Authorization": f"Bearer {access_token}"},
+            content_type=HTTP_CONTENT_TYPE.JSON,
+            rate_limit=rate_limit,
+            circuit_breaker=self.circuit_breaker,
+        )
+
+    async def _fetch_tables(
+        self,
+        access_token: str,
+        base_id: str,
+        rate_limit: RateLimitBucket | None = None,
+        base_rate_limit: RateLimitBucket | None = None,
+    ) -> Dict[str, Any]:
+        if base_rate_limit is not None:
+            await base_rate_limit.acquire()
+        return await fetch(
+            method=HTTP_METHODS.GET,
+            url=f"{AIRTABLE_CONSTS.BASES_API_URL}/{base_id}/tables",
+            headers={"Authorization": f"Bearer {access_token}"},
+            content_type=HTTP_CONTENT_TYPE.JSON,
+            rate_limit=rate_limit,
+            circuit_breaker=self.circuit_breaker,
+        )
+
+    @staticmethod
+    def _base_item(airtable_base: Dict[str, Any]) -> IntegrationItem:
+        return IntegrationItem(
+            id=airtable_base.get("id"),
+            name=airtable_base.get("name"),
+            type="Base",
+            directory=True,
+        )
+
+    @staticmethod
+    def _table_item(table: Dict[str, Any], airtable_base: Dict[str, Any]) -> IntegrationItem:
+        return IntegrationItem(
+            id=table.get("id"),
+            name=table.get("name"),
+            type="Table",
+            parent_id=airtable_base.get("id"),
+            parent_path_or_name=airtable_base.get("name"),
+        )
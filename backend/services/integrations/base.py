@@ -0,0 +1,507 @@
+import abc
+import asyncio
+import base64
+import binascii
+import datetime
+import hashlib
+import json
+import os
+import secrets
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Sequence, Type, TypeVar
+
+import httpx  # type: ignore
+from fastapi import HTTPException, status
+
+from config.constants import HTTP_CONTENT_TYPE, HTTP_METHODS
+from config.logger import get_logger
+from dtos.standard import IntegrationItem, OAuthTokenResponseDTO
+from services.token_refresh_scheduler import TokenRefreshScheduler
+from utils.cache.items_cache import CachedItems, ItemsCache
+from utils.concurrency.single_flight import SingleFlight
+from utils.http.circuit_breaker import CircuitBreaker, CircuitOpenError
+from utils.http.http_client import build_url_with_params, fetch
+from utils.http.rate_limiter import (
+    RATE_LIMIT_INTERVAL_SECONDS,
+    RATE_LIMIT_MAX_REQUESTS,
+    Priority,
+    RateLimitBucket,
+    RateLimitExceeded,
+    RateLimiter,
+)
+from utils.metrics.registry import metrics_registry
+from utils.redis.redis_client import redis_client
+
+logger = get_logger(__name__)
+
+TOKEN_REFRESHES = metrics_registry.counter(
+    "integration_token_refreshes",
+    "Access token refresh attempts; 'reused' means another worker had already refreshed it.",
+    ("integration", "outcome"),
+)
+
+# How long an authorization started with /oauth2/authorize may take to come back to the callback
+OAUTH_STATE_TTL_SECONDS = 600
+# Upper bound on how long one worker may hold, or wait for, a tenant's token refresh lock
+TOKEN_REFRESH_LOCK_TIMEOUT_SECONDS = 30
+
+T = TypeVar("T")
+
+
+def parse_datetime(value: str | None) -> datetime.datetime | None:
+    """ISO 8601 timestamps as upstream APIs send them, `Z` suffix included; None when missing or malformed."""
+    if not value:
+        return None
+    try:
+        # accepts the `Z` suffix since Python 3.11
+        return datetime.datetime.fromisoformat(value)
+    except (ValueError, TypeError):
+        return None
+
+
+def parse_datetimes(values: List[str | None]) -> List[datetime.datetime | None]:
+    """
+    `parse_datetime` over a column of timestamps. The whole column goes through the C parser in one `map`,
+    falling back to one value at a time only for columns holding a missing or malformed timestamp.
+    """
+    try:
+        return list(map(datetime.datetime.fromisoformat, values))
+    except (ValueError, TypeError):
+        return [parse_datetime(value) for value in values]
+
+
+def _code_challenge(code_verifier: str) -> str:
+    digest = hashlib.sha256(code_verifier.encode("utf-8")).digest()
+    return base64.urlsafe_b64encode(digest).decode("utf-8").rstrip("=")
+
+
+async def _chain_pages(
+    first_page: list[IntegrationItem] | None, item_pages: AsyncIterator[list[IntegrationItem]]
+) -> AsyncIterator[list[IntegrationItem]]:
+    if first_page is None:
+        return
+    yield first_page
+    async for page in item_pages:
+        yield page
+
+
+class TokenSession:
+    """
+    Runs a sequence of upstream calls for one tenant, refreshing the access token once if it is rejected.
+    `rate_limit` is the quota bucket the tenant's calls draw from, at the priority of the work they belong to.
+    """
+
+    def __init__(
+        self,
+        service: "IntegrationProvider",
+        org_id: str,
+        user_id: str,
+        access_token: str,
+        rate_limit: RateLimitBucket,
+    ) -> None:
+        self.service = service
+        self.org_id = org_id
+        self.user_id = user_id
+        self.access_token = access_token
+        self.rate_limit = rate_limit
+
+    async def call(self, request: Callable[[str], Awaitable[T]]) -> T:
+        try:
+            return await request(self.access_token)
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code != 401:
+                raise e
+        logger.info("Access token expired or invalid. Attempting to refresh.")
+        try:
+            self.access_token = await self.service._refresh_access_token(
+                self.org_id, self.user_id, rejected_token=self.access_token
+            )
+            logger.info("Token refreshed successfully. Retrying the API call.")
+            return await request(self.access_token)
+        except Exception as refresh_error:
+            logger.error("Failed to refresh %s token: %s", self.service.display_name, refresh_error)
+            raise HTTPException(
+                status.HTTP_401_UNAUTHORIZED,
+                "Could not refresh token. Please re-authenticate.",
+            )
+
+
+class IntegrationProvider(abc.ABC):
+    """
+    OAuth 2.0 connection and item listing for one upstream. Subclasses describe the upstream's OAuth endpoints
+    in class attributes and implement `iter_item_pages`; the authorize/callback flow with single-use state
+    nonces (and PKCE when `use_pkce`), token storage with ahead-of-expiry and single-flight refreshes, and
+    cached, rate-limited, circuit-broken item fetches over the shared pooled client come with the base class.
+    OAuth configuration is read from `<NAME>_CLIENT_ID`, `<NAME>_CLIENT_SECRET` and `<NAME>_CALLBACK_ENDPOINT`.
+    """
+
+    name: str
+    display_name: str
+    authorization_url: str
+    token_url: str
+    scopes: str = ""
+    # Extra query parameters the upstream's authorization page expects
+    authorize_params: Dict[str, str] = {}
+    # Send the client credentials as HTTP Basic auth instead of in the token request body
+    token_basic_auth: bool = False
+    token_content_type: HTTP_CONTENT_TYPE = HTTP_CONTENT_TYPE.FORM
+    token_response_model: Type[OAuthTokenResponseDTO] = OAuthTokenResponseDTO
+    use_pkce: bool = False
+    # Fail at startup without OAuth configuration; other integrations are simply not mounted (see registry)
+    required: bool = False
+    # Per-tenant quota (requests, seconds) until the upstream's rate limit headers say otherwise
+    rate_limit: tuple[int, float] = (RATE_LIMIT_MAX_REQUESTS, RATE_LIMIT_INTERVAL_SECONDS)
+    page_size: int = 100
+    # How many tenants of one batch items request are fetched at once
+    batch_concurrency: int = 10
+
+    def __init__(self) -> None:
+        prefix = self.name.upper()
+        self.client_id: str | None = os.getenv(f"{prefix}_CLIENT_ID")
+        self.client_secret: str | None = os.getenv(f"{prefix}_CLIENT_SECRET")
+        self.redirect_uri: str | None = os.getenv(f"{prefix}_CALLBACK_ENDPOINT")
+
+        self.configured = all([self.client_id, self.client_secret, self.redirect_uri])
+        if not self.configured:
+            if self.required:
+                logger.error("one or more %s OAuth environment variable(s) is missing", self.display_name)
+                raise Exception("OAuth environment configuration error")
+            logger.warning(
+                "%s OAuth environment variables are missing; the integration is disabled.", self.display_name
+            )
+
+        self.items_cache = ItemsCache(self.name)
+        self.rate_limiter = RateLimiter(self.name, *self.rate_limit)
+        self.circuit_breaker = CircuitBreaker(self.name)
+        self._token_refreshes: SingleFlight[str] = SingleFlight()
+        self.token_refresh_scheduler = TokenRefreshScheduler(self.name, self.refresh_access_token_ahead_of_expiry)
+        integration_providers[self.name] = self
+
+    def _ensure_configured(self) -> None:
+        if not self.configured:
+            raise HTTPException(
+                status.HTTP_503_SERVICE_UNAVAILABLE, f"The {self.display_name} integration is not configured."
+            )
+
+    async def handle_authorize(self, org_id: str, user_id: str) -> str:
+        self._ensure_configured()
+        state_token, nonce = self._generate_state_token(org_id, user_id)
+        params = {"client_id": self.client_id, "redirect_uri": self.redirect_uri, **self.authorize_params}
+        if self.scopes:
+            params["scope"] = self.scopes
+        params["state"] = state_token
+
+        stored_state = nonce
+        if self.use_pkce:
+            code_verifier = secrets.token_urlsafe(64)
+            params["code_challenge"] = _code_challenge(code_verifier)
+            params["code_challenge_method"] = "S256"
+            # kept with the nonce so the callback reads and consumes both in one GETDEL
+            stored_state = f"{nonce}:{code_verifier}"
+
+        nonce_key = redis_client.KeyNamer.get_state_token_key(org_id, user_id, self.name)
+        await redis_client.add_key(nonce_key, stored_state, expire_seconds=OAUTH_STATE_TTL_SECONDS)
+        return build_url_with_params(self.authorization_url, params)
+
+    async def handle_oauth2callback(self, code: str, state: str) -> None:
+        self._ensure_configured()
+        state_from_callback = self._decode_state_token(state)
+        org_id = state_from_callback.get("org_id")
+        user_id = state_from_callback.get("user_id")
+        nonce_from_callback = state_from_callback.get("nonce")
+
+        if not (org_id and user_id and nonce_from_callback):
+            raise HTTPException(
+                status.HTTP_400_BAD_REQUEST, "State is missing required fields."
+            )
+
+        nonce_key = redis_client.KeyNamer.get_state_token_key(org_id, user_id, self.name)
+        # GETDEL: the nonce is single-use whether or not it matches
+        stored_state = await redis_client.consume_key(nonce_key)
+        stored_nonce, _, code_verifier = (stored_state or "").partition(":")
+        if not stored_nonce or stored_nonce != nonce_from_callback:
+            raise HTTPException(
+                status.HTTP_403_FORBIDDEN, "State validation failed. CSRF suspected."
+            )
+
+        tokens = await self._get_access_token(code, code_verifier or None)
+        await self._store_tokens(org_id, user_id, tokens)
+        await self.after_connect(org_id, user_id, tokens.access_token)
+
+    async def after_connect(self, org_id: str, user_id: str, access_token: str) -> None:
+        """Runs once a tenant has connected and its tokens are stored."""
+
+    def _generate_state_token(self, org_id: str, user_id: str) -> tuple[str, str]:
+        nonce = secrets.token_hex(16)
+        state_data = {"org_id": org_id, "user_id": user_id, "nonce": nonce}
+        json_string = json.dumps(state_data)
+        base64_bytes = base64.urlsafe_b64encode(json_string.encode("utf-8"))
+        state_token = base64_bytes.decode("utf-8")
+        return state_token, nonce
+
+    def _decode_state_token(self, state_token: str) -> dict:
+        try:
+            base64_bytes = state_token.encode("utf-8")
+            # base64 string must be padded to a multiple of 4
+            padded_bytes = base64_bytes + b'=' * (-len(base64_bytes) % 4)
+            json_bytes = base64.urlsafe_b64decode(padded_bytes)
+            return json.loads(json_bytes.decode("utf-8"))
+        except (binascii.Error, json.JSONDecodeError, UnicodeDecodeError):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid or malformed state parameter."
+            )
+
+    async def _get_access_token(self, code: str, code_verifier: str | None = None) -> OAuthTokenResponseDTO:
+        data = {
+            "grant_type": "authorization_code",
+            "redirect_uri": self.redirect_uri,
+            "code": code,
+        }
+        if code_verifier:
+            data["code_verifier"] = code_verifier
+        return await self._request_tokens(data)
+
+    async def _request_tokens(self, data: Dict[str, Any]) -> OAuthTokenResponseDTO:
+        headers = None
+        if self.token_basic_auth:
+            credentials = base64.b64encode(f"{self.client_id}:{self.client_secret}".encode()).decode()
+            headers = {"Authorization": f"Basic {credentials}"}
+        else:
+            data = {**data, "client_id": self.client_id, "client_secret": self.client_secret}
+
+        token_response = await fetch(
+            method=HTTP_METHODS.POST,
+            url=self.token_url,
+            body=data,
+            headers=headers,
+            content_type=self.token_content_type,
+        )
+        return self.token_response_model.model_validate(token_response)
+
+    async def get_credentials(self, org_id: str, user_id: str) -> str | None:
+        access_token_key = redis_client.KeyNamer.get_access_token_key(org_id, user_id, self.name)
+        return await redis_client.get_key(access_token_key)
+
+    async def get_credentials_many(self, tenants: List[tuple[str, str]]) -> List[str | None]:
+        """Access tokens for many (org_id, user_id) pairs in one MGET, in the same order."""
+        if not tenants:
+            return []
+        return await redis_client.get_keys(*(
+            redis_client.KeyNamer.get_access_token_key(org_id, user_id, self.name)
+            for org_id, user_id in tenants
+        ))
+
+    async def rate_limit_bucket(self, org_id: str, user_id: str, priority: Priority) -> RateLimitBucket:
+        """The quota a tenant's calls draw from: its own, unless the upstream shares one between tenants."""
+        return self.rate_limiter.bucket(org_id, user_id, priority)
+
+    async def session(
+        self, org_id: str, user_id: str, access_token: str, priority: Priority = Priority.INTERACTIVE
+    ) -> TokenSession:
+        rate_limit = await self.rate_limit_bucket(org_id, user_id, priority)
+        return TokenSession(self, org_id, user_id, access_token, rate_limit)
+
+    async def _resolve_access_token(self, org_id: str, user_id: str, access_token: str | None = None) -> str:
+        if not access_token:
+            access_token = await self.get_credentials(org_id, user_id)
+        if access_token:
+            return access_token
+        # The access token key expires with the token itself; fall back to the refresh token
+        try:
+            return await self._refresh_access_token(org_id, user_id)
+        except Exception as refresh_error:
+            logger.info(
+                "No usable %s access token for user %s in org %s: %s",
+                self.display_name, user_id, org_id, refresh_error,
+            )
+            raise HTTPException(
+                status.HTTP_401_UNAUTHORIZED,
+                f"No {self.display_name} credentials found for this user.",
+            )
+
+    async def get_items(self, org_id: str, user_id: str) -> list[IntegrationItem]:
+        item_pages = await self.stream_items(org_id, user_id)
+        return [item async for page in item_pages for item in page]
+
+    async def get_items_batch(
+        self, tenants: List[tuple[str, str]]
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Items for many (org_id, user_id) pairs, yielding one result per distinct tenant as soon as it is ready.
+        Credentials are read with a single MGET and at most `batch_concurrency` tenants are fetched at once,
+        so the batch takes about as long as its slowest tenant. A failing tenant yields an `error` entry
+        instead of `items` and does not affect the others.
+        """
+        tenants = list(dict.fromkeys(tenants))
+        access_tokens = await self.get_credentials_many(tenants)
+        semaphore = asyncio.Semaphore(self.batch_concurrency)
+
+        async def load(org_id: str, user_id: str, access_token: str | None) -> Dict[str, Any]:
+            result: Dict[str, Any] = {"org_id": org_id, "user_id": user_id}
+            async with semaphore:
+                try:
+                    item_pages = await self.stream_items(org_id, user_id, access_token=access_token)
+                    result["items"] = [item async for page in item_pages for item in page]
+                except Exception as e:
+                    result["error"] = self._batch_error(org_id, user_id, e)
+            return result
+
+        tasks = [
+            asyncio.create_task(load(org_id, user_id, access_token))
+            for (org_id, user_id), access_token in zip(tenants, access_tokens)
+        ]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # the client went away mid-batch; don't keep calling the upstream on its behalf
+            for task in tasks:
+                task.cancel()
+
+    def _batch_error(self, org_id: str, user_id: str, error: Exception) -> Dict[str, Any]:
+        if isinstance(error, HTTPException):
+            return {"status_code": error.status_code, "detail": error.detail}
+        if isinstance(error, RateLimitExceeded):
+            return {"status_code": status.HTTP_429_TOO_MANY_REQUESTS, "detail": str(error),
+                    "retry_after": error.retry_after}
+        if isinstance(error, CircuitOpenError):
+            return {"status_code": status.HTTP_503_SERVICE_UNAVAILABLE, "detail": str(error),
+                    "retry_after": error.retry_after}
+        logger.error(
+            "Failed to fetch %s items for user %s in org %s: %s", self.display_name, user_id, org_id, error
+        )
+        return {"status_code": status.HTTP_502_BAD_GATEWAY,
+                "detail": f"Failed to fetch items from {self.display_name}."}
+
+    async def stream_items(
+        self,
+        org_id: str,
+        user_id: str,
+        priority: Priority = Priority.INTERACTIVE,
+        access_token: str | None = None,
+        fields: Sequence[str] | None = None,
+    ) -> AsyncIterator[list[IntegrationItem]]:
+        """
+        Serve items from the cache when fresh, otherwise stream them from `iter_item_pages` and cache them on
+        the way. The first page is fetched before returning so auth and upstream errors surface before streaming
+        starts; while the upstream's circuit is open, a stale cached entry is served instead when there is one.
+        A sparse fieldset in `fields` limits what is decoded from the cache; fetched items stay whole, since
+        they are cached for every caller.
+        """
+        cached = await self.items_cache.get(org_id, user_id)
+        if cached is not None and cached.is_fresh(self.items_cache.fresh_seconds):
+            return self._iter_cached_item_pages(cached, fields)
+
+        access_token = await self._resolve_access_token(org_id, user_id, access_token)
+        item_pages = self.iter_item_pages(await self.session(org_id, user_id, access_token, priority))
+        try:
+            first_page = await anext(item_pages, None)
+        except CircuitOpenError:
+            if not self.items_cache.serve_stale_when_open or cached is None:
+                raise
+            logger.warning(
+                "%s circuit is open; serving stale items for user %s in org %s.", self.display_name, user_id, org_id
+            )
+            self.items_cache.stats.stale_served += 1
+            return self._iter_cached_item_pages(cached, fields)
+
+        return self._cache_while_streaming(org_id, user_id, _chain_pages(first_page, item_pages))
+
+    @abc.abstractmethod
+    def iter_item_pages(self, session: TokenSession) -> AsyncIterator[list[IntegrationItem]]:
+        """Every item of the tenant, a page at a time, calling the upstream through `session`."""
+
+    async def _iter_cached_item_pages(
+        self, cached: CachedItems, fields: Sequence[str] | None = None
+    ) -> AsyncIterator[list[IntegrationItem]]:
+        for start in range(0, len(cached.items), self.page_size):
+            yield [IntegrationItem.from_dict(item, fields) for item in cached.items[start:start + self.page_size]]
+
+    async def _cache_while_streaming(
+        self, org_id: str, user_id: str, item_pages: AsyncIterator[list[IntegrationItem]]
+    ) -> AsyncIterator[list[IntegrationItem]]:
+        """Passes pages through while collecting them; tenants above the per-entry size cap are not cached."""
+        collected: list[dict] | None = []
+        async for page in item_pages:
+            if collected is not None:
+                collected.extend(item.to_dict() for item in page)
+                if len(collected) > self.items_cache.max_items_per_entry:
+                    collected = None
+            yield page
+
+        if collected is not None:
+            await self.items_cache.set(
+                org_id, user_id, CachedItems(items=collected, fetched_at=time.time())
+            )
+
+    async def _refresh_access_token(
+        self, org_id: str, user_id: str, rejected_token: str | None = None
+    ) -> str:
+        """
+        Single-flight refresh: concurrent callers in this process share one in-flight refresh, and a Redis lock
+        makes other workers wait for it and reuse the stored token instead of refreshing again.
+        """
+        lock_key = redis_client.KeyNamer.get_token_refresh_lock_key(org_id, user_id, self.name)
+        return await self._token_refreshes.do(
+            lock_key,
+            lambda: self._refresh_access_token_locked(lock_key, org_id, user_id, rejected_token),
+        )
+
+    async def _refresh_access_token_locked(
+        self, lock_key: str, org_id: str, user_id: str, rejected_token: str | None
+    ) -> str:
+        async with redis_client.lock(
+            lock_key,
+            timeout=TOKEN_REFRESH_LOCK_TIMEOUT_SECONDS,
+            blocking_timeout=TOKEN_REFRESH_LOCK_TIMEOUT_SECONDS,
+        ):
+            current_token, refresh_token = await redis_client.get_keys(
+                redis_client.KeyNamer.get_access_token_key(org_id, user_id, self.name),
+                redis_client.KeyNamer.get_refresh_token_key(org_id, user_id, self.name),
+            )
+            # Another worker may have refreshed while we waited for the lock
+            if current_token and current_token != rejected_token:
+                logger.info("Reusing %s access token refreshed by another worker.", self.display_name)
+                TOKEN_REFRESHES.inc(self.name, "reused")
+                return current_token
+            try:
+                access_token = await self._request_token_refresh(org_id, user_id, refresh_token)
+            except Exception:
+                TOKEN_REFRESHES.inc(self.name, "failed")
+                raise
+            TOKEN_REFRESHES.inc(self.name, "refreshed")
+            return access_token
+
+    async def _request_token_refresh(
+        self, org_id: str, user_id: str, refresh_token: str | None
+    ) -> str:
+        if not refresh_token:
+            raise Exception("No refresh token found to perform the refresh")
+
+        new_tokens = await self._request_tokens({"grant_type": "refresh_token", "refresh_token": refresh_token})
+        await self._store_tokens(org_id, user_id, new_tokens)
+
+        return new_tokens.access_token
+
+    async def _store_tokens(
+        self, org_id: str, user_id: str, tokens: OAuthTokenResponseDTO
+    ) -> None:
+        access_token_key = redis_client.KeyNamer.get_access_token_key(org_id, user_id, self.name)
+        refresh_token_key = redis_client.KeyNamer.get_refresh_token_key(org_id, user_id, self.name)
+        # One atomic round-trip for the token pair and its refresh schedule entry
+        async with redis_client.pipeline() as pipe:
+            pipe.set(access_token_key, tokens.access_token, ex=tokens.expires_in)
+            if tokens.refresh_token:
+                pipe.set(refresh_token_key, tokens.refresh_token)
+            if tokens.expires_in:
+                self.token_refresh_scheduler.schedule_in(pipe, org_id, user_id, tokens.expires_in)
+            await pipe.execute()
+
+    async def refresh_access_token_ahead_of_expiry(self, org_id: str, user_id: str) -> str:
+        """Entry point for the background scheduler: replaces the current token even though it still works."""
+        current_token = await self.get_credentials(org_id, user_id)
+        return await self._refresh_access_token(org_id, user_id, rejected_token=current_token)
+
+
+integration_providers: Dict[str, IntegrationProvider] = {}
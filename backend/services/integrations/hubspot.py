@@ -1,250 +1,523 @@
-import binascii
-import datetime
-import os
-import secrets
-import random
+import hashlib
+import hmac
 import base64
-import json
-from typing import Any, Dict, List
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Sequence
+from urllib.parse import unquote
 
 from dtos.standard import IntegrationItem
-import httpx  # type: ignore
-from fastapi import Request, HTTPException, status
+from fastapi import HTTPException, status
 
 from config.constants import HTTP_METHODS, HUBSPOT_CONSTS, HTTP_CONTENT_TYPE
-from config.logger import logger
+from config.logger import get_logger
 from dtos.hubspot import HubSpotTokenResponseDTO
-from utils.http.http_client import fetch, build_url_with_params
+from services.integrations.base import IntegrationProvider, TokenSession, parse_datetimes
+from services.integrations.registry import get_provider
+from services.job_queue import Job, PermanentJobError, job_queue
+from services.sync_engine import SyncCheckpoint, SyncEngine
+from services.webhook_queue import WebhookQueue
+from utils.cache.items_cache import CachedItems
+from utils.cache.lru import LRUCache
+from utils.concurrency.single_flight import SingleFlight
+from utils.http.circuit_breaker import CircuitOpenError
+from utils.http.http_client import fetch
+from utils.http.pagination import paginate_cursor, prefetch
+from utils.http.rate_limiter import Priority, RateLimitBucket
 from utils.redis.redis_client import redis_client
 
+logger = get_logger(__name__)
 
-class HubspotService:
 
-    def __init__(self) -> None:
-        self.client_id: str | None = os.getenv("HUBSPOT_CLIENT_ID")
-        self.client_secret: str | None = os.getenv("HUBSPOT_CLIENT_SECRET")
-        self.redirect_uri: str | None = os.getenv("HUBSPOT_CALLBACK_ENDPOINT")
-
-        if not all([self.client_id, self.client_secret, self.redirect_uri]):
-            logger.error("one or more HubSpot OAuth environment variable(s) is missing")
-            raise Exception("OAuth environment configuration error")
-
-    async def handle_oauth2callback(self, code: str, state: str):
-        state_from_callback = self._decode_state_token(state)
-        org_id = state_from_callback.get("org_id")
-        user_id = state_from_callback.get("user_id")
-        nonce_from_callback = state_from_callback.get("nonce")
-
-        if not (org_id and user_id and nonce_from_callback):
-            raise HTTPException(
-                status.HTTP_400_BAD_REQUEST, "State is missing required fields."
-            )
+def _search_filter(property_name: str, operator: str, value: int | str) -> Dict[str, str]:
+    return {"propertyName": property_name, "operator": operator, "value": str(value)}
 
-        nonce_key = redis_client.KeyNamer.get_state_token_key(
-            org_id, user_id, HUBSPOT_CONSTS.INTEGRATION_NAME
-        )
-        stored_nonce = await redis_client.get_key(nonce_key)
-        if not stored_nonce or stored_nonce != nonce_from_callback:
-            raise HTTPException(
-                status.HTTP_403_FORBIDDEN, "State validation failed. CSRF suspected."
-            )
 
-        await redis_client.delete_key(nonce_key)
+def _decode_signed_url(url: str) -> str:
+    # HubSpot signs the URL with these characters decoded, and only these
+    for encoded in ("%3A", "%2F", "%3F", "%40", "%21", "%24", "%27", "%28", "%29", "%2A", "%2C", "%3B"):
+        url = url.replace(encoded, unquote(encoded)).replace(encoded.lower(), unquote(encoded))
+    return url
 
-        hubspot_token_response: HubSpotTokenResponseDTO = await self._get_access_token(
-            code
-        )
 
-        access_token_key = redis_client.KeyNamer.get_access_token_key(
-            org_id, user_id, HUBSPOT_CONSTS.INTEGRATION_NAME
-        )
-        refresh_token_key = redis_client.KeyNamer.get_refresh_token_key(
-            org_id, user_id, HUBSPOT_CONSTS.INTEGRATION_NAME
-        )
+class HubspotService(IntegrationProvider):
+    name = HUBSPOT_CONSTS.INTEGRATION_NAME
+    display_name = "HubSpot"
+    authorization_url = HUBSPOT_CONSTS.USER_AUTHORIZATION_REDIRECT_URL
+    token_url = HUBSPOT_CONSTS.TOKEN_URL
+    scopes = HUBSPOT_CONSTS.SCOPES
+    token_response_model = HubSpotTokenResponseDTO
+    required = True
+    page_size = HUBSPOT_CONSTS.CONTACTS_PAGE_SIZE
+    batch_concurrency = HUBSPOT_CONSTS.BATCH_ITEMS_CONCURRENCY
 
-        await redis_client.add_key(
-            access_token_key,
-            hubspot_token_response.access_token,
-            expire_seconds=hubspot_token_response.expires_in,
-        )
-        await redis_client.add_key(
-            refresh_token_key, hubspot_token_response.refresh_token
+    def __init__(self) -> None:
+        super().__init__()
+        self.contact_sync = SyncEngine(HUBSPOT_CONSTS.INTEGRATION_NAME)
+        self._contact_syncs: SingleFlight[list[IntegrationItem]] = SingleFlight()
+        self.webhook_queue = WebhookQueue(HUBSPOT_CONSTS.INTEGRATION_NAME, self.apply_webhook_events)
+        # tenant -> portal id, or "" while it is unknown
+        self._portal_ids: LRUCache[str] = LRUCache(
+            HUBSPOT_CONSTS.PORTAL_CACHE_ENTRIES, HUBSPOT_CONSTS.PORTAL_CACHE_SECONDS
         )
+        job_queue.register(HUBSPOT_CONSTS.SYNC_CONTACTS_JOB, self._run_sync_contacts_job)
 
-    async def handle_authorize(self, org_id: str, user_id: str):
-        state_token, nonce = self._generate_state_token(org_id, user_id)
+    async def after_connect(self, org_id: str, user_id: str, access_token: str) -> None:
+        await self._register_portal(org_id, user_id, access_token)
 
-        nonce_key = redis_client.KeyNamer.get_state_token_key(
-            org_id, user_id, HUBSPOT_CONSTS.INTEGRATION_NAME
-        )
-        await redis_client.add_key(nonce_key, nonce, expire_seconds=600)  # 10 min
+    async def rate_limit_bucket(self, org_id: str, user_id: str, priority: Priority) -> RateLimitBucket:
+        """
+        The quota of the portal the tenant connected, since HubSpot counts calls per portal and every tenant of
+        one portal shares it. Tenants whose portal is not known yet keep a quota of their own.
+        """
+        tenant = f"{org_id}:{user_id}"
+        portal_id = self._portal_ids.get(tenant)
+        if portal_id is None:
+            portal_id = await redis_client.get_key(
+                redis_client.KeyNamer.get_tenant_account_key(org_id, user_id, HUBSPOT_CONSTS.INTEGRATION_NAME)
+            ) or ""
+            self._portal_ids.set(tenant, portal_id)
+        if not portal_id:
+            return await super().rate_limit_bucket(org_id, user_id, priority)
+        return self.rate_limiter.scoped_bucket(f"portal:{portal_id}", priority)
+
+    async def stream_items(
+        self,
+        org_id: str,
+        user_id: str,
+        priority: Priority = Priority.INTERACTIVE,
+        access_token: str | None = None,
+        fields: Sequence[str] | None = None,
+    ) -> AsyncIterator[list[IntegrationItem]]:
+        """
+        Serve items from the cache when fresh. Otherwise sync the tenant's contact store: incrementally when it
+        has a recent checkpoint, then serve the cached entry with the changes merged in or the whole store;
+        or by streaming every page of contacts following the `after` cursor, storing and caching them on the way.
+        Upstream calls that can fail on auth happen before returning, so errors surface before streaming starts.
+        Background callers pass `Priority.BACKGROUND` so they queue behind interactive requests for the quota.
+        Batch callers pass the `access_token` they already read; it is looked up when missing.
+        A sparse fieldset in `fields` limits what is decoded from the cache or store; items on their way into
+        the cache stay whole.
+        """
+        cached = await self.items_cache.get(org_id, user_id)
+        if cached is not None and cached.is_fresh(self.items_cache.fresh_seconds):
+            return self._iter_cached_item_pages(cached, fields)
 
-        params = {
-            "client_id": self.client_id,
-            "redirect_uri": self.redirect_uri,
-            "scope": HUBSPOT_CONSTS.SCOPES,
-            "state": state_token,
-        }
-        return build_url_with_params(
-            HUBSPOT_CONSTS.USER_AUTHORIZATION_REDIRECT_URL, params
-        )
+        access_token = await self._resolve_access_token(org_id, user_id, access_token)
+        session = await self.session(org_id, user_id, access_token, priority)
 
-    async def get_credentials(self, org_id: str, user_id: str) -> str | None:
-        access_token_key = redis_client.KeyNamer.get_access_token_key(
-            org_id, user_id, HUBSPOT_CONSTS.INTEGRATION_NAME
-        )
-        return await redis_client.get_key(access_token_key)
-
-    async def _get_access_token(self, code: str) -> HubSpotTokenResponseDTO:
-        data = {
-            "grant_type": "authorization_code",
-            "client_id": self.client_id,
-            "client_secret": self.client_secret,
-            "redirect_uri": self.redirect_uri,
-            "code": code,
-        }
-        hubspot_token_response = await fetch(
-            HTTP_METHODS.POST,
-            HUBSPOT_CONSTS.TOKEN_URL,
-            body=data,
-            content_type=HTTP_CONTENT_TYPE.FORM
+        async def fetch_page(after: str | None) -> Dict[str, Any]:
+            return await session.call(
+                lambda token: self._fetch_contacts_page(token, after, session.rate_limit)
+            )
+
+        checkpoint = await self.contact_sync.get_checkpoint(org_id, user_id)
+        try:
+            if not self.contact_sync.needs_full_sync(checkpoint):
+                changed = await self._contact_syncs.do(
+                    f"{org_id}:{user_id}", lambda: self._sync_changed_contacts(session, checkpoint)
+                )
+                if cached is not None:
+                    merged = await self._merge_into_cached(session, cached, changed)
+                    return self._iter_cached_item_pages(merged, fields)
+                return self._cache_while_streaming(
+                    org_id,
+                    user_id,
+                    self.contact_sync.store.iter_pages(org_id, user_id, HUBSPOT_CONSTS.CONTACTS_PAGE_SIZE),
+                )
+
+            first_page = await fetch_page(None)
+        except CircuitOpenError:
+            if not self.items_cache.serve_stale_when_open or (cached is None and checkpoint is None):
+                raise
+            logger.warning("HubSpot circuit is open; serving stale items for user %s in org %s.", user_id, org_id)
+            self.items_cache.stats.stale_served += 1
+            if cached is not None:
+                return self._iter_cached_item_pages(cached, fields)
+            return self.contact_sync.store.iter_pages(org_id, user_id, HUBSPOT_CONSTS.CONTACTS_PAGE_SIZE, fields)
+
+        return self._cache_while_streaming(
+            org_id,
+            user_id,
+            self.contact_sync.full_sync(org_id, user_id, self._iter_item_pages(fetch_page, first_page)),
         )
-        return HubSpotTokenResponseDTO.model_validate(hubspot_token_response)
 
-    def _generate_state_token(self, org_id: str, user_id: str) -> tuple[str, str]:
-        nonce = secrets.token_hex(16)
-        state_data = {"org_id": org_id, "user_id": user_id, "nonce": nonce}
-        json_string = json.dumps(state_data)
-        base64_bytes = base64.urlsafe_b64encode(json_string.encode("utf-8"))
-        state_token = base64_bytes.decode("utf-8")
-        return state_token, nonce
+    async def enqueue_contact_sync(self, org_id: str, user_id: str) -> str:
+        """Queues a sync of the tenant's contacts for a worker process and returns the job id."""
+        return await job_queue.enqueue(HUBSPOT_CONSTS.SYNC_CONTACTS_JOB, org_id, user_id)
 
-    def _decode_state_token(self, state_token: str) -> dict:
-        try:
-            base64_bytes = state_token.encode("utf-8")
-            # base64 string must be padded to a multiple of 4
-            padded_bytes = base64_bytes + b'=' * (-len(base64_bytes) % 4)
-            json_bytes = base64.urlsafe_b64decode(padded_bytes)
-            return json.loads(json_bytes.decode("utf-8"))
-        except (binascii.Error, json.JSONDecodeError, UnicodeDecodeError):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid or malformed state parameter."
+    async def sync_contacts(
+        self,
+        org_id: str,
+        user_id: str,
+        on_progress: Callable[[int], Awaitable[Any]] | None = None,
+    ) -> int:
+        """
+        Brings the tenant's contact store up to date at background priority, fully or incrementally as
+        the checkpoint dictates, reporting the running count of contacts synced after each page.
+        The cached item list is dropped afterwards so the next read is served from the store.
+        Returns the number of contacts synced.
+        """
+        access_token = await self._resolve_access_token(org_id, user_id)
+        session = await self.session(org_id, user_id, access_token, Priority.BACKGROUND)
+        synced = 0
+
+        async def counted(
+            item_pages: AsyncIterator[list[IntegrationItem]],
+        ) -> AsyncIterator[list[IntegrationItem]]:
+            nonlocal synced
+            async for page in item_pages:
+                synced += len(page)
+                if on_progress is not None:
+                    await on_progress(synced)
+                yield page
+
+        checkpoint = await self.contact_sync.get_checkpoint(org_id, user_id)
+        if self.contact_sync.needs_full_sync(checkpoint):
+            item_pages = self.iter_item_pages(session)
+            async for _ in counted(self.contact_sync.full_sync(org_id, user_id, item_pages)):
+                pass
+        else:
+            since_ms, after_id = self.contact_sync.resume_point(checkpoint)
+            await self.contact_sync.incremental_sync(
+                org_id, user_id, checkpoint, counted(self._iter_changed_contacts(session, since_ms, after_id))
             )
+        await self.items_cache.invalidate(org_id, user_id)
+        return synced
 
-    async def get_items(self, org_id: str, user_id: str) -> list[IntegrationItem]:
+    async def _run_sync_contacts_job(self, job: Job) -> Dict[str, Any]:
+        try:
+            synced = await self.sync_contacts(job.org_id, job.user_id, job.report_progress)
+        except HTTPException as e:
+            # missing or revoked credentials; the user has to reconnect first
+            raise PermanentJobError(e.detail) from e
+        return {"synced": synced}
+
+    def verify_webhook_signature(
+        self, method: str, url: str, body: bytes, timestamp: str | None, signature: str | None
+    ) -> None:
         """
-        Fetche a list of contacts from HubSpot and check if the access token is expired and does refresh if needed
+        Checks HubSpot's v3 request signature: base64 HMAC-SHA256, keyed with the app's client secret,
+        of method + URL + body + timestamp, where the timestamp must be recent to stop replays.
         """
-        access_token = await self.get_credentials(org_id, user_id)
-        if not access_token:
-            raise HTTPException(
-                status.HTTP_401_UNAUTHORIZED,
-                "No HubSpot credentials found for this user.",
-            )
+        try:
+            signed_at_ms = int(timestamp or "")
+        except ValueError:
+            signed_at_ms = None
+        if (
+            not signature
+            or signed_at_ms is None
+            or abs(time.time() * 1000 - signed_at_ms) > HUBSPOT_CONSTS.WEBHOOK_SIGNATURE_MAX_AGE_SECONDS * 1000
+        ):
+            raise HTTPException(status.HTTP_401_UNAUTHORIZED, "Missing or expired webhook signature.")
+
+        message = method.encode() + _decode_signed_url(url).encode() + body + timestamp.encode()
+        expected = base64.b64encode(
+            hmac.new(self.client_secret.encode(), message, hashlib.sha256).digest()
+        )
+        # compared as bytes: compare_digest rejects non-ASCII str, and a forged header must still be a 401
+        if not hmac.compare_digest(expected, signature.encode()):
+            raise HTTPException(status.HTTP_401_UNAUTHORIZED, "Invalid webhook signature.")
 
+    async def _register_portal(self, org_id: str, user_id: str, access_token: str) -> None:
+        """
+        Remembers which HubSpot account the tenant connected, since webhook events only name the account and
+        its API quota is shared by every tenant connected to it.
+        """
         try:
-            return await self._fetch_contacts_with_token(access_token)
-        except httpx.HTTPStatusError as e:
-            if e.response.status_code == 401:
-                logger.info("Access token expired or invalid. Attempting to refresh.")
+            token_info = await fetch(
+                HTTP_METHODS.GET,
+                f"{HUBSPOT_CONSTS.ACCESS_TOKEN_INFO_URL}/{access_token}",
+                # the token is part of the path; keep it out of the logs
+                log_url=f"{HUBSPOT_CONSTS.ACCESS_TOKEN_INFO_URL}/<access_token>",
+            )
+            portal_id = str(token_info["hub_id"])
+            portal_key = redis_client.KeyNamer.get_account_tenants_key(portal_id, HUBSPOT_CONSTS.INTEGRATION_NAME)
+            await redis_client.add_to_set(portal_key, f"{org_id}:{user_id}")
+            await redis_client.add_key(
+                redis_client.KeyNamer.get_tenant_account_key(org_id, user_id, HUBSPOT_CONSTS.INTEGRATION_NAME),
+                portal_id,
+            )
+            self._portal_ids.set(f"{org_id}:{user_id}", portal_id)
+        except Exception as e:
+            logger.warning(
+                "Could not look up the HubSpot account of user %s in org %s; webhooks won't update it and its calls get a quota of their own: %s",
+                user_id, org_id, e,
+            )
+
+    async def apply_webhook_events(self, events: List[Dict[str, Any]]) -> None:
+        """
+        Coalesces a batch of contact events into one final state per contact, then for every tenant connected
+        to each account drops deleted contacts and re-reads created or changed ones in batches of
+        CONTACTS_BATCH_READ_SIZE, updating both the contact store and any cached item list.
+        Raises once every tenant was tried if any of them failed, so the queue keeps the batch for a retry.
+        """
+        # portal id -> contact id -> whether its latest event deleted it
+        latest: Dict[str, Dict[str, tuple[int, bool]]] = {}
+        for event in events:
+            subscription_type = event.get("subscriptionType", "")
+            if not subscription_type.startswith("contact.") or event.get("objectId") is None:
+                continue
+            contacts = latest.setdefault(str(event.get("portalId")), {})
+            occurred_at = int(event.get("occurredAt") or 0)
+            deleted = subscription_type in HUBSPOT_CONSTS.WEBHOOK_DELETION_EVENTS
+            for contact_id in [event["objectId"], *event.get("mergedObjectIds", [])]:
+                # merged-away contacts are archived into the primary one
+                gone = deleted or str(contact_id) != str(event["objectId"])
+                previous = contacts.get(str(contact_id))
+                if previous is None or occurred_at >= previous[0]:
+                    contacts[str(contact_id)] = (occurred_at, gone)
+
+        failed = 0
+        for portal_id, contacts in latest.items():
+            portal_key = redis_client.KeyNamer.get_account_tenants_key(portal_id, HUBSPOT_CONSTS.INTEGRATION_NAME)
+            changed_ids = [contact_id for contact_id, (_, gone) in contacts.items() if not gone]
+            deleted_ids = [contact_id for contact_id, (_, gone) in contacts.items() if gone]
+            for tenant in await redis_client.get_set_members(portal_key):
+                org_id, user_id = tenant.split(":", 1)
                 try:
-                    new_access_token = await self._refresh_access_token(org_id, user_id)
-                    logger.info("Token refreshed successfully. Retrying the API call.")
-                    return await self._fetch_contacts_with_token(new_access_token)
-                except Exception as refresh_error:
-                    logger.error(f"Failed to refresh HubSpot token: {refresh_error}")
-                    raise HTTPException(
-                        status.HTTP_401_UNAUTHORIZED,
-                        "Could not refresh token. Please re-authenticate.",
+                    await self._apply_contact_changes(org_id, user_id, changed_ids, deleted_ids)
+                except Exception as e:
+                    failed += 1
+                    logger.error(
+                        "Failed to apply HubSpot webhook events for user %s in org %s: %s", user_id, org_id, e
                     )
+        if failed:
+            # reapplying the batch to the tenants that succeeded is harmless: upserts and removals are idempotent
+            raise RuntimeError(f"HubSpot webhook events could not be applied for {failed} tenant(s).")
+
+    async def _apply_contact_changes(
+        self, org_id: str, user_id: str, changed_ids: List[str], deleted_ids: List[str]
+    ) -> None:
+        changed: list[IntegrationItem] = []
+        if changed_ids:
+            access_token = await self._resolve_access_token(org_id, user_id)
+            session = await self.session(org_id, user_id, access_token, Priority.BACKGROUND)
+            for start in range(0, len(changed_ids), HUBSPOT_CONSTS.CONTACTS_BATCH_READ_SIZE):
+                chunk = changed_ids[start:start + HUBSPOT_CONSTS.CONTACTS_BATCH_READ_SIZE]
+                page = await session.call(
+                    lambda token: self._read_contacts(token, chunk, session.rate_limit)
+                )
+                changed.extend(self._create_integration_item_metadata_object(page.get("results", [])))
+            # ids the batch read didn't return were archived since the event
+            returned = {item.id for item in changed}
+            deleted_ids = [*deleted_ids, *(contact_id for contact_id in changed_ids if contact_id not in returned)]
+
+        await self.contact_sync.store.upsert(org_id, user_id, changed)
+        await self.contact_sync.remove(org_id, user_id, deleted_ids)
+
+        cached = await self.items_cache.get(org_id, user_id)
+        if cached is not None:
+            merged = self._merge_items(cached.items, changed, deleted_ids)
+            await self.items_cache.set(org_id, user_id, CachedItems(items=merged, fetched_at=cached.fetched_at))
+
+    @staticmethod
+    def _merge_items(
+        items: List[Dict[str, Any]], changed: Iterable[IntegrationItem], deleted_ids: Iterable[str] = ()
+    ) -> List[Dict[str, Any]]:
+        merged = {item["id"]: item for item in items}
+        for item in changed:
+            merged[item.id] = item.to_dict()
+        for item_id in deleted_ids:
+            merged.pop(item_id, None)
+        return list(merged.values())
+
+    async def iter_item_pages(self, session: TokenSession) -> AsyncIterator[list[IntegrationItem]]:
+        """Every contact of the tenant straight from the contacts API, bypassing the contact store."""
+        async def fetch_page(after: str | None) -> Dict[str, Any]:
+            return await session.call(
+                lambda token: self._fetch_contacts_page(token, after, session.rate_limit)
+            )
+
+        async for page in self._iter_item_pages(fetch_page, await fetch_page(None)):
+            yield page
+
+    async def _iter_item_pages(
+        self,
+        fetch_page: Callable[[str | None], Awaitable[Dict[str, Any]]],
+        first_page: Dict[str, Any],
+    ) -> AsyncIterator[list[IntegrationItem]]:
+        pages = paginate_cursor(fetch_page, self._next_page_cursor, first_page=first_page)
+        async for page in prefetch(pages, HUBSPOT_CONSTS.CONTACTS_PREFETCH_PAGES):
+            yield self._create_integration_item_metadata_object(page.get("results", []))
+
+    async def _sync_changed_contacts(
+        self, session: TokenSession, checkpoint: SyncCheckpoint
+    ) -> list[IntegrationItem]:
+        since_ms, after_id = self.contact_sync.resume_point(checkpoint)
+        return await self.contact_sync.incremental_sync(
+            session.org_id,
+            session.user_id,
+            checkpoint,
+            self._iter_changed_contacts(session, since_ms, after_id),
+        )
+
+    async def _merge_into_cached(
+        self, session: TokenSession, cached: CachedItems, changed: list[IntegrationItem]
+    ) -> CachedItems:
+        revalidated = CachedItems(items=self._merge_items(cached.items, changed), fetched_at=time.time())
+        self.items_cache.stats.revalidations += 1
+        await self.items_cache.set(session.org_id, session.user_id, revalidated)
+        return revalidated
+
+    async def _iter_changed_contacts(
+        self, session: TokenSession, since_ms: int, after_id: str | None = None
+    ) -> AsyncIterator[list[IntegrationItem]]:
+        """
+        Contacts modified at or after `since_ms` (after contact `after_id` within that millisecond, if given),
+        oldest first. A search query stops at SEARCH_RESULTS_LIMIT results, so each time one runs out the next
+        resumes from the last modification time it returned. When a whole query shares a single timestamp,
+        e.g. after a bulk import, that millisecond is walked in id order instead.
+        """
+        cursor_ms, cursor_id, by_id = since_ms, after_id, False
+        while True:
+            sort_property = "hs_object_id" if by_id else "lastmodifieddate"
+            if cursor_id is None:
+                filter_groups = [[_search_filter("lastmodifieddate", "GTE", cursor_ms)]]
             else:
-                raise e
+                filter_groups = [[
+                    _search_filter("lastmodifieddate", "EQ", cursor_ms),
+                    _search_filter("hs_object_id", "GT", cursor_id),
+                ]]
+                if not by_id:
+                    filter_groups.append([_search_filter("lastmodifieddate", "GT", cursor_ms)])
+
+            async def fetch_page(after: str | None) -> Dict[str, Any]:
+                return await session.call(
+                    lambda token: self._search_contacts(
+                        token, filter_groups, sort_property, after, session.rate_limit
+                    )
+                )
+
+            returned = 0
+            last: IntegrationItem | None = None
+            async for page in paginate_cursor(fetch_page, self._next_page_cursor):
+                items = self._create_integration_item_metadata_object(page.get("results", []))
+                returned += len(items)
+                if items:
+                    last = items[-1]
+                    yield items
+                if returned >= HUBSPOT_CONSTS.SEARCH_RESULTS_LIMIT:
+                    break
+
+            if returned < HUBSPOT_CONSTS.SEARCH_RESULTS_LIMIT:
+                if not by_id:
+                    return
+                # that millisecond is done; carry on with everything after it
+                cursor_ms, cursor_id, by_id = cursor_ms + 1, None, False
+                continue
+
+            last_ms = int(last.last_modified_time.timestamp() * 1000) if last.last_modified_time else cursor_ms
+            if by_id:
+                cursor_id = last.id
+            elif last_ms > cursor_ms:
+                # re-reads the contacts sharing `last_ms`; upserts make that harmless
+                cursor_ms, cursor_id = last_ms, None
+            else:
+                by_id, cursor_id = True, cursor_id or "0"
+
+    @staticmethod
+    def _next_page_cursor(page: Dict[str, Any]) -> str | None:
+        return ((page.get("paging") or {}).get("next") or {}).get("after")
 
-    async def _fetch_contacts_with_token(self, access_token: str) -> list:
+    async def _fetch_contacts_page(
+        self, access_token: str, after: str | None = None, rate_limit: RateLimitBucket | None = None
+    ) -> Dict[str, Any]:
         params = {
-            "limit": 10,
+            "limit": HUBSPOT_CONSTS.CONTACTS_PAGE_SIZE,
             "archived": "false",
-            "properties": "firstname,lastname,email,company,website",
+            "properties": ",".join(HUBSPOT_CONSTS.CONTACT_PROPERTIES),
         }
+        if after:
+            params["after"] = after
         headers = {"Authorization": f"Bearer {access_token}"}
-        contacts_response = await fetch(
+        return await fetch(
             method=HTTP_METHODS.GET,
             url=HUBSPOT_CONSTS.CONTACTS_API_URL,
             params=params,
             headers=headers,
             content_type=HTTP_CONTENT_TYPE.JSON,
+            rate_limit=rate_limit,
+            hedge=True,
+            circuit_breaker=self.circuit_breaker,
         )
-        contacts = contacts_response.get("results", [])
-        return self._create_integration_item_metadata_object(contacts)
-
-    async def _refresh_access_token(self, org_id: str, user_id: str) -> str:
-
-        refresh_token_key = redis_client.KeyNamer.get_refresh_token_key(
-            org_id, user_id, HUBSPOT_CONSTS.INTEGRATION_NAME
-        )
-        refresh_token = await redis_client.get_key(refresh_token_key)
 
-        if not refresh_token:
-            raise Exception("No refresh token found to perform the refresh")
-
-        data = {
-            "grant_type": "refresh_token",
-            "client_id": self.client_id,
-            "client_secret": self.client_secret,
-            "refresh_token": refresh_token,
+    async def _search_contacts(
+        self,
+        access_token: str,
+        filter_groups: List[List[Dict[str, str]]],
+        sort_property: str,
+        after: str | None = None,
+        rate_limit: RateLimitBucket | None = None,
+    ) -> Dict[str, Any]:
+        body: Dict[str, Any] = {
+            "filterGroups": [{"filters": filters} for filters in filter_groups],
+            "sorts": [{"propertyName": sort_property, "direction": "ASCENDING"}],
+            "properties": HUBSPOT_CONSTS.CONTACT_PROPERTIES,
+            "limit": HUBSPOT_CONSTS.CONTACTS_PAGE_SIZE,
         }
-
-        token_response_data = await fetch(
+        if after:
+            body["after"] = after
+        headers = {"Authorization": f"Bearer {access_token}"}
+        return await fetch(
             method=HTTP_METHODS.POST,
-            url=HUBSPOT_CONSTS.TOKEN_URL,
-            body=data,
-            headers={"content-type": "application/x-www-form-urlencoded"},
+            url=HUBSPOT_CONSTS.CONTACTS_SEARCH_API_URL,
+            body=body,
+            headers=headers,
+            content_type=HTTP_CONTENT_TYPE.JSON,
+            rate_limit=rate_limit,
+            # the search endpoint is a read, so it is safe to resend
+            idempotent=True,
+            circuit_breaker=self.circuit_breaker,
         )
 
-        new_tokens = HubSpotTokenResponseDTO.model_validate(token_response_data)
-
-        access_token_key = redis_client.KeyNamer.get_access_token_key(
-            org_id, user_id, HUBSPOT_CONSTS.INTEGRATION_NAME
-        )
-        await redis_client.add_key(
-            access_token_key,
-            new_tokens.access_token,
-            expire_seconds=new_tokens.expires_in,
+    async def _read_contacts(
+        self, access_token: str, contact_ids: List[str], rate_limit: RateLimitBucket | None = None
+    ) -> Dict[str, Any]:
+        body = {
+            "inputs": [{"id": contact_id} for contact_id in contact_ids],
+            "properties": HUBSPOT_CONSTS.CONTACT_PROPERTIES,
+        }
+        headers = {"Authorization": f"Bearer {access_token}"}
+        return await fetch(
+            method=HTTP_METHODS.POST,
+            url=HUBSPOT_CONSTS.CONTACTS_BATCH_READ_API_URL,
+            body=body,
+            headers=headers,
+            content_type=HTTP_CONTENT_TYPE.JSON,
+            rate_limit=rate_limit,
+            # a batch read has no side effects
+            idempotent=True,
+            circuit_breaker=self.circuit_breaker,
         )
-        await redis_client.add_key(refresh_token_key, new_tokens.refresh_token)
-
-        return new_tokens.access_token
 
     def _create_integration_item_metadata_object(
         self,
         response_json: List[Dict[str, Any]],
     ) -> List[IntegrationItem]:
+        """
+        Maps a page of contacts a column at a time; each timestamp column is parsed in one `parse_datetimes` call.
+        HubSpot sends unset properties as null, which must not end up in the name.
+        """
+        properties = [contact.get("properties") or {} for contact in response_json]
+        names = [f"{props.get('firstname') or ''} {props.get('lastname') or ''}".strip() for props in properties]
+        creation_times = parse_datetimes([props.get("createdate") for props in properties])
+        last_modified_times = parse_datetimes([props.get("lastmodifieddate") for props in properties])
 
-        integration_items = []
-        for contact in response_json:
-            properties = contact.get("properties", {})
-
-            def parse_date(date_string: str | None) -> datetime.datetime | None:
-                if not date_string:
-                    return None
-                try:
-                    return datetime.datetime.fromisoformat(date_string.replace("Z", "+00:00"))
-                except (ValueError, TypeError):
-                    return None
-
-            item = IntegrationItem(
+        return [
+            IntegrationItem(
                 id=contact.get("id"),
-                name=f"{properties.get('firstname', '')} {properties.get('lastname', '')}".strip(),
+                name=name,
                 type="hubspot_contact",
                 directory=False,
-                creation_time=parse_date(properties.get("createdate")),
-                last_modified_time=parse_date(properties.get("lastmodifieddate")),
+                creation_time=creation_time,
+                last_modified_time=last_modified_time,
                 visibility=not contact.get("archived", False),
             )
-            integration_items.append(item)
-
-        return integration_items
-
+            for contact, name, creation_time, last_modified_time in zip(
+                response_json, names, creation_times, last_modified_times
+            )
+        ]
 
-hubspot_service = HubspotService()
+async def get_hubspot_service() -> HubspotService:
+    """The process-wide HubspotService, built on first use; also a FastAPI dependency."""
+    return get_provider(HUBSPOT_CONSTS.INTEGRATION_NAME)
@@ -1,159 +1,217 @@
-# TODO Needs refactor and cleaning
-# # notion.py
-
-# import json
-# import secrets
-# from fastapi import Request, HTTPException
-# from fastapi.responses import HTMLResponse
-# import httpx
-# import asyncio
-# import base64
-# import requests
-# from integrations.integration_item import IntegrationItem
-
-# from redis_client import add_key_value, get_value_redis, delete_key_redis
-
-# CLIENT_ID = 'XXX'
-# CLIENT_SECRET = 'XXX'
-# encoded_client_id_secret = base64.b64encode(f'{CLIENT_ID}:{CLIENT_SECRET}'.encode()).decode()
-
-# REDIRECT_URI = 'http://localhost:8000/integrations/notion/oauth2callback'
-# authorization_url = f'https://api.notion.com/v1/oauth/authorize?client_id={CLIENT_ID}&response_type=code&owner=user&redirect_uri=http%3A%2F%2Flocalhost%3A8000%2Fintegrations%2Fnotion%2Foauth2callback'
-
-# async def authorize_notion(user_id, org_id):
-#     state_data = {
-#         'state': secrets.token_urlsafe(32),
-#         'user_id': user_id,
-#         'org_id': org_id
-#     }
-#     encoded_state = json.dumps(state_data)
-#     await add_key_value(f'notion_state:{org_id}:{user_id}', encoded_state, expire=600)
-
-#     return f'{authorization_url}&state={encoded_state}'
-
-# async def oauth2callback_notion(request: Request):
-#     if request.query_params.get('error'):
-#         raise HTTPException(status_code=400, detail=request.query_params.get('error'))
-#     code = request.query_params.get('code')
-#     encoded_state = request.query_params.get('state')
-#     state_data = json.loads(encoded_state)
-
-#     original_state = state_data.get('state')
-#     user_id = state_data.get('user_id')
-#     org_id = state_data.get('org_id')
-
-#     saved_state = await get_value_redis(f'notion_state:{org_id}:{user_id}')
-
-#     if not saved_state or original_state != json.loads(saved_state).get('state'):
-#         raise HTTPException(status_code=400, detail='State does not match.')
-
-#     async with httpx.AsyncClient() as client:
-#         response, _ = await asyncio.gather(
-#             client.post(
-#                 'https://api.notion.com/v1/oauth/token',
-#                 json={
-#                     'grant_type': 'authorization_code',
-#                     'code': code,
-#                     'redirect_uri': REDIRECT_URI
-#                 }, 
-#                 headers={
-#                     'Authorization': f'Basic {encoded_client_id_secret}',
-#                     'Content-Type': 'application/json',
-#                 }
-#             ),
-#             delete_key_redis(f'notion_state:{org_id}:{user_id}'),
-#         )
-
-#     await add_key_value(f'notion_credentials:{org_id}:{user_id}', json.dumps(response.json()), expire=600)
-    
-#     close_window_script = """
-#     <html>
-#         <script>
-#             window.close();
-#         </script>
-#     </html>
-#     """
-#     return HTMLResponse(content=close_window_script)
-
-# async def get_notion_credentials(user_id, org_id):
-#     credentials = await get_value_redis(f'notion_credentials:{org_id}:{user_id}')
-#     if not credentials:
-#         raise HTTPException(status_code=400, detail='No credentials found.')
-#     credentials = json.loads(credentials)
-#     if not credentials:
-#         raise HTTPException(status_code=400, detail='No credentials found.')
-#     await delete_key_redis(f'notion_credentials:{org_id}:{user_id}')
-
-#     return credentials
-
-# def _recursive_dict_search(data, target_key):
-#     """Recursively search for a key in a dictionary of dictionaries."""
-#     if target_key in data:
-#         return data[target_key]
-
-#     for value in data.values():
-#         if isinstance(value, dict):
-#             result = _recursive_dict_search(value, target_key)
-#             if result is not None:
-#                 return result
-#         elif isinstance(value, list):
-#             for item in value:
-#                 if isinstance(item, dict):
-#                     result = _recursive_dict_search(item, target_key)
-#                     if result is not None:
-#                         return result
-#     return None
-
-# def create_integration_item_metadata_object(
-#     response_json: str,
-# ) -> IntegrationItem:
-#     """creates an integration metadata object from the response"""
-#     name = _recursive_dict_search(response_json['properties'], 'content')
-#     parent_type = (
-#         ''
-#         if response_json['parent']['type'] is None
-#         else response_json['parent']['type']
-#     )
-#     if response_json['parent']['type'] == 'workspace':
-#         parent_id = None
-#     else:
-#         parent_id = (
-#             response_json['parent'][parent_type]
-#         )
-
-#     name = _recursive_dict_search(response_json, 'content') if name is None else name
-#     name = 'multi_select' if name is None else name
-#     name = response_json['object'] + ' ' + name
-
-#     integration_item_metadata = IntegrationItem(
-#         id=response_json['id'],
-#         type=response_json['object'],
-#         name=name,
-#         creation_time=response_json['created_time'],
-#         last_modified_time=response_json['last_edited_time'],
-#         parent_id=parent_id,
-#     )
-
-#     return integration_item_metadata
-
-# async def get_items_notion(credentials) -> list[IntegrationItem]:
-#     """Aggregates all metadata relevant for a notion integration"""
-#     credentials = json.loads(credentials)
-#     response = requests.post(
-#         'https://api.notion.com/v1/search',
-#         headers={
-#             'Authorization': f'Bearer {credentials.get("access_token")}',
-#             'Notion-Version': '2022-06-28',
-#         },
-#     )
-
-#     if response.status_code == 200:
-#         results = response.json()['results']
-#         list_of_integration_item_metadata = []
-#         for result in results:
-#             list_of_integration_item_metadata.append(
-#                 create_integration_item_metadata_object(result)
-#             )
-
-#         print(list_of_integration_item_metadata)
-#     return
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List
+
+from config.constants import HTTP_CONTENT_TYPE, HTTP_METHODS, NOTION_CONSTS
+from dtos.standard import IntegrationItem
+from services.integrations.base import IntegrationProvider, TokenSession, parse_datetime
+from services.integrations.registry import get_provider
+from utils.http.http_client import fetch
+from utils.http.pagination import merge, paginate_cursor
+from utils.http.rate_limiter import Priority, RateLimitBucket
+
+# Blocks whose name is a plain string rather than rich text
+_NAMED_BLOCK_TYPES = ("child_page", "child_database")
+
+
+def _plain_text(rich_text: List[Dict[str, Any]] | None) -> str | None:
+    return "".join(part.get("plain_text", "") for part in rich_text or []) or None
+
+
+class _TitleResolver:
+    """
+    Reads names from where each object type keeps them instead of searching every property. Database rows keep
+    theirs in a property each database names differently, so it is found once per database and reused.
+    """
+
+    def __init__(self) -> None:
+        self._row_title_keys: Dict[str, str] = {}
+
+    def __call__(self, result: Dict[str, Any]) -> str | None:
+        object_type = result.get("object")
+        if object_type == "database":
+            return _plain_text(result.get("title"))
+        if object_type == "page":
+            return self._page_title(result)
+        block_type = result.get("type")
+        content = result.get(block_type) or {}
+        if block_type in _NAMED_BLOCK_TYPES:
+            return content.get("title") or None
+        return _plain_text(content.get("rich_text"))
+
+    def _page_title(self, page: Dict[str, Any]) -> str | None:
+        properties = page.get("properties") or {}
+        parent = page.get("parent") or {}
+        database_id = parent.get("database_id") if parent.get("type") == "database_id" else None
+        # pages outside databases always call it "title"
+        key = self._row_title_keys.get(database_id) if database_id else "title"
+        prop = properties.get(key) if key else None
+        if prop is None or prop.get("type") != "title":
+            key = next((name for name, value in properties.items() if value.get("type") == "title"), None)
+            if key is None:
+                return None
+            if database_id:
+                self._row_title_keys[database_id] = key
+            prop = properties[key]
+        return _plain_text(prop.get("title"))
+
+
+class NotionService(IntegrationProvider):
+    name = NOTION_CONSTS.INTEGRATION_NAME
+    display_name = "Notion"
+    authorization_url = NOTION_CONSTS.USER_AUTHORIZATION_REDIRECT_URL
+    token_url = NOTION_CONSTS.TOKEN_URL
+    authorize_params = {"response_type": "code", "owner": "user"}
+    token_basic_auth = True
+    token_content_type = HTTP_CONTENT_TYPE.JSON
+    rate_limit = (NOTION_CONSTS.RATE_LIMIT_MAX_REQUESTS, NOTION_CONSTS.RATE_LIMIT_INTERVAL_SECONDS)
+    page_size = NOTION_CONSTS.SEARCH_PAGE_SIZE
+
+    async def iter_item_pages(self, session: TokenSession) -> AsyncIterator[list[IntegrationItem]]:
+        """
+        Every page and database shared with the connection. Search is walked once per object type, each walk
+        followed to its last cursor and all of them at once, and their pages are passed on as they arrive.
+        Child blocks are left out; clients expand them one item at a time through `stream_children`.
+        """
+        titles = _TitleResolver()
+        walks = [self._walk_search(session, object_type, titles) for object_type in NOTION_CONSTS.SEARCH_OBJECT_TYPES]
+        async for items in merge(*walks):
+            yield items
+
+    async def _walk_search(
+        self, session: TokenSession, object_type: str, titles: _TitleResolver
+    ) -> AsyncIterator[list[IntegrationItem]]:
+
+        async def fetch_page(start_cursor: str | None) -> Dict[str, Any]:
+            return await session.call(
+                lambda token: self._search(token, object_type, start_cursor, session.rate_limit)
+            )
+
+        async for page in paginate_cursor(fetch_page, self._next_page_cursor):
+            yield self._create_integration_item_metadata_object(page.get("results", []), titles)
+
+    async def stream_children(
+        self, org_id: str, user_id: str, block_id: str, priority: Priority = Priority.INTERACTIVE
+    ) -> AsyncIterator[list[IntegrationItem]]:
+        """
+        The child blocks of a page or block, fetched when a client expands it rather than while listing, which
+        would cost a call per block of the workspace. Items with `directory` set can be expanded in turn.
+        The first page is fetched before returning, so errors surface before streaming starts.
+        """
+        access_token = await self._resolve_access_token(org_id, user_id)
+        session = await self.session(org_id, user_id, access_token, priority)
+        titles = _TitleResolver()
+
+        async def fetch_page(start_cursor: str | None) -> Dict[str, Any]:
+            return await session.call(
+                lambda token: self._fetch_block_children(token, block_id, start_cursor, session.rate_limit)
+            )
+
+        return self._iter_block_pages(fetch_page, await fetch_page(None), block_id, titles)
+
+    async def _iter_block_pages(
+        self,
+        fetch_page: Callable[[str | None], Awaitable[Dict[str, Any]]],
+        first_page: Dict[str, Any],
+        block_id: str,
+        titles: _TitleResolver,
+    ) -> AsyncIterator[list[IntegrationItem]]:
+        async for page in paginate_cursor(fetch_page, self._next_page_cursor, first_page=first_page):
+            yield self._create_block_items(page.get("results", []), block_id, titles)
+
+    @staticmethod
+    def _next_page_cursor(page: Dict[str, Any]) -> str | None:
+        return page.get("next_cursor") if page.get("has_more") else None
+
+    def _headers(self, access_token: str) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {access_token}", "Notion-Version": NOTION_CONSTS.API_VERSION}
+
+    async def _search(
+        self,
+        access_token: str,
+        object_type: str,
+        start_cursor: str | None = None,
+        rate_limit: RateLimitBucket | None = None,
+    ) -> Dict[str, Any]:
+        body: Dict[str, Any] = {
+            "filter": {"property": "object", "value": object_type},
+            "page_size": NOTION_CONSTS.SEARCH_PAGE_SIZE,
+        }
+        if start_cursor:
+            body["start_cursor"] = start_cursor
+        return await fetch(
+            method=HTTP_METHODS.POST,
+            url=NOTION_CONSTS.SEARCH_API_URL,
+            body=body,
+            headers=self._headers(access_token),
+            content_type=HTTP_CONTENT_TYPE.JSON,
+            rate_limit=rate_limit,
+            # search is a read, so it is safe to resend
+            idempotent=True,
+            circuit_breaker=self.circuit_breaker,
+        )
+
+    async def _fetch_block_children(
+        self,
+        access_token: str,
+        block_id: str,
+        start_cursor: str | None = None,
+        rate_limit: RateLimitBucket | None = None,
+    ) -> Dict[str, Any]:
+        params: Dict[str, Any] = {"page_size": NOTION_CONSTS.BLOCK_CHILDREN_PAGE_SIZE}
+        if start_cursor:
+            params["start_cursor"] = start_cursor
+        return await fetch(
+            method=HTTP_METHODS.GET,
+            url=f"{NOTION_CONSTS.BLOCKS_API_URL}/{block_id}/children",
+            params=params,
+            headers=self._headers(access_token),
+            content_type=HTTP_CONTENT_TYPE.JSON,
+            rate_limit=rate_limit,
+            circuit_breaker=self.circuit_breaker,
+        )
+
+    def _create_integration_item_metadata_object(
+        self,
+        response_json: List[Dict[str, Any]],
+        titles: _TitleResolver,
+    ) -> List[IntegrationItem]:
+
+        integration_items = []
+        for result in response_json:
+            parent = result.get("parent") or {}
+            parent_type = parent.get("type")
+            item = IntegrationItem(
+                id=result.get("id"),
+                name=titles(result),
+                type=result.get("object"),
+                directory=result.get("object") == "database",
+                parent_id=None if parent_type in (None, "workspace") else parent.get(parent_type),
+                creation_time=parse_datetime(result.get("created_time")),
+                last_modified_time=parse_datetime(result.get("last_edited_time")),
+                url=result.get("url"),
+                visibility=not result.get("archived", False),
+            )
+            integration_items.append(item)
+
+        return integration_items
+
+    def _create_block_items(
+        self, blocks: List[Dict[str, Any]], parent_id: str, titles: _TitleResolver
+    ) -> List[IntegrationItem]:
+        return [
+            IntegrationItem(
+                id=block.get("id"),
+                name=titles(block),
+                type=block.get("type"),
+                directory=block.get("has_children", False),
+                parent_id=parent_id,
+                creation_time=parse_datetime(block.get("created_time")),
+                last_modified_time=parse_datetime(block.get("last_edited_time")),
+                visibility=not block.get("archived", False),
+            )
+            for block in blocks
+        ]
+
+
+async def get_notion_service() -> NotionService:
+    """The process-wide NotionService, built on first use; also a FastAPI dependency."""
+    return get_provider(NOTION_CONSTS.INTEGRATION_NAME)
@@ -0,0 +1,55 @@
+import importlib
+import os
+from typing import Awaitable, Callable, Dict, List, NamedTuple
+
+from config.constants import AIRTABLE_CONSTS, HUBSPOT_CONSTS, NOTION_CONSTS
+from services.integrations.base import IntegrationProvider, integration_providers
+
+
+class ProviderSpec(NamedTuple):
+    module: str
+    class_name: str
+    # Mounted even without OAuth configuration, so a missing variable fails startup instead of going unnoticed
+    required: bool = False
+
+
+# Where each integration lives; a module is imported the first time its provider is used
+PROVIDERS: Dict[str, ProviderSpec] = {
+    HUBSPOT_CONSTS.INTEGRATION_NAME: ProviderSpec("services.integrations.hubspot", "HubspotService", required=True),
+    NOTION_CONSTS.INTEGRATION_NAME: ProviderSpec("services.integrations.notion", "NotionService"),
+    AIRTABLE_CONSTS.INTEGRATION_NAME: ProviderSpec("services.integrations.airtable", "AirtableService"),
+}
+
+
+def is_enabled(name: str) -> bool:
+    """Whether this process serves the integration: it is required, or all of its OAuth variables are set."""
+    prefix = name.upper()
+    return PROVIDERS[name].required or all(
+        os.getenv(f"{prefix}_{suffix}") for suffix in ("CLIENT_ID", "CLIENT_SECRET", "CALLBACK_ENDPOINT")
+    )
+
+
+def enabled_provider_names() -> List[str]:
+    return [name for name in PROVIDERS if is_enabled(name)]
+
+
+def get_provider(name: str) -> IntegrationProvider:
+    """The process-wide provider for `name`, importing its module and building it on first use."""
+    provider = integration_providers.get(name)
+    if provider is None:
+        spec = PROVIDERS[name]
+        # providers register themselves in `integration_providers` when built
+        provider = getattr(importlib.import_module(spec.module), spec.class_name)()
+    return provider
+
+
+def provider_dependency(name: str) -> Callable[[], Awaitable[IntegrationProvider]]:
+    """
+    A FastAPI dependency resolving to the provider for `name`, so routers can be built before it is.
+    Async so FastAPI calls it on the event loop instead of handing a dict lookup to its thread pool.
+    """
+
+    async def dependency() -> IntegrationProvider:
+        return get_provider(name)
+
+    return dependency
@@ -0,0 +1,300 @@
+import asyncio
+import json
+import os
+import random
+import socket
+import time
+import uuid
+from contextlib import suppress
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from config.logger import get_logger
+from utils.metrics.registry import metrics_registry
+from utils.redis.redis_client import redis_client
+
+logger = get_logger(__name__)
+
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+JOB_RETRY_BASE_DELAY_SECONDS = float(os.getenv("JOB_RETRY_BASE_DELAY_SECONDS", "5"))
+JOB_RETRY_MAX_DELAY_SECONDS = float(os.getenv("JOB_RETRY_MAX_DELAY_SECONDS", "300"))
+# A job whose worker stops heartbeating for this long is handed to another worker
+JOB_VISIBILITY_TIMEOUT_SECONDS = float(os.getenv("JOB_VISIBILITY_TIMEOUT_SECONDS", "120"))
+# Jobs of one tenant that may run at the same time across all workers
+JOB_TENANT_CONCURRENCY = int(os.getenv("JOB_TENANT_CONCURRENCY", "1"))
+# How long a job waits before trying again when its tenant is already at the limit
+JOB_TENANT_BUSY_DELAY_SECONDS = float(os.getenv("JOB_TENANT_BUSY_DELAY_SECONDS", "5"))
+JOB_WORKER_CONCURRENCY = int(os.getenv("JOB_WORKER_CONCURRENCY", "4"))
+JOB_STATUS_TTL_SECONDS = int(os.getenv("JOB_STATUS_TTL_SECONDS", "604800"))
+JOB_STREAM_MAX_LENGTH = int(os.getenv("JOB_STREAM_MAX_LENGTH", "100000"))
+
+QUEUED, RUNNING, RETRYING, SUCCEEDED, DEAD = "queued", "running", "retrying", "succeeded", "dead"
+
+JOB_OUTCOMES = metrics_registry.counter(
+    "jobs",
+    "Background job runs by outcome: succeeded, retried, dead (attempts exhausted) or deferred (tenant busy).",
+    ("queue", "job_type", "outcome"),
+)
+
+# Tenant slot lease. KEYS: tenant slots (sorted set of job ids scored by lease expiry).
+# ARGV: now (ms), lease (ms), limit, job id. Returns 1 if the job holds a slot, renewing it if it already did.
+_ACQUIRE_SLOT_SCRIPT = """
+local key = KEYS[1]
+local now = tonumber(ARGV[1])
+redis.call('ZREMRANGEBYSCORE', key, '-inf', now)
+if redis.call('ZSCORE', key, ARGV[4]) or redis.call('ZCARD', key) < tonumber(ARGV[3]) then
+    redis.call('ZADD', key, now + tonumber(ARGV[2]), ARGV[4])
+    redis.call('PEXPIRE', key, tonumber(ARGV[2]))
+    return 1
+end
+return 0
+"""
+
+# Moves due retries from the delayed set onto the stream in one step, so a job is always in one of them.
+# KEYS: delayed set, stream. ARGV: now (s), limit, stream max length. Returns the number of jobs moved.
+_PROMOTE_DUE_SCRIPT = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], 0, ARGV[1], 'LIMIT', 0, tonumber(ARGV[2]))
+for _, job_id in ipairs(due) do
+    redis.call('ZREM', KEYS[1], job_id)
+    redis.call('XADD', KEYS[2], 'MAXLEN', '~', ARGV[3], '*', 'job_id', job_id)
+end
+return #due
+"""
+
+
+class PermanentJobError(Exception):
+    """Raised by a handler when retrying cannot help, e.g. the tenant's credentials are gone."""
+
+
+class Job:
+    """A job as its handler sees it; `report_progress` makes headway visible through the jobs API."""
+
+    def __init__(self, queue: "JobQueue", fields: Dict[str, str]) -> None:
+        self.queue = queue
+        self.id = fields["id"]
+        self.type = fields["type"]
+        self.org_id = fields["org_id"]
+        self.user_id = fields["user_id"]
+        self.payload: Dict[str, Any] = json.loads(fields.get("payload") or "{}")
+        self.attempts = int(fields.get("attempts", 0))
+
+    async def report_progress(self, progress: int) -> None:
+        await self.queue.update(self.id, progress=progress)
+
+
+JobHandler = Callable[[Job], Awaitable[Any]]
+
+
+class JobQueue:
+    """
+    Durable queue of background jobs on Redis streams, shared by every worker process.
+    A job's status lives in its own hash; the stream only carries job ids. Failed jobs are retried with
+    exponential backoff and full jitter through a delayed sorted set, and after `max_attempts` they move to
+    a dead-letter stream. Handlers are registered per job type by the services that own them.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_attempts: int = JOB_MAX_ATTEMPTS,
+        retry_base_delay_seconds: float = JOB_RETRY_BASE_DELAY_SECONDS,
+        retry_max_delay_seconds: float = JOB_RETRY_MAX_DELAY_SECONDS,
+        visibility_timeout_seconds: float = JOB_VISIBILITY_TIMEOUT_SECONDS,
+        tenant_concurrency: int = JOB_TENANT_CONCURRENCY,
+        tenant_busy_delay_seconds: float = JOB_TENANT_BUSY_DELAY_SECONDS,
+    ) -> None:
+        self.name = name
+        self.max_attempts = max_attempts
+        self.retry_base_delay_seconds = retry_base_delay_seconds
+        self.retry_max_delay_seconds = retry_max_delay_seconds
+        self.visibility_timeout_seconds = visibility_timeout_seconds
+        self.tenant_concurrency = tenant_concurrency
+        self.tenant_busy_delay_seconds = tenant_busy_delay_seconds
+        self.stream_key = redis_client.KeyNamer.get_job_stream_key(name)
+        self.delayed_key = redis_client.KeyNamer.get_job_delayed_key(name)
+        self.dead_letter_key = redis_client.KeyNamer.get_job_dead_letter_key(name)
+        self.group = "job_workers"
+        self.handlers: Dict[str, JobHandler] = {}
+
+    def register(self, job_type: str, handler: JobHandler) -> None:
+        self.handlers[job_type] = handler
+
+    async def enqueue(self, job_type: str, org_id: str, user_id: str, payload: Optional[dict] = None) -> str:
+        job_id = uuid.uuid4().hex
+        now = str(time.time())
+        job_key = redis_client.KeyNamer.get_job_key(job_id)
+        async with redis_client.pipeline() as pipe:
+            pipe.hset(job_key, mapping={
+                "id": job_id,
+                "queue": self.name,
+                "type": job_type,
+                "org_id": org_id,
+                "user_id": user_id,
+                "payload": json.dumps(payload or {}),
+                "status": QUEUED,
+                "attempts": 0,
+                "progress": 0,
+                "created_at": now,
+                "updated_at": now,
+            })
+            pipe.expire(job_key, JOB_STATUS_TTL_SECONDS)
+            pipe.xadd(self.stream_key, {"job_id": job_id}, maxlen=JOB_STREAM_MAX_LENGTH, approximate=True)
+            await pipe.execute()
+        return job_id
+
+    async def get(self, job_id: str) -> Dict[str, str] | None:
+        return await redis_client.get_hash(redis_client.KeyNamer.get_job_key(job_id)) or None
+
+    async def update(self, job_id: str, **fields: Any) -> None:
+        fields["updated_at"] = time.time()
+        await redis_client.set_hash_fields(
+            redis_client.KeyNamer.get_job_key(job_id), {name: str(value) for name, value in fields.items()}
+        )
+
+    def retry_delay(self, attempt: int) -> float:
+        return random.uniform(0, min(self.retry_max_delay_seconds, self.retry_base_delay_seconds * 2 ** (attempt - 1)))
+
+    async def defer(self, job_id: str, delay_seconds: float) -> None:
+        await redis_client.add_to_sorted_set(self.delayed_key, job_id, time.time() + delay_seconds)
+
+    async def promote_due(self, limit: int = 100) -> int:
+        """Moves jobs whose retry delay has passed back onto the stream; each is claimed by one worker."""
+        return int(await redis_client.run_script(
+            _PROMOTE_DUE_SCRIPT, [self.delayed_key, self.stream_key], [time.time(), limit, JOB_STREAM_MAX_LENGTH]
+        ))
+
+    async def acquire_tenant_slot(self, job: Job) -> bool:
+        return bool(await redis_client.run_script(
+            _ACQUIRE_SLOT_SCRIPT,
+            [redis_client.KeyNamer.get_job_tenant_slots_key(job.org_id, job.user_id, self.name)],
+            [int(time.time() * 1000), int(self.visibility_timeout_seconds * 1000), self.tenant_concurrency, job.id],
+        ))
+
+    async def release_tenant_slot(self, job: Job) -> None:
+        await redis_client.remove_from_sorted_set(
+            redis_client.KeyNamer.get_job_tenant_slots_key(job.org_id, job.user_id, self.name), job.id
+        )
+
+
+class JobWorker:
+    """
+    Runs jobs from a JobQueue, up to `concurrency` at a time. An entry is acknowledged only once its job has
+    succeeded, been scheduled for a retry or been dead-lettered; while a job runs the worker keeps renewing
+    both its stream entry and its tenant slot, so only jobs of a worker that died are taken over.
+    """
+
+    def __init__(self, queue: JobQueue, concurrency: int = JOB_WORKER_CONCURRENCY) -> None:
+        self.queue = queue
+        self.concurrency = concurrency
+        self.consumer = f"{socket.gethostname()}:{os.getpid()}"
+        self._group_ready = False
+        self._running: set[asyncio.Task] = set()
+
+    async def run(self, stop: asyncio.Event, block_ms: int = 1000) -> None:
+        """Runs until `stop` is set, then waits for the jobs already started."""
+        while not stop.is_set():
+            try:
+                free = self.concurrency - len(self._running)
+                if free <= 0:
+                    await asyncio.wait(self._running, return_when=asyncio.FIRST_COMPLETED)
+                    continue
+                for entry in await self._next_entries(free, block_ms):
+                    task = asyncio.create_task(self._process(*entry))
+                    self._running.add(task)
+                    task.add_done_callback(self._running.discard)
+            except Exception as e:
+                logger.error("%s job worker pass failed: %s", self.queue.name, e)
+                await asyncio.sleep(block_ms / 1000)
+        if self._running:
+            await asyncio.wait(self._running)
+
+    async def run_once(self, block_ms: int | None = None) -> int:
+        """Fetches one batch of entries and runs them to completion. Returns the number of entries."""
+        entries = await self._next_entries(self.concurrency, block_ms)
+        await asyncio.gather(*(self._process(*entry) for entry in entries))
+        return len(entries)
+
+    async def _next_entries(self, count: int, block_ms: int | None) -> List[tuple[str, Dict[str, str]]]:
+        if not self._group_ready:
+            await redis_client.create_stream_group(self.queue.stream_key, self.queue.group)
+            self._group_ready = True
+        await self.queue.promote_due()
+        entries = await redis_client.claim_stream_entries(
+            self.queue.stream_key,
+            self.queue.group,
+            self.consumer,
+            int(self.queue.visibility_timeout_seconds * 1000),
+            count,
+        )
+        if entries:
+            return entries
+        return await redis_client.read_stream_group(
+            self.queue.stream_key, self.queue.group, self.consumer, count, block_ms
+        )
+
+    async def _process(self, entry_id: str, fields: Dict[str, str]) -> None:
+        queue = self.queue
+        job_fields = await queue.get(fields.get("job_id", ""))
+        if job_fields is None or job_fields.get("status") in (SUCCEEDED, DEAD):
+            # expired, unknown or already finished before a crash kept the entry from being acknowledged
+            await self._ack(entry_id)
+            return
+        job = Job(queue, job_fields)
+
+        if not await queue.acquire_tenant_slot(job):
+            await queue.defer(job.id, queue.tenant_busy_delay_seconds)
+            await self._ack(entry_id)
+            JOB_OUTCOMES.inc(queue.name, job.type, "deferred")
+            return
+
+        job.attempts += 1
+        await queue.update(job.id, status=RUNNING, attempts=job.attempts, worker=self.consumer)
+        heartbeat = asyncio.create_task(self._heartbeat(entry_id, job))
+        try:
+            handler = queue.handlers.get(job.type)
+            if handler is None:
+                raise LookupError(f"No handler registered for job type '{job.type}'")
+            result = await handler(job)
+        except Exception as e:
+            await self._fail(job, e)
+        else:
+            await queue.update(job.id, status=SUCCEEDED, result=json.dumps(result), error="")
+            JOB_OUTCOMES.inc(queue.name, job.type, "succeeded")
+        finally:
+            heartbeat.cancel()
+            with suppress(asyncio.CancelledError):
+                await heartbeat
+            await queue.release_tenant_slot(job)
+        await self._ack(entry_id)
+
+    async def _fail(self, job: Job, error: Exception) -> None:
+        queue = self.queue
+        if job.attempts >= queue.max_attempts or isinstance(error, PermanentJobError):
+            logger.error("%s job %s failed for good after %d attempts: %s", job.type, job.id, job.attempts, error)
+            await queue.update(job.id, status=DEAD, error=str(error))
+            await redis_client.add_to_stream(
+                queue.dead_letter_key, {"job_id": job.id, "error": str(error)}, max_len=JOB_STREAM_MAX_LENGTH
+            )
+            JOB_OUTCOMES.inc(queue.name, job.type, "dead")
+            return
+        delay = queue.retry_delay(job.attempts)
+        logger.warning("%s job %s failed, retrying in %.1fs: %s", job.type, job.id, delay, error)
+        await queue.update(job.id, status=RETRYING, error=str(error))
+        await queue.defer(job.id, delay)
+        JOB_OUTCOMES.inc(queue.name, job.type, "retried")
+
+    async def _heartbeat(self, entry_id: str, job: Job) -> None:
+        while True:
+            await asyncio.sleep(self.queue.visibility_timeout_seconds / 3)
+            try:
+                await redis_client.touch_stream_entries(
+                    self.queue.stream_key, self.queue.group, self.consumer, entry_id
+                )
+                await self.queue.acquire_tenant_slot(job)
+            except Exception as e:
+                logger.warning("Heartbeat for job %s failed: %s", job.id, e)
+
+    async def _ack(self, entry_id: str) -> None:
+        await redis_client.ack_stream_entries(self.queue.stream_key, self.queue.group, entry_id)
+
+
+job_queue = JobQueue("integrations")
@@ -0,0 +1,200 @@
+import json
+import os
+import time
+from typing import AsyncIterator, Iterable, List, Optional, Sequence
+
+from pydantic import BaseModel, Field, ValidationError
+
+from config.logger import get_logger
+from dtos.standard import IntegrationItem
+from utils.http.streaming import encode_item
+from utils.metrics.registry import metrics_registry
+from utils.redis.redis_client import redis_client
+
+logger = get_logger(__name__)
+
+# A full listing also drops items deleted or archived upstream, which incremental queries never return
+SYNC_RECONCILE_SECONDS = int(os.getenv("SYNC_RECONCILE_SECONDS", "86400"))
+# Re-read changes this far behind the checkpoint, for upstream search indexes that lag behind writes
+SYNC_LOOKBACK_SECONDS = int(os.getenv("SYNC_LOOKBACK_SECONDS", "10"))
+
+SYNC_RUNS = metrics_registry.counter(
+    "integration_syncs",
+    "Item syncs by mode: 'full' lists every item, 'incremental' only those changed since the checkpoint.",
+    ("integration", "mode"),
+)
+SYNC_CHANGES = metrics_registry.counter(
+    "integration_sync_changes",
+    "Items written to or removed from the materialized item stores.",
+    ("integration", "change"),
+)
+
+
+def _modified_ms(item: IntegrationItem) -> Optional[int]:
+    if item.last_modified_time is None:
+        return None
+    return int(item.last_modified_time.timestamp() * 1000)
+
+
+def _id_order(item_id: str) -> tuple[int, str]:
+    # upstream ids are numeric strings; compare them as numbers without assuming they all are
+    return len(item_id), item_id
+
+
+class SyncCheckpoint(BaseModel):
+    modified_ms: Optional[int] = Field(None, description="Newest last-modified time applied to the store, in epoch ms")
+    last_id: Optional[str] = Field(None, description="Highest id among the items last modified at `modified_ms`")
+    synced_at: float = Field(..., description="Unix time the last sync started")
+    reconciled_at: float = Field(..., description="Unix time the last full listing started")
+
+    def advance(self, items: Iterable[IntegrationItem]) -> None:
+        for item in items:
+            modified_ms = _modified_ms(item)
+            if modified_ms is None or item.id is None:
+                continue
+            if self.modified_ms is None or modified_ms > self.modified_ms:
+                self.modified_ms, self.last_id = modified_ms, item.id
+            elif modified_ms == self.modified_ms and (
+                self.last_id is None or _id_order(item.id) > _id_order(self.last_id)
+            ):
+                self.last_id = item.id
+
+
+class ItemStore:
+    """
+    A tenant's items materialized in a Redis hash of id -> JSON, with no expiry.
+    Syncs write only the items that changed instead of rewriting the whole set.
+    """
+
+    def __init__(self, integration_name: str) -> None:
+        self.integration_name = integration_name
+
+    def _key(self, org_id: str, user_id: str) -> str:
+        return redis_client.KeyNamer.get_item_store_key(org_id, user_id, self.integration_name)
+
+    async def upsert(self, org_id: str, user_id: str, items: Iterable[IntegrationItem]) -> int:
+        mapping = {item.id: encode_item(item).decode() for item in items if item.id is not None}
+        await redis_client.set_hash_fields(self._key(org_id, user_id), mapping)
+        SYNC_CHANGES.inc(self.integration_name, "upserted", amount=len(mapping))
+        return len(mapping)
+
+    async def remove(self, org_id: str, user_id: str, item_ids: Iterable[str]) -> int:
+        removed = await redis_client.delete_hash_fields(self._key(org_id, user_id), *item_ids)
+        SYNC_CHANGES.inc(self.integration_name, "removed", amount=removed)
+        return removed
+
+    async def ids(self, org_id: str, user_id: str) -> List[str]:
+        return await redis_client.get_hash_fields(self._key(org_id, user_id))
+
+    async def iter_pages(
+        self, org_id: str, user_id: str, page_size: int, fields: Sequence[str] | None = None
+    ) -> AsyncIterator[List[IntegrationItem]]:
+        """Every stored item, a page per HSCAN step, in no particular order; only `fields` are decoded if given."""
+        key = self._key(org_id, user_id)
+        cursor = 0
+        while True:
+            cursor, entries = await redis_client.scan_hash(key, cursor, page_size)
+            if entries:
+                yield [IntegrationItem.from_dict(json.loads(raw), fields) for raw in entries.values()]
+            if not cursor:
+                return
+
+
+class SyncEngine:
+    """
+    Keeps each tenant's items materialized in an ItemStore together with a checkpoint of the newest change
+    applied, so a sync only pulls what changed upstream since the previous one. The integration supplies
+    the pages: every item for a full sync, items modified since `resume_point` for an incremental one.
+    The first sync, and one every `reconcile_seconds` after it, is full.
+    """
+
+    def __init__(
+        self,
+        integration_name: str,
+        reconcile_seconds: int = SYNC_RECONCILE_SECONDS,
+        lookback_seconds: int = SYNC_LOOKBACK_SECONDS,
+    ) -> None:
+        self.integration_name = integration_name
+        self.reconcile_seconds = reconcile_seconds
+        self.lookback_seconds = lookback_seconds
+        self.store = ItemStore(integration_name)
+
+    def _checkpoint_key(self, org_id: str, user_id: str) -> str:
+        return redis_client.KeyNamer.get_sync_checkpoint_key(org_id, user_id, self.integration_name)
+
+    async def get_checkpoint(self, org_id: str, user_id: str) -> SyncCheckpoint | None:
+        key = self._checkpoint_key(org_id, user_id)
+        raw = await redis_client.get_key(key)
+        if not raw:
+            return None
+        try:
+            return SyncCheckpoint.model_validate_json(raw)
+        except ValidationError:
+            logger.warning("Discarding unreadable sync checkpoint '%s'.", key)
+            await redis_client.delete_key(key)
+            return None
+
+    def needs_full_sync(self, checkpoint: SyncCheckpoint | None) -> bool:
+        return checkpoint is None or time.time() - checkpoint.reconciled_at >= self.reconcile_seconds
+
+    def resume_point(self, checkpoint: SyncCheckpoint) -> tuple[int, str | None]:
+        """
+        Where the next incremental query starts: items modified after (`modified_ms`, `last_id`), or
+        with a lookback, everything modified since `modified_ms` minus the lookback; upserts are idempotent.
+        """
+        modified_ms = checkpoint.modified_ms or 0
+        if self.lookback_seconds > 0:
+            return max(0, modified_ms - self.lookback_seconds * 1000), None
+        return modified_ms, checkpoint.last_id
+
+    async def full_sync(
+        self, org_id: str, user_id: str, item_pages: AsyncIterator[List[IntegrationItem]]
+    ) -> AsyncIterator[List[IntegrationItem]]:
+        """
+        Stores pages as they pass through. Once the listing is complete, items it no longer contains are
+        removed and the checkpoint is saved; a listing that fails midway leaves the previous checkpoint.
+        """
+        started = time.time()
+        checkpoint = SyncCheckpoint(synced_at=started, reconciled_at=started)
+        seen: set[str] = set()
+        async for page in item_pages:
+            await self.store.upsert(org_id, user_id, page)
+            seen.update(item.id for item in page if item.id is not None)
+            checkpoint.advance(page)
+            yield page
+
+        gone = [item_id for item_id in await self.store.ids(org_id, user_id) if item_id not in seen]
+        await self.store.remove(org_id, user_id, gone)
+        # an item changed during the listing, on a page already read, is older than later pages' newest change;
+        # resume from no later than the start of the listing so the next incremental sync picks it up
+        resume_ms = int(started * 1000) - self.lookback_seconds * 1000
+        if checkpoint.modified_ms is not None and checkpoint.modified_ms > resume_ms:
+            checkpoint.modified_ms, checkpoint.last_id = resume_ms, None
+        await self._save_checkpoint(org_id, user_id, checkpoint)
+        SYNC_RUNS.inc(self.integration_name, "full")
+
+    async def incremental_sync(
+        self,
+        org_id: str,
+        user_id: str,
+        checkpoint: SyncCheckpoint,
+        changed_pages: AsyncIterator[List[IntegrationItem]],
+    ) -> List[IntegrationItem]:
+        """Applies the changed items to the store, advances the checkpoint and returns the changes."""
+        started = time.time()
+        changed: List[IntegrationItem] = []
+        async for page in changed_pages:
+            await self.store.upsert(org_id, user_id, page)
+            checkpoint.advance(page)
+            changed.extend(page)
+        checkpoint.synced_at = started
+        await self._save_checkpoint(org_id, user_id, checkpoint)
+        SYNC_RUNS.inc(self.integration_name, "incremental")
+        return changed
+
+    async def remove(self, org_id: str, user_id: str, item_ids: Iterable[str]) -> int:
+        """Drops items deleted upstream, e.g. when told so by a webhook."""
+        return await self.store.remove(org_id, user_id, item_ids)
+
+    async def _save_checkpoint(self, org_id: str, user_id: str, checkpoint: SyncCheckpoint) -> None:
+        await redis_client.add_key(self._checkpoint_key(org_id, user_id), checkpoint.model_dump_json())
@@ -0,0 +1,110 @@
+import asyncio
+import os
+import time
+from contextlib import suppress
+from typing import Any, Awaitable, Callable
+
+from config.logger import get_logger
+from utils.redis.redis_client import redis_client
+
+logger = get_logger(__name__)
+
+TOKEN_REFRESH_MARGIN_SECONDS = int(os.getenv("TOKEN_REFRESH_MARGIN_SECONDS", "300"))
+TOKEN_REFRESH_POLL_INTERVAL_SECONDS = float(os.getenv("TOKEN_REFRESH_POLL_INTERVAL_SECONDS", "15"))
+TOKEN_REFRESH_BATCH_SIZE = int(os.getenv("TOKEN_REFRESH_BATCH_SIZE", "50"))
+TOKEN_REFRESH_CONCURRENCY = int(os.getenv("TOKEN_REFRESH_CONCURRENCY", "5"))
+TOKEN_REFRESH_RETRY_SECONDS = int(os.getenv("TOKEN_REFRESH_RETRY_SECONDS", "60"))
+
+
+class TokenRefreshScheduler:
+    """
+    Refreshes access tokens shortly before they expire so user requests rarely hit the 401-retry path.
+    Expiry times live in a Redis sorted set scored by unix time; a worker claims a due tenant by removing
+    it from the set, so each refresh runs on exactly one worker.
+    """
+
+    def __init__(
+        self,
+        integration_name: str,
+        refresh: Callable[[str, str], Awaitable[Any]],
+        margin_seconds: int = TOKEN_REFRESH_MARGIN_SECONDS,
+        poll_interval_seconds: float = TOKEN_REFRESH_POLL_INTERVAL_SECONDS,
+        batch_size: int = TOKEN_REFRESH_BATCH_SIZE,
+        concurrency: int = TOKEN_REFRESH_CONCURRENCY,
+        retry_seconds: int = TOKEN_REFRESH_RETRY_SECONDS,
+    ) -> None:
+        self.integration_name = integration_name
+        self.refresh = refresh
+        self.margin_seconds = margin_seconds
+        self.poll_interval_seconds = poll_interval_seconds
+        self.batch_size = batch_size
+        self.retry_seconds = retry_seconds
+        self.schedule_key = redis_client.KeyNamer.get_token_expiry_schedule_key(integration_name)
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._task: asyncio.Task | None = None
+
+    @staticmethod
+    def member(org_id: str, user_id: str) -> str:
+        return f"{org_id}:{user_id}"
+
+    async def schedule(self, org_id: str, user_id: str, expires_in: int) -> None:
+        await redis_client.add_to_sorted_set(
+            self.schedule_key, self.member(org_id, user_id), time.time() + expires_in
+        )
+
+    def schedule_in(self, pipeline, org_id: str, user_id: str, expires_in: int) -> None:
+        """Queues the schedule entry on a Redis pipeline so it commits together with the tokens."""
+        pipeline.zadd(self.schedule_key, {self.member(org_id, user_id): time.time() + expires_in})
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logger.info("%s token refresh scheduler started.", self.integration_name)
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        with suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                claimed = await self.run_once()
+            except Exception as e:
+                logger.error("%s token refresh pass failed: %s", self.integration_name, e)
+                claimed = 0
+            # a full batch means more tokens may already be due; keep draining without sleeping
+            if claimed < self.batch_size:
+                await asyncio.sleep(self.poll_interval_seconds)
+
+    async def run_once(self) -> int:
+        """Refreshes one batch of tokens expiring within the margin. Returns how many were due."""
+        due = await redis_client.get_sorted_set_range_by_score(
+            self.schedule_key, 0, time.time() + self.margin_seconds, self.batch_size
+        )
+        if not due:
+            return 0
+        async with redis_client.pipeline(transaction=False) as pipe:
+            for member, _ in due:
+                pipe.zrem(self.schedule_key, member)
+            removed = await pipe.execute()
+        claimed = [entry for entry, was_removed in zip(due, removed) if was_removed]
+        await asyncio.gather(*(self._refresh_member(member, expires_at) for member, expires_at in claimed))
+        return len(due)
+
+    async def _refresh_member(self, member: str, expires_at: float) -> None:
+        org_id, user_id = member.split(":", 1)
+        async with self._semaphore:
+            try:
+                await self.refresh(org_id, user_id)
+            except Exception as e:
+                retry_at = time.time() + self.retry_seconds
+                if retry_at < expires_at:
+                    logger.warning("Proactive token refresh failed for %s, retrying later: %s", member, e)
+                    await redis_client.add_to_sorted_set(self.schedule_key, member, retry_at)
+                else:
+                    # the token expires before a retry would run; the request path refreshes on demand
+                    logger.warning("Proactive token refresh failed for %s: %s", member, e)
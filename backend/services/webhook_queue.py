@@ -0,0 +1,144 @@
+import asyncio
+import json
+import os
+import socket
+from contextlib import suppress
+from typing import Any, Awaitable, Callable, List
+
+from config.logger import get_logger
+from utils.metrics.registry import metrics_registry
+from utils.redis.redis_client import redis_client
+
+logger = get_logger(__name__)
+
+WEBHOOK_QUEUE_BATCH_SIZE = int(os.getenv("WEBHOOK_QUEUE_BATCH_SIZE", "100"))
+WEBHOOK_QUEUE_BLOCK_MS = int(os.getenv("WEBHOOK_QUEUE_BLOCK_MS", "1000"))
+# Deliveries a consumer read but didn't acknowledge for this long are taken over by another one
+WEBHOOK_QUEUE_CLAIM_IDLE_MS = int(os.getenv("WEBHOOK_QUEUE_CLAIM_IDLE_MS", "60000"))
+WEBHOOK_QUEUE_MAX_LENGTH = int(os.getenv("WEBHOOK_QUEUE_MAX_LENGTH", "100000"))
+# Deliveries that failed this many times move to a dead-letter stream instead of being claimed again
+WEBHOOK_QUEUE_MAX_DELIVERIES = int(os.getenv("WEBHOOK_QUEUE_MAX_DELIVERIES", "5"))
+
+WEBHOOK_EVENTS = metrics_registry.counter(
+    "webhook_events",
+    "Webhook events received and applied per integration.",
+    ("integration", "stage"),
+)
+
+
+class WebhookQueue:
+    """
+    Buffers webhook deliveries in a Redis stream so the receiving endpoint can acknowledge them at once.
+    Consumers in a shared group read deliveries in batches and hand every event of the batch to `handle`
+    together, so repeated events for the same object are applied once. A batch is acknowledged only after
+    `handle` returns; if it raises or the consumer dies first, a consumer claims it again after `claim_idle_ms`.
+    Deliveries that have failed `max_deliveries` times are moved to a dead-letter stream for inspection.
+    """
+
+    def __init__(
+        self,
+        integration_name: str,
+        handle: Callable[[List[dict]], Awaitable[Any]],
+        batch_size: int = WEBHOOK_QUEUE_BATCH_SIZE,
+        block_ms: int = WEBHOOK_QUEUE_BLOCK_MS,
+        claim_idle_ms: int = WEBHOOK_QUEUE_CLAIM_IDLE_MS,
+        max_length: int = WEBHOOK_QUEUE_MAX_LENGTH,
+        max_deliveries: int = WEBHOOK_QUEUE_MAX_DELIVERIES,
+    ) -> None:
+        self.integration_name = integration_name
+        self.handle = handle
+        self.batch_size = batch_size
+        self.block_ms = block_ms
+        self.claim_idle_ms = claim_idle_ms
+        self.max_length = max_length
+        self.max_deliveries = max_deliveries
+        self.stream_key = redis_client.KeyNamer.get_webhook_stream_key(integration_name)
+        self.dead_letter_key = redis_client.KeyNamer.get_webhook_dead_letter_key(integration_name)
+        self.group = "webhook_processors"
+        self.consumer = f"{socket.gethostname()}:{os.getpid()}"
+        self._group_ready = False
+        self._task: asyncio.Task | None = None
+
+    async def enqueue(self, body: bytes) -> None:
+        """Stores one delivery as received; it is parsed by the consumer."""
+        await redis_client.add_to_stream(self.stream_key, {"body": body.decode()}, max_len=self.max_length)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logger.info("%s webhook consumer started.", self.integration_name)
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        with suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.error("%s webhook batch failed: %s", self.integration_name, e)
+                await asyncio.sleep(self.block_ms / 1000)
+
+    async def run_once(self, block_ms: int | None = None) -> int:
+        """Processes one batch, abandoned deliveries first. Returns the number of deliveries handled."""
+        if not self._group_ready:
+            await redis_client.create_stream_group(self.stream_key, self.group)
+            self._group_ready = True
+
+        entries = await redis_client.claim_stream_entries(
+            self.stream_key, self.group, self.consumer, self.claim_idle_ms, self.batch_size
+        )
+        if entries:
+            entries = await self._dead_letter_exhausted(entries)
+        if not entries:
+            entries = await redis_client.read_stream_group(
+                self.stream_key,
+                self.group,
+                self.consumer,
+                self.batch_size,
+                self.block_ms if block_ms is None else block_ms,
+            )
+        if not entries:
+            return 0
+
+        events: List[dict] = []
+        for entry_id, fields in entries:
+            try:
+                payload = json.loads(fields["body"])
+            except (KeyError, ValueError):
+                logger.warning("Dropping unreadable %s webhook delivery %s.", self.integration_name, entry_id)
+                continue
+            events.extend(payload if isinstance(payload, list) else [payload])
+
+        WEBHOOK_EVENTS.inc(self.integration_name, "received", amount=len(events))
+        await self.handle(events)
+        WEBHOOK_EVENTS.inc(self.integration_name, "applied", amount=len(events))
+        await redis_client.ack_stream_entries(self.stream_key, self.group, *(entry_id for entry_id, _ in entries))
+        return len(entries)
+
+    async def _dead_letter_exhausted(self, entries: List[tuple[str, dict]]) -> List[tuple[str, dict]]:
+        """Moves claimed deliveries out of the group once they have failed `max_deliveries` times; returns the rest."""
+        counts = await redis_client.get_stream_delivery_counts(
+            self.stream_key, self.group, *(entry_id for entry_id, _ in entries)
+        )
+        exhausted = [entry for entry in entries if counts.get(entry[0], 0) > self.max_deliveries]
+        if not exhausted:
+            return entries
+
+        async with redis_client.pipeline() as pipe:
+            for entry_id, fields in exhausted:
+                pipe.xadd(
+                    self.dead_letter_key, {**fields, "entry_id": entry_id}, maxlen=self.max_length, approximate=True
+                )
+            pipe.xack(self.stream_key, self.group, *(entry_id for entry_id, _ in exhausted))
+            await pipe.execute()
+        logger.error(
+            "Moved %d %s webhook deliveries to '%s' after %d failed attempts.",
+            len(exhausted), self.integration_name, self.dead_letter_key, self.max_deliveries,
+        )
+        return [entry for entry in entries if counts.get(entry[0], 0) <= self.max_deliveries]
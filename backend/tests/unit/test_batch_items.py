@@ -0,0 +1,110 @@
+import asyncio
+import os
+import time
+import unittest
+from unittest.mock import AsyncMock, patch
+
+import fakeredis
+import httpx
+
+os.environ.setdefault("HUBSPOT_CLIENT_ID", "test_client_id")
+os.environ.setdefault("HUBSPOT_CLIENT_SECRET", "test_client_secret")
+os.environ.setdefault("HUBSPOT_CALLBACK_ENDPOINT", "http://localhost:8000/v1/hubspot/oauth2/callback")
+
+from config.constants import HUBSPOT_CONSTS
+from services.integrations import hubspot
+from services.integrations.hubspot import HubspotService
+
+DELAY_SECONDS = 0.1
+
+
+class SlowHubspot:
+    """Contacts endpoint taking DELAY_SECONDS per call, failing for the `broken` tenant's token."""
+
+    def __init__(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def fetch(self, method, url, params=None, body=None, headers=None, **kwargs):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(DELAY_SECONDS)
+        finally:
+            self.in_flight -= 1
+        token = headers["Authorization"].removeprefix("Bearer ")
+        if token == "token-broken":
+            request = httpx.Request("GET", url)
+            raise httpx.HTTPStatusError("500", request=request, response=httpx.Response(500, request=request))
+        return {"results": [{"id": token, "properties": {"firstname": token}}]}
+
+
+class TestBatchItems(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+        self.upstream = SlowHubspot()
+        patches = [
+            patch.object(hubspot, "fetch", self.upstream.fetch),
+            patch.object(hubspot.redis_client, "redis_client", self.redis),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+        self.service = HubspotService()
+        self.service.items_cache.get = AsyncMock(return_value=None)
+        self.service.items_cache.set = AsyncMock()
+
+    async def store_token(self, user_id: str) -> None:
+        key = hubspot.redis_client.KeyNamer.get_access_token_key("org", user_id, HUBSPOT_CONSTS.INTEGRATION_NAME)
+        await self.redis.set(key, f"token-{user_id}")
+
+    async def batch(self, tenants):
+        return [result async for result in self.service.get_items_batch(tenants)]
+
+    async def test_tenants_are_fetched_concurrently_with_one_credentials_read(self):
+        users = [f"user{index}" for index in range(HUBSPOT_CONSTS.BATCH_ITEMS_CONCURRENCY)]
+        for user_id in users:
+            await self.store_token(user_id)
+
+        with patch.object(hubspot.redis_client, "get_keys", wraps=hubspot.redis_client.get_keys) as get_keys:
+            started = time.monotonic()
+            results = await self.batch([("org", user_id) for user_id in users])
+            elapsed = time.monotonic() - started
+
+        get_keys.assert_awaited_once()
+        self.assertLess(elapsed, 3 * DELAY_SECONDS)
+        self.assertEqual(
+            sorted(result["items"][0].id for result in results), sorted(f"token-{user_id}" for user_id in users)
+        )
+
+    async def test_fan_out_is_bounded(self):
+        users = [f"user{index}" for index in range(3 * HUBSPOT_CONSTS.BATCH_ITEMS_CONCURRENCY)]
+        for user_id in users:
+            await self.store_token(user_id)
+
+        results = await self.batch([("org", user_id) for user_id in users])
+
+        self.assertEqual(len(results), len(users))
+        self.assertEqual(self.upstream.max_in_flight, HUBSPOT_CONSTS.BATCH_ITEMS_CONCURRENCY)
+
+    async def test_failing_tenants_come_back_as_errors_next_to_partial_results(self):
+        await self.store_token("healthy")
+        await self.store_token("broken")
+
+        results = await self.batch([("org", "healthy"), ("org", "broken"), ("org", "unauthorized")])
+
+        by_user = {result["user_id"]: result for result in results}
+        self.assertEqual(len(by_user["healthy"]["items"]), 1)
+        self.assertEqual(by_user["broken"]["error"]["status_code"], 502)
+        self.assertEqual(by_user["unauthorized"]["error"]["status_code"], 401)
+
+    async def test_duplicate_tenants_are_fetched_once(self):
+        await self.store_token("user")
+
+        results = await self.batch([("org", "user"), ("org", "user")])
+
+        self.assertEqual(len(results), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,172 @@
+import asyncio
+import unittest
+from unittest.mock import patch
+
+import fakeredis
+import httpx
+from fastapi import FastAPI
+
+from config.constants import HTTP_METHODS
+from controllers import admin
+from utils.http import http_client
+from utils.http.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+from utils.http.http_client import HttpClientRegistry
+from utils.http.retry import RetryPolicy
+from utils.redis.redis_client import redis_client
+
+URL = "https://api.test/contacts"
+NO_RETRIES = RetryPolicy(max_attempts=1, hedging_enabled=False)
+
+
+class SwitchableUpstream:
+    """Answers every call with the current status code."""
+
+    def __init__(self, status_code: int = 200):
+        self.status_code = status_code
+        self.calls = 0
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.calls += 1
+        return httpx.Response(self.status_code, json={})
+
+
+def _breaker(**overrides) -> CircuitBreaker:
+    settings = dict(failure_rate=0.5, minimum_calls=4, window_seconds=10, open_seconds=0.2, half_open_probes=2,
+                    state_cache_seconds=0)
+    settings.update(overrides)
+    return CircuitBreaker("test", **settings)
+
+
+class CircuitBreakerTestCase(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        p = patch.object(redis_client, "redis_client", fakeredis.FakeAsyncRedis(decode_responses=True))
+        p.start()
+        self.addCleanup(p.stop)
+        self.upstream = SwitchableUpstream()
+        registry = HttpClientRegistry(transport=httpx.MockTransport(self.upstream))
+        registry.start()
+        self.addAsyncCleanup(registry.aclose)
+        p = patch.object(http_client, "http_client_registry", registry)
+        p.start()
+        self.addCleanup(p.stop)
+
+    async def call(self, breaker: CircuitBreaker) -> None:
+        await http_client.fetch(HTTP_METHODS.GET, URL, retry_policy=NO_RETRIES, circuit_breaker=breaker)
+
+    async def fail(self, breaker: CircuitBreaker, times: int) -> None:
+        for _ in range(times):
+            with self.assertRaises(httpx.HTTPStatusError):
+                await self.call(breaker)
+
+
+class TestCircuitBreaker(CircuitBreakerTestCase):
+
+    async def test_opens_once_the_failure_rate_is_reached(self):
+        breaker = _breaker()
+        await self.call(breaker)
+        await self.call(breaker)
+        self.upstream.status_code = 503
+        await self.fail(breaker, 1)
+        self.assertEqual(breaker.state, CLOSED)
+
+        await self.fail(breaker, 1)
+
+        self.assertEqual(breaker.state, OPEN)
+
+    async def test_fails_fast_while_open(self):
+        breaker = _breaker()
+        self.upstream.status_code = 503
+        await self.fail(breaker, 4)
+        calls = self.upstream.calls
+
+        with self.assertRaises(CircuitOpenError) as raised:
+            await self.call(breaker)
+
+        self.assertEqual(self.upstream.calls, calls)
+        self.assertGreater(raised.exception.retry_after, 0)
+
+    async def test_successful_probes_close_the_circuit(self):
+        breaker = _breaker()
+        self.upstream.status_code = 503
+        await self.fail(breaker, 4)
+        await asyncio.sleep(0.25)
+        self.upstream.status_code = 200
+
+        await self.call(breaker)
+        self.assertEqual(breaker.state, HALF_OPEN)
+        await self.call(breaker)
+
+        self.assertEqual(breaker.state, CLOSED)
+        self.assertEqual((await breaker.snapshot())["window_calls"], 0)
+
+    async def test_failed_probe_opens_the_circuit_again(self):
+        breaker = _breaker()
+        self.upstream.status_code = 503
+        await self.fail(breaker, 4)
+        await asyncio.sleep(0.25)
+
+        await self.fail(breaker, 1)
+
+        self.assertEqual(breaker.state, OPEN)
+        with self.assertRaises(CircuitOpenError):
+            await self.call(breaker)
+
+    async def test_probes_beyond_the_limit_are_rejected(self):
+        breaker = _breaker(half_open_probes=1)
+        self.upstream.status_code = 503
+        await self.fail(breaker, 4)
+        await asyncio.sleep(0.25)
+
+        await breaker.before_call()
+        with self.assertRaises(CircuitOpenError):
+            await breaker.before_call()
+
+    async def test_state_is_shared_between_workers(self):
+        breaker = _breaker()
+        other_worker = _breaker()
+        self.upstream.status_code = 503
+        await self.fail(breaker, 4)
+
+        with self.assertRaises(CircuitOpenError):
+            await self.call(other_worker)
+
+    async def test_client_errors_do_not_count_as_failures(self):
+        breaker = _breaker()
+        self.upstream.status_code = 404
+        await self.fail(breaker, 10)
+
+        snapshot = await breaker.snapshot()
+        self.assertEqual(snapshot["state"], CLOSED)
+        self.assertEqual((snapshot["window_calls"], snapshot["window_failures"]), (10, 0))
+
+    async def test_reset_closes_the_circuit(self):
+        breaker = _breaker(open_seconds=60)
+        self.upstream.status_code = 503
+        await self.fail(breaker, 4)
+        self.assertEqual((await breaker.snapshot())["state"], OPEN)
+
+        await breaker.reset()
+
+        self.upstream.status_code = 200
+        await self.call(breaker)
+        self.assertEqual((await breaker.snapshot())["state"], CLOSED)
+
+    async def test_reset_endpoint_is_disabled_by_default(self):
+        breaker = _breaker(open_seconds=60)
+        self.upstream.status_code = 503
+        await self.fail(breaker, 4)
+        app = FastAPI()
+        app.include_router(admin.router, prefix="/v1/admin")
+
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://testserver") as client:
+            rejected = await client.post(f"/v1/admin/circuit-breakers/{breaker.name}/reset")
+            self.assertEqual((await breaker.snapshot())["state"], OPEN)
+            with patch.object(admin, "ADMIN_MUTATIONS_ENABLED", True):
+                accepted = await client.post(f"/v1/admin/circuit-breakers/{breaker.name}/reset")
+
+        self.assertEqual((rejected.status_code, accepted.status_code), (404, 200))
+        self.assertEqual(accepted.json()["state"], CLOSED)
+
+
+if __name__ == "__main__":
+    unittest.main()
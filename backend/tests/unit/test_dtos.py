@@ -0,0 +1,57 @@
+import unittest
+
+import httpx
+from fastapi import Depends, FastAPI
+from pydantic import ValidationError
+
+from dtos.hubspot import BatchItemsRequestDTO, OAuthCallbackRequestDTO, UserOrgParamsDTO
+
+
+class TestUserOrgParamsDTO(unittest.TestCase):
+
+    def test_ids_are_stripped(self):
+        params = UserOrgParamsDTO(user_id="  user_1 ", org_id="\torg-2\n")
+        self.assertEqual((params.user_id, params.org_id), ("user_1", "org-2"))
+
+    def test_invalid_ids_are_rejected(self):
+        for value in ("ab", "  ab  ", "", "has space", "dot.ted", "ab\ncd", "ünï", "\x1corg123", 123):
+            with self.subTest(value=value), self.assertRaises(ValidationError):
+                UserOrgParamsDTO(user_id=value, org_id="org")
+
+    def test_nested_tenants_are_validated(self):
+        with self.assertRaises(ValidationError):
+            BatchItemsRequestDTO(tenants=[{"user_id": "user", "org_id": "o"}])
+
+
+class TestOAuthCallbackRequestDTO(unittest.TestCase):
+
+    def test_strings_are_stripped(self):
+        params = OAuthCallbackRequestDTO(code=" code ", state=" state ")
+        self.assertEqual((params.code, params.state), ("code", "state"))
+
+    def test_code_or_error_is_required(self):
+        OAuthCallbackRequestDTO(state="state", error="access_denied")
+        with self.assertRaises(ValidationError):
+            OAuthCallbackRequestDTO(state="state", code="   ")
+
+
+class TestQueryValidation(unittest.IsolatedAsyncioTestCase):
+
+    async def test_invalid_query_ids_are_a_client_error(self):
+        app = FastAPI()
+
+        @app.get("/params")
+        async def params_route(params: UserOrgParamsDTO = Depends()):
+            return params
+
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://testserver") as client:
+            accepted = await client.get("/params", params={"user_id": " user ", "org_id": "org"})
+            rejected = await client.get("/params", params={"user_id": "user", "org_id": "o"})
+
+        self.assertEqual(accepted.json(), {"user_id": "user", "org_id": "org"})
+        self.assertEqual(rejected.status_code, 422)
+        self.assertEqual(rejected.json()["detail"][0]["loc"], ["query", "org_id"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,12 +1,24 @@
 import unittest
 import json
 import base64
+import os
 import secrets
-from datetime import datetime
+from datetime import datetime, timezone
 from urllib.parse import urlencode
-from unittest.mock import Mock, AsyncMock
+from unittest.mock import Mock, AsyncMock, patch
 import asyncio
 
+import fakeredis
+
+os.environ.setdefault("HUBSPOT_CLIENT_ID", "test_client_id")
+os.environ.setdefault("HUBSPOT_CLIENT_SECRET", "test_client_secret")
+os.environ.setdefault("HUBSPOT_CALLBACK_ENDPOINT", "http://localhost:8000/v1/hubspot/oauth2/callback")
+
+from services.integrations import hubspot
+from services.integrations.base import parse_datetimes
+from services.integrations.hubspot import HubspotService
+from utils.http.rate_limiter import Priority
+
 class TestOAuthStateLogic(unittest.TestCase):
     def generate_state_token(self, org_id, user_id):
         nonce = secrets.token_hex(16)
@@ -76,6 +88,26 @@ class TestContactDataProcessing(unittest.TestCase):
         self.assertEqual(processed["creation_time"].year, 2024)
 
 
+class TestContactPageMapping(unittest.TestCase):
+    def test_page_is_mapped_column_by_column(self):
+        page = [
+            {"id": "1", "properties": {"firstname": "John", "lastname": "Doe", "createdate": "2024-01-01T00:00:00Z",
+                                       "lastmodifieddate": "2024-01-02T00:00:00.500Z"}},
+            {"id": "2", "properties": {"firstname": "Jane", "lastname": None, "createdate": None}, "archived": True},
+        ]
+
+        first, second = HubspotService()._create_integration_item_metadata_object(page)
+
+        self.assertEqual((first.id, first.name, first.visibility), ("1", "John Doe", True))
+        self.assertEqual(first.creation_time, datetime(2024, 1, 1, tzinfo=timezone.utc))
+        self.assertEqual(first.last_modified_time, datetime(2024, 1, 2, 0, 0, 0, 500000, tzinfo=timezone.utc))
+        self.assertEqual((second.name, second.creation_time, second.visibility), ("Jane", None, False))
+
+    def test_malformed_timestamps_only_blank_their_own_rows(self):
+        parsed = parse_datetimes(["2024-01-01T00:00:00Z", "yesterday", "", None])
+        self.assertEqual(parsed, [datetime(2024, 1, 1, tzinfo=timezone.utc), None, None, None])
+
+
 class TestUrlBuilding(unittest.TestCase):
     def build_url_with_params(self, url, params):
         if not params:
@@ -215,5 +247,39 @@ class TestAsyncFlowSimulation(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(processed[0]["name"], "John Doe")
 
 
+class TestPortalQuota(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        p = patch.object(hubspot.redis_client, "redis_client", fakeredis.FakeAsyncRedis(decode_responses=True))
+        p.start()
+        self.addCleanup(p.stop)
+        self.service = HubspotService()
+
+    async def connect(self, service, org_id, user_id, portal_id):
+        with patch.object(hubspot, "fetch", AsyncMock(return_value={"hub_id": portal_id})):
+            await service.after_connect(org_id, user_id, f"token-{user_id}")
+
+    async def test_tenants_of_one_portal_share_its_quota(self):
+        await self.connect(self.service, "org1", "user1", 62515)
+        await self.connect(self.service, "org2", "user2", 62515)
+        await self.connect(self.service, "org3", "user3", 70000)
+
+        # another worker learns the portals from Redis
+        other_worker = HubspotService()
+        keys = [
+            (await other_worker.rate_limit_bucket(org_id, user_id, Priority.INTERACTIVE)).key
+            for org_id, user_id in (("org1", "user1"), ("org2", "user2"), ("org3", "user3"))
+        ]
+
+        self.assertEqual(keys[0], keys[1])
+        self.assertNotEqual(keys[0], keys[2])
+        self.assertIn("62515", keys[0])
+
+    async def test_tenant_with_unknown_portal_keeps_its_own_quota(self):
+        bucket = await self.service.rate_limit_bucket("org1", "user1", Priority.BACKGROUND)
+
+        self.assertEqual(bucket.key, self.service.rate_limiter.bucket("org1", "user1").key)
+        self.assertIs(bucket.priority, Priority.BACKGROUND)
+
+
 if __name__ == "__main__":
     unittest.main()
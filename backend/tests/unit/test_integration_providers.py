@@ -0,0 +1,214 @@
+import asyncio
+import base64
+import hashlib
+import os
+import unittest
+from unittest.mock import patch
+from urllib.parse import parse_qs, urlparse
+
+import fakeredis
+import httpx
+from fastapi import HTTPException
+
+for _name in ("NOTION", "AIRTABLE"):
+    os.environ.setdefault(f"{_name}_CLIENT_ID", "test_client_id")
+    os.environ.setdefault(f"{_name}_CLIENT_SECRET", "test_client_secret")
+    os.environ.setdefault(f"{_name}_CALLBACK_ENDPOINT", f"http://localhost:8000/v1/{_name.lower()}/oauth2/callback")
+
+from config.constants import AIRTABLE_CONSTS, NOTION_CONSTS
+from services.integrations import airtable, base, notion
+from services.integrations.airtable import AirtableService
+from services.integrations.notion import NotionService
+
+ORG_ID = "org123"
+USER_ID = "user456"
+
+
+class FakeAirtable:
+    def __init__(self, bases: int = 3):
+        self.token_requests = []
+        self.bases = [{"id": f"app{index}", "name": f"Base {index}"} for index in range(bases)]
+        self.forbidden = set()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def fetch(self, method, url, params=None, body=None, headers=None, **kwargs):
+        if url == AIRTABLE_CONSTS.TOKEN_URL:
+            self.token_requests.append((body, headers))
+            return {"token_type": "bearer", "access_token": "access_token", "refresh_token": "refresh_token",
+                    "expires_in": 3600}
+        if url == AIRTABLE_CONSTS.BASES_API_URL:
+            offset = int((params or {}).get("offset", 0))
+            page = {"bases": self.bases[offset:offset + 2]}
+            if offset + 2 < len(self.bases):
+                page["offset"] = str(offset + 2)
+            return page
+        base_id = url.split("/")[-2]
+        if base_id in self.forbidden:
+            request = httpx.Request("GET", url)
+            raise httpx.HTTPStatusError("403", request=request, response=httpx.Response(403, request=request))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        return {"tables": [{"id": f"tbl{base_id}{index}", "name": f"Table {index}"} for index in range(2)]}
+
+
+class FakeNotion:
+    def __init__(self):
+        self.cursors = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def fetch(self, method, url, params=None, body=None, headers=None, **kwargs):
+        assert headers["Notion-Version"] == NOTION_CONSTS.API_VERSION
+        if url.startswith(NOTION_CONSTS.BLOCKS_API_URL):
+            return self.block_children(url.split("/")[-2], (params or {}).get("start_cursor"))
+        object_type = body["filter"]["value"]
+        cursor = body.get("start_cursor")
+        self.cursors.append((object_type, cursor))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        if object_type == "database":
+            return {"results": [{
+                "object": "database", "id": "db1", "title": [{"plain_text": "Road"}, {"plain_text": "map"}],
+                "parent": {"type": "workspace", "workspace": True}, "created_time": "2024-01-01T00:00:00.000Z",
+            }], "has_more": False, "next_cursor": None}
+        if cursor is None:
+            return {"results": [{
+                "object": "page", "id": "page1", "parent": {"type": "database_id", "database_id": "db1"},
+                "properties": {
+                    "Tags": {"type": "multi_select"}, "Name": {"type": "title", "title": [{"plain_text": "Q3"}]},
+                },
+            }], "has_more": True, "next_cursor": "c1"}
+        return {"results": [{
+            "object": "page", "id": "page2", "parent": {"type": "database_id", "database_id": "db1"},
+            "properties": {"Name": {"type": "title", "title": [{"plain_text": "Q4"}]}},
+        }], "has_more": False, "next_cursor": None}
+
+    @staticmethod
+    def block_children(block_id, cursor):
+        if cursor is None:
+            return {"results": [{
+                "object": "block", "id": "block1", "type": "heading_1", "has_children": False,
+                "heading_1": {"rich_text": [{"plain_text": "Goals"}]},
+            }], "has_more": True, "next_cursor": "b1"}
+        return {"results": [{
+            "object": "block", "id": "block2", "type": "child_page", "has_children": True,
+            "child_page": {"title": "Launch notes"},
+        }], "has_more": False, "next_cursor": None}
+
+
+class ProviderTestCase(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+        p = patch.object(base.redis_client, "redis_client", self.redis)
+        p.start()
+        self.addCleanup(p.stop)
+
+    def patch_fetch(self, module, fake) -> None:
+        for target in (module, base):
+            p = patch.object(target, "fetch", fake.fetch)
+            p.start()
+            self.addCleanup(p.stop)
+
+
+class TestAirtableProvider(ProviderTestCase):
+
+    async def test_authorization_code_is_exchanged_with_the_pkce_verifier(self):
+        upstream = FakeAirtable()
+        self.patch_fetch(airtable, upstream)
+        service = AirtableService()
+
+        query = parse_qs(urlparse(await service.handle_authorize(ORG_ID, USER_ID)).query)
+        await service.handle_oauth2callback("code", query["state"][0])
+
+        body, headers = upstream.token_requests[0]
+        challenge = base64.urlsafe_b64encode(hashlib.sha256(body["code_verifier"].encode()).digest()).rstrip(b"=")
+        self.assertEqual(query["code_challenge"], [challenge.decode()])
+        self.assertTrue(headers["Authorization"].startswith("Basic "))
+        self.assertNotIn("client_secret", body)
+        self.assertEqual(await service.get_credentials(ORG_ID, USER_ID), "access_token")
+
+    async def test_bases_and_their_tables_are_listed_with_parent_links(self):
+        self.patch_fetch(airtable, FakeAirtable())
+        service = AirtableService()
+        await self.redis.set(base.redis_client.KeyNamer.get_access_token_key(ORG_ID, USER_ID, service.name), "token")
+
+        items = await service.get_items(ORG_ID, USER_ID)
+
+        self.assertEqual([item.id for item in items if item.type == "Base"], ["app0", "app1", "app2"])
+        tables = [item for item in items if item.type == "Table"]
+        self.assertEqual(len(tables), 6)
+        parents = {(table.parent_id, table.parent_path_or_name) for table in tables if table.id.startswith("tblapp1")}
+        self.assertEqual(parents, {("app1", "Base 1")})
+
+    async def test_tables_are_fetched_concurrently_up_to_the_limit(self):
+        upstream = FakeAirtable(bases=12)
+        upstream.forbidden.add("app5")
+        self.patch_fetch(airtable, upstream)
+        service = AirtableService()
+        service.tables_fetch_concurrency = 4
+        await self.redis.set(base.redis_client.KeyNamer.get_access_token_key(ORG_ID, USER_ID, service.name), "token")
+
+        items = await service.get_items(ORG_ID, USER_ID)
+
+        self.assertEqual(upstream.max_in_flight, 4)
+        self.assertEqual([item.id for item in items if item.type == "Base"], [f"app{index}" for index in range(12)])
+        self.assertEqual(len([item for item in items if item.parent_id == "app5"]), 0)
+        self.assertEqual(len([item for item in items if item.type == "Table"]), 22)
+
+
+class TestNotionProvider(ProviderTestCase):
+
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        self.upstream = FakeNotion()
+        self.patch_fetch(notion, self.upstream)
+        self.service = NotionService()
+        await self.redis.set(
+            base.redis_client.KeyNamer.get_access_token_key(ORG_ID, USER_ID, self.service.name), "token"
+        )
+
+    async def test_pages_and_databases_are_walked_concurrently_to_the_last_cursor(self):
+        items = {item.id: item for item in await self.service.get_items(ORG_ID, USER_ID)}
+
+        self.assertCountEqual(self.upstream.cursors, [("database", None), ("page", None), ("page", "c1")])
+        self.assertEqual(self.upstream.max_in_flight, 2)
+        self.assertEqual((items["db1"].name, items["db1"].parent_id, items["db1"].directory), ("Roadmap", None, True))
+        self.assertEqual((items["page1"].name, items["page1"].parent_id), ("Q3", "db1"))
+        self.assertEqual(items["page2"].name, "Q4")
+
+    async def test_children_are_expanded_on_demand(self):
+        item_pages = await self.service.stream_children(ORG_ID, USER_ID, "page1")
+        items = [item async for page in item_pages for item in page]
+
+        self.assertEqual([(item.id, item.name, item.directory) for item in items],
+                         [("block1", "Goals", False), ("block2", "Launch notes", True)])
+        self.assertEqual({item.parent_id for item in items}, {"page1"})
+        self.assertEqual(self.upstream.cursors, [])
+
+    def test_row_title_property_is_looked_up_once_per_database(self):
+        titles = notion._TitleResolver()
+        row = {"object": "page", "parent": {"type": "database_id", "database_id": "db1"},
+               "properties": {"Tags": {"type": "multi_select"}, "Name": {"type": "title", "title": []}}}
+
+        titles(row)
+        row["properties"]["Tags"] = {"type": "title", "title": [{"plain_text": "ignored"}]}
+        row["properties"]["Name"]["title"] = [{"plain_text": "Q3"}]
+
+        self.assertEqual(titles(row), "Q3")
+
+    async def test_unconfigured_provider_refuses_to_authorize(self):
+        with patch.dict(os.environ, {"NOTION_CLIENT_ID": ""}):
+            service = NotionService()
+
+        with self.assertRaises(HTTPException) as raised:
+            await service.handle_authorize(ORG_ID, USER_ID)
+        self.assertEqual(raised.exception.status_code, 503)
+
+
+if __name__ == "__main__":
+    unittest.main()
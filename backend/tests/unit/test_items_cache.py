@@ -0,0 +1,119 @@
+import time
+import unittest
+from unittest.mock import patch
+
+import fakeredis
+
+from utils.cache.items_cache import CachedItems, ItemsCache
+from utils.redis.redis_client import redis_client
+
+ORG_ID = "org123"
+USER_ID = "user456"
+
+
+def _entry(fetched_at: float | None = None, count: int = 2) -> CachedItems:
+    items = [{"id": str(index), "name": f"Contact {index}"} for index in range(count)]
+    return CachedItems(items=items, fetched_at=time.time() if fetched_at is None else fetched_at)
+
+
+class ItemsCacheTestCase(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+        p = patch.object(redis_client, "redis_client", self.redis)
+        p.start()
+        self.addCleanup(p.stop)
+        self.cache = ItemsCache("test", ttl_seconds=3600, fresh_seconds=60, max_entries=2, max_items_per_entry=5)
+
+    def key(self, org_id: str = ORG_ID, user_id: str = USER_ID) -> str:
+        return redis_client.KeyNamer.get_items_cache_key(org_id, user_id, "test")
+
+
+class TestFreshness(unittest.TestCase):
+
+    def test_entries_are_fresh_for_fresh_seconds_then_stale(self):
+        self.assertTrue(_entry().is_fresh(60))
+        self.assertFalse(_entry(fetched_at=time.time() - 61).is_fresh(60))
+
+
+class TestItemsCache(ItemsCacheTestCase):
+
+    async def test_entry_is_served_locally_then_from_redis_by_other_workers(self):
+        entry = _entry()
+        await self.cache.set(ORG_ID, USER_ID, entry)
+
+        self.assertEqual(await self.cache.get(ORG_ID, USER_ID), entry)
+        other_worker = ItemsCache("test")
+        self.assertEqual(await other_worker.get(ORG_ID, USER_ID), entry)
+        self.assertEqual(await other_worker.get(ORG_ID, USER_ID), entry)
+
+        self.assertEqual((self.cache.stats.local_hits, self.cache.stats.remote_hits), (1, 0))
+        self.assertEqual((other_worker.stats.local_hits, other_worker.stats.remote_hits), (1, 1))
+
+    async def test_entries_over_the_local_item_budget_are_only_kept_in_redis(self):
+        cache = ItemsCache("test", max_items_per_entry=5, local_max_items=3)
+        await cache.set(ORG_ID, USER_ID, _entry(count=4))
+
+        self.assertEqual(len((await cache.get(ORG_ID, USER_ID)).items), 4)
+        self.assertEqual(len((await cache.get(ORG_ID, USER_ID)).items), 4)
+        self.assertEqual((cache.stats.local_hits, cache.stats.remote_hits), (0, 2))
+
+    async def test_stale_entries_are_still_returned_for_revalidation(self):
+        await self.cache.set(ORG_ID, USER_ID, _entry(fetched_at=time.time() - 600))
+
+        cached = await ItemsCache("test").get(ORG_ID, USER_ID)
+
+        self.assertIsNotNone(cached)
+        self.assertFalse(cached.is_fresh(self.cache.fresh_seconds))
+
+    async def test_storing_a_revalidated_entry_rearms_its_ttl(self):
+        await self.cache.set(ORG_ID, USER_ID, _entry(fetched_at=time.time() - 600))
+        await self.redis.expire(self.key(), 5)
+
+        revalidated = _entry()
+        await self.cache.set(ORG_ID, USER_ID, revalidated)
+
+        self.assertGreater(await self.redis.ttl(self.key()), 3500)
+        self.assertEqual((await ItemsCache("test").get(ORG_ID, USER_ID)).fetched_at, revalidated.fetched_at)
+
+    async def test_expired_entry_is_a_miss(self):
+        await self.cache.set(ORG_ID, USER_ID, _entry())
+        await self.redis.delete(self.key())
+
+        other_worker = ItemsCache("test")
+        self.assertIsNone(await other_worker.get(ORG_ID, USER_ID))
+        self.assertEqual(other_worker.stats.misses, 1)
+
+    async def test_invalidate_drops_both_tiers(self):
+        await self.cache.set(ORG_ID, USER_ID, _entry())
+
+        await self.cache.invalidate(ORG_ID, USER_ID)
+
+        self.assertIsNone(await self.cache.get(ORG_ID, USER_ID))
+        self.assertFalse(await self.redis.exists(self.key()))
+
+    async def test_unreadable_entry_is_discarded(self):
+        await self.redis.set(self.key(), "not json")
+
+        self.assertIsNone(await self.cache.get(ORG_ID, USER_ID))
+        self.assertFalse(await self.redis.exists(self.key()))
+
+    async def test_entries_above_the_size_cap_are_not_cached(self):
+        await self.cache.set(ORG_ID, USER_ID, _entry(count=6))
+
+        self.assertIsNone(await self.cache.get(ORG_ID, USER_ID))
+
+    async def test_least_recently_used_tenants_are_evicted_past_max_entries(self):
+        for user_id in ("user1", "user2"):
+            await self.cache.set(ORG_ID, user_id, _entry())
+        # a read from another worker counts as a use
+        await ItemsCache("test").get(ORG_ID, "user1")
+        await self.cache.set(ORG_ID, "user3", _entry())
+
+        self.assertFalse(await self.redis.exists(self.key(user_id="user2")))
+        self.assertTrue(await self.redis.exists(self.key(user_id="user1")))
+        self.assertIsNone(await self.cache.get(ORG_ID, "user2"))
+        self.assertEqual(self.cache.stats.evictions, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,178 @@
+import asyncio
+import os
+import unittest
+from unittest.mock import patch
+
+import fakeredis
+from redis.crc import key_slot
+
+os.environ.setdefault("HUBSPOT_CLIENT_ID", "test_client_id")
+os.environ.setdefault("HUBSPOT_CLIENT_SECRET", "test_client_secret")
+os.environ.setdefault("HUBSPOT_CALLBACK_ENDPOINT", "http://localhost:8000/v1/hubspot/oauth2/callback")
+
+from config.constants import HUBSPOT_CONSTS
+from services.integrations import hubspot
+from services.integrations.hubspot import HubspotService
+from services.job_queue import DEAD, RETRYING, SUCCEEDED, JobQueue, JobWorker, PermanentJobError, job_queue
+from utils.redis.redis_client import redis_client
+
+
+class JobQueueTestCase(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+        p = patch.object(redis_client, "redis_client", self.redis)
+        p.start()
+        self.addCleanup(p.stop)
+        self.queue = JobQueue("test", retry_base_delay_seconds=0.01, retry_max_delay_seconds=0.01, max_attempts=3)
+        self.worker = JobWorker(self.queue, concurrency=4)
+
+    async def pending(self) -> int:
+        return (await self.redis.xpending(self.queue.stream_key, self.queue.group))["pending"]
+
+
+class TestJobQueue(JobQueueTestCase):
+
+    async def test_job_runs_once_and_reports_progress(self):
+        async def handler(job):
+            await job.report_progress(50)
+            await job.report_progress(100)
+            return {"synced": 100}
+
+        self.queue.register("sync", handler)
+        job_id = await self.queue.enqueue("sync", "org", "user")
+
+        self.assertEqual(await self.worker.run_once(block_ms=10), 1)
+
+        job = await self.queue.get(job_id)
+        self.assertEqual((job["status"], job["progress"], job["result"]), (SUCCEEDED, "100", '{"synced": 100}'))
+        self.assertEqual(await self.pending(), 0)
+        self.assertEqual(await self.worker.run_once(block_ms=10), 0)
+
+    async def test_failed_job_is_retried_after_a_backoff(self):
+        attempts = 0
+
+        async def flaky(job):
+            nonlocal attempts
+            attempts += 1
+            if attempts == 1:
+                raise RuntimeError("upstream unavailable")
+
+        self.queue.register("sync", flaky)
+        job_id = await self.queue.enqueue("sync", "org", "user")
+
+        await self.worker.run_once(block_ms=10)
+        self.assertEqual((await self.queue.get(job_id))["status"], RETRYING)
+        await asyncio.sleep(0.02)
+        await self.worker.run_once(block_ms=10)
+
+        job = await self.queue.get(job_id)
+        self.assertEqual((job["status"], job["attempts"]), (SUCCEEDED, "2"))
+
+    def test_keys_used_together_share_a_cluster_hash_slot(self):
+        keys = [
+            self.queue.stream_key,
+            self.queue.delayed_key,
+            self.queue.dead_letter_key,
+            redis_client.KeyNamer.get_job_tenant_slots_key("org", "user", self.queue.name),
+        ]
+        self.assertEqual(len({key_slot(key.encode()) for key in keys}), 1)
+
+    async def test_only_due_retries_are_moved_onto_the_stream(self):
+        await self.queue.defer("due", -1)
+        await self.queue.defer("later", 60)
+
+        self.assertEqual(await self.queue.promote_due(), 1)
+
+        self.assertEqual([fields["job_id"] for _, fields in await self.redis.xrange(self.queue.stream_key)], ["due"])
+        self.assertEqual(await self.redis.zrange(self.queue.delayed_key, 0, -1), ["later"])
+        self.assertEqual(await self.queue.promote_due(), 0)
+
+    async def test_job_is_dead_lettered_once_attempts_run_out(self):
+        async def failing(job):
+            raise RuntimeError("always fails")
+
+        self.queue.register("sync", failing)
+        job_id = await self.queue.enqueue("sync", "org", "user")
+
+        for _ in range(self.queue.max_attempts):
+            await asyncio.sleep(0.02)
+            await self.worker.run_once(block_ms=10)
+
+        job = await self.queue.get(job_id)
+        self.assertEqual((job["status"], job["error"]), (DEAD, "always fails"))
+        dead = await self.redis.xrange(self.queue.dead_letter_key)
+        self.assertEqual([fields["job_id"] for _, fields in dead], [job_id])
+        self.assertEqual(await self.pending(), 0)
+
+    async def test_permanent_errors_are_not_retried(self):
+        async def unauthorized(job):
+            raise PermanentJobError("credentials revoked")
+
+        self.queue.register("sync", unauthorized)
+        job_id = await self.queue.enqueue("sync", "org", "user")
+
+        await self.worker.run_once(block_ms=10)
+
+        job = await self.queue.get(job_id)
+        self.assertEqual((job["status"], job["attempts"]), (DEAD, "1"))
+
+    async def test_tenant_concurrency_is_limited_across_workers(self):
+        running = {}
+        peak = {}
+
+        async def handler(job):
+            tenant = job.user_id
+            running[tenant] = running.get(tenant, 0) + 1
+            peak[tenant] = max(peak.get(tenant, 0), running[tenant])
+            await asyncio.sleep(0.02)
+            running[tenant] -= 1
+
+        self.queue.register("sync", handler)
+        self.queue.tenant_busy_delay_seconds = 0.01
+        other_worker = JobWorker(self.queue, concurrency=4)
+        other_worker.consumer = "other"
+        job_ids = [await self.queue.enqueue("sync", "org", user) for user in ("a", "a", "a", "b")]
+
+        for _ in range(10):
+            await asyncio.gather(self.worker.run_once(block_ms=10), other_worker.run_once(block_ms=10))
+            await asyncio.sleep(0.01)
+
+        self.assertEqual(peak, {"a": 1, "b": 1})
+        self.assertTrue(all([(await self.queue.get(job_id))["status"] == SUCCEEDED for job_id in job_ids]))
+
+    async def test_job_of_a_crashed_worker_is_taken_over(self):
+        finished = []
+
+        async def handler(job):
+            finished.append(job.id)
+
+        self.queue.register("sync", handler)
+        job_id = await self.queue.enqueue("sync", "org", "user")
+        # the first worker reads the entry and dies before running it
+        await self.worker._next_entries(1, block_ms=10)
+
+        self.queue.visibility_timeout_seconds = 0
+        other_worker = JobWorker(self.queue)
+        other_worker.consumer = "other"
+        await other_worker.run_once(block_ms=10)
+
+        self.assertEqual(finished, [job_id])
+        self.assertEqual(await self.pending(), 0)
+
+
+class TestHubspotSyncJob(JobQueueTestCase):
+
+    async def test_sync_job_without_credentials_fails_permanently(self):
+        with patch.object(hubspot.redis_client, "redis_client", self.redis):
+            service = HubspotService()
+            job_id = await service.enqueue_contact_sync("org123", "user456")
+            worker = JobWorker(job_queue)
+
+            await worker.run_once(block_ms=10)
+
+        job = await job_queue.get(job_id)
+        self.assertEqual((job["type"], job["status"], job["attempts"]), (HUBSPOT_CONSTS.SYNC_CONTACTS_JOB, DEAD, "1"))
+
+
+if __name__ == "__main__":
+    unittest.main()
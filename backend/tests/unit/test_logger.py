@@ -0,0 +1,38 @@
+import json
+import logging
+import unittest
+
+from config.logger import DebugSamplingFilter, DeferredQueueHandler, JsonFormatter, get_logger
+
+
+def make_record(level, msg, *args):
+    return logging.LogRecord("nexus.test", level, "test.py", 1, msg, args, None)
+
+
+class TestLoggingPipeline(unittest.TestCase):
+    def test_json_formatter_interpolates_lazily(self):
+        line = JsonFormatter().format(make_record(logging.INFO, "Out call %s %s", "GET", "https://api.hubapi.com"))
+        payload = json.loads(line)
+
+        self.assertEqual(payload["message"], "Out call GET https://api.hubapi.com")
+        self.assertEqual(payload["level"], "INFO")
+
+    def test_queue_handler_defers_formatting(self):
+        record = make_record(logging.INFO, "key %s", "value")
+        prepared = DeferredQueueHandler(None).prepare(record)
+
+        self.assertIs(prepared, record)
+        self.assertEqual(prepared.args, ("value",))
+
+    def test_sampling_only_drops_debug_records(self):
+        sampler = DebugSamplingFilter(rate=0.0)
+
+        self.assertFalse(sampler.filter(make_record(logging.DEBUG, "noisy")))
+        self.assertTrue(sampler.filter(make_record(logging.INFO, "kept")))
+
+    def test_module_loggers_share_the_app_root(self):
+        self.assertEqual(get_logger("utils.http.http_client").name, "nexus.utils.http.http_client")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+import unittest
+from unittest.mock import patch
+
+from utils.cache.lru import LRUCache
+
+
+class TestLRUCache(unittest.TestCase):
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(max_entries=2, ttl_seconds=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), 3)
+
+    def test_expires_entries_after_ttl(self):
+        cache = LRUCache(max_entries=2, ttl_seconds=5)
+        with patch("utils.cache.lru.time.monotonic", return_value=100.0):
+            cache.set("a", 1)
+        with patch("utils.cache.lru.time.monotonic", return_value=104.0):
+            self.assertEqual(cache.get("a"), 1)
+        with patch("utils.cache.lru.time.monotonic", return_value=106.0):
+            self.assertIsNone(cache.get("a"))
+        self.assertEqual(len(cache), 0)
+
+    def test_caps_the_total_weight_of_entries(self):
+        cache = LRUCache(max_entries=10, ttl_seconds=60, max_weight=5, weigh=len)
+        cache.set("a", "xx")
+        cache.set("b", "xx")
+        cache.set("c", "xx")
+        cache.set("huge", "xxxxxx")
+
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual((cache.get("b"), cache.get("c")), ("xx", "xx"))
+        self.assertIsNone(cache.get("huge"))
+        self.assertEqual(cache.weight, 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+import asyncio
+import os
+import unittest
+
+import httpx
+from fastapi import FastAPI, APIRouter
+from fastapi.testclient import TestClient
+
+os.environ.setdefault("HUBSPOT_CLIENT_ID", "test_client_id")
+os.environ.setdefault("HUBSPOT_CLIENT_SECRET", "test_client_secret")
+os.environ.setdefault("HUBSPOT_CALLBACK_ENDPOINT", "http://localhost:8000/v1/hubspot/oauth2/callback")
+
+from config.constants import HTTP_METHODS
+from utils.http import http_client
+from utils.http.http_client import HttpClientRegistry, OUTBOUND_LATENCY, OUTBOUND_REQUESTS
+from utils.metrics.middleware import MetricsMiddleware, REQUEST_LATENCY
+from utils.metrics.registry import MetricsRegistry
+
+
+class TestMetricsRegistry(unittest.TestCase):
+
+    def test_histogram_buckets_are_cumulative(self):
+        registry = MetricsRegistry()
+        histogram = registry.histogram("latency_seconds", "Latency.", ("route",), buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe(value, "/items")
+
+        self.assertEqual(histogram.count("/items"), 4)
+        self.assertAlmostEqual(histogram.sum("/items"), 3.65)
+        rendered = registry.render()
+        self.assertIn('latency_seconds_bucket{route="/items",le="0.1"} 2', rendered)
+        self.assertIn('latency_seconds_bucket{route="/items",le="1"} 3', rendered)
+        self.assertIn('latency_seconds_bucket{route="/items",le="+Inf"} 4', rendered)
+        self.assertIn('latency_seconds_count{route="/items"} 4', rendered)
+
+    def test_render_counter_and_gauge(self):
+        registry = MetricsRegistry()
+        counter = registry.counter("refreshes", "Refreshes.", ("outcome",))
+        counter.inc("refreshed")
+        counter.inc("refreshed")
+        registry.gauge("pool", "Pool.", lambda: [(("idle",), 3)], ("state",))
+
+        rendered = registry.render()
+        self.assertIn("# TYPE refreshes counter", rendered)
+        self.assertIn('refreshes_total{outcome="refreshed"} 2', rendered)
+        self.assertIn('pool{state="idle"} 3', rendered)
+
+    def test_label_values_are_escaped(self):
+        registry = MetricsRegistry()
+        registry.counter("events", "Events.", ("name",)).inc('say "hi"\n')
+        self.assertIn('events_total{name="say \\"hi\\"\\n"} 1', registry.render())
+
+    def test_duplicate_names_are_rejected(self):
+        registry = MetricsRegistry()
+        registry.counter("events", "Events.")
+        with self.assertRaises(ValueError):
+            registry.counter("events", "Events.")
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def test_fetch_records_upstream_latency_and_status(self):
+        def handler(request: httpx.Request) -> httpx.Response:
+            if request.url.path == "/missing":
+                return httpx.Response(404, json={})
+            return httpx.Response(200, json={"ok": True})
+
+        registry = HttpClientRegistry(transport=httpx.MockTransport(handler))
+        original = http_client.http_client_registry
+        http_client.http_client_registry = registry
+        registry.start()
+        try:
+            before = OUTBOUND_REQUESTS.value("metrics.test", "GET", "200")
+
+            async def run():
+                await http_client.fetch(HTTP_METHODS.GET, "https://metrics.test/ok")
+                with self.assertRaises(httpx.HTTPStatusError):
+                    await http_client.fetch(HTTP_METHODS.GET, "https://metrics.test/missing")
+                await registry.aclose()
+
+            asyncio.run(run())
+        finally:
+            http_client.http_client_registry = original
+
+        self.assertEqual(OUTBOUND_REQUESTS.value("metrics.test", "GET", "200"), before + 1)
+        self.assertGreaterEqual(OUTBOUND_REQUESTS.value("metrics.test", "GET", "404"), 1)
+        self.assertGreaterEqual(OUTBOUND_LATENCY.count("metrics.test", "GET", "200"), 1)
+
+    def test_middleware_labels_requests_by_route_template(self):
+        router = APIRouter()
+
+        @router.get("/things/{thing_id}")
+        async def get_thing(thing_id: str):
+            return {"id": thing_id}
+
+        app = FastAPI()
+        app.add_middleware(MetricsMiddleware)
+        app.include_router(router, prefix="/v1/test")
+
+        client = TestClient(app)
+        before = REQUEST_LATENCY.count("GET", "/v1/test/things/{thing_id}", "200")
+        client.get("/v1/test/things/1")
+        client.get("/v1/test/things/2")
+        client.get("/nowhere")
+
+        self.assertEqual(REQUEST_LATENCY.count("GET", "/v1/test/things/{thing_id}", "200"), before + 2)
+        self.assertGreaterEqual(REQUEST_LATENCY.count("GET", "unmatched", "404"), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
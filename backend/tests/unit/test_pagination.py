@@ -0,0 +1,98 @@
+import asyncio
+import unittest
+
+from utils.http.pagination import merge, paginate_cursor, prefetch
+
+
+def next_after(page):
+    return ((page.get("paging") or {}).get("next") or {}).get("after")
+
+
+class TestCursorPagination(unittest.IsolatedAsyncioTestCase):
+    async def test_follows_after_cursor_until_exhausted(self):
+        requested = []
+
+        async def fetch_page(after):
+            requested.append(after)
+            index = int(after or 0)
+            paging = {"next": {"after": str(index + 1)}} if index < 2 else None
+            return {"results": [index], "paging": paging}
+
+        pages = [page async for page in paginate_cursor(fetch_page, next_after)]
+
+        self.assertEqual([page["results"] for page in pages], [[0], [1], [2]])
+        self.assertEqual(requested, [None, "1", "2"])
+
+    async def test_uses_prefetched_first_page(self):
+        async def fetch_page(after):
+            self.assertEqual(after, "next")
+            return {"results": ["second"]}
+
+        first = {"results": ["first"], "paging": {"next": {"after": "next"}}}
+        pages = [page async for page in paginate_cursor(fetch_page, next_after, first_page=first)]
+
+        self.assertEqual([page["results"] for page in pages], [["first"], ["second"]])
+
+
+class TestPrefetch(unittest.IsolatedAsyncioTestCase):
+    async def test_buffers_at_most_depth_items_ahead(self):
+        produced = []
+
+        async def source():
+            for i in range(10):
+                produced.append(i)
+                yield i
+
+        iterator = prefetch(source(), depth=2)
+        self.assertEqual(await iterator.__anext__(), 0)
+        await asyncio.sleep(0.01)
+        # one item handed out, two buffered, one blocked on the full queue
+        self.assertLessEqual(len(produced), 4)
+        self.assertEqual([i async for i in iterator], list(range(1, 10)))
+
+    async def test_propagates_source_errors(self):
+        async def source():
+            yield 1
+            raise ValueError("upstream failed")
+
+        with self.assertRaises(ValueError):
+            async for _ in prefetch(source(), depth=1):
+                pass
+
+
+class TestMerge(unittest.IsolatedAsyncioTestCase):
+    async def test_interleaves_sources_as_items_arrive(self):
+        async def source(name, delay):
+            for i in range(3):
+                await asyncio.sleep(delay)
+                yield f"{name}{i}"
+
+        items = [item async for item in merge(source("slow", 0.03), source("fast", 0.01))]
+
+        self.assertCountEqual(items, ["slow0", "slow1", "slow2", "fast0", "fast1", "fast2"])
+        self.assertEqual(items[:2], ["fast0", "fast1"])
+
+    async def test_first_error_cancels_the_other_sources(self):
+        cancelled = asyncio.Event()
+
+        async def failing():
+            yield 1
+            raise ValueError("upstream failed")
+
+        async def endless():
+            try:
+                while True:
+                    await asyncio.sleep(0.01)
+                    yield 2
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        with self.assertRaises(ValueError):
+            async for _ in merge(failing(), endless()):
+                pass
+        self.assertTrue(cancelled.is_set())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+import os
+import sys
+import unittest
+from unittest.mock import patch
+
+os.environ.setdefault("HUBSPOT_CLIENT_ID", "test_client_id")
+os.environ.setdefault("HUBSPOT_CLIENT_SECRET", "test_client_secret")
+os.environ.setdefault("HUBSPOT_CALLBACK_ENDPOINT", "http://localhost:8000/v1/hubspot/oauth2/callback")
+
+from services.integrations import registry
+from services.integrations.base import integration_providers
+
+NOTION_ENV = {
+    "NOTION_CLIENT_ID": "test_client_id",
+    "NOTION_CLIENT_SECRET": "test_client_secret",
+    "NOTION_CALLBACK_ENDPOINT": "http://localhost:8000/v1/notion/oauth2/callback",
+}
+
+
+class TestProviderRegistry(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        p = patch.dict(integration_providers, clear=True)
+        p.start()
+        self.addCleanup(p.stop)
+
+    def test_optional_providers_are_enabled_by_their_oauth_variables(self):
+        cleared = {f"{name}_{suffix}": "" for name in ("NOTION", "AIRTABLE")
+                   for suffix in ("CLIENT_ID", "CLIENT_SECRET", "CALLBACK_ENDPOINT")}
+        with patch.dict(os.environ, cleared):
+            self.assertEqual(registry.enabled_provider_names(), ["hubspot"])
+            with patch.dict(os.environ, NOTION_ENV):
+                self.assertEqual(registry.enabled_provider_names(), ["hubspot", "notion"])
+
+    async def test_provider_is_imported_and_built_on_first_use_only(self):
+        with patch.dict(sys.modules), patch.dict(os.environ, NOTION_ENV):
+            sys.modules.pop("services.integrations.notion", None)
+            get_notion = registry.provider_dependency("notion")
+            self.assertNotIn("services.integrations.notion", sys.modules)
+
+            provider = await get_notion()
+
+            self.assertIn("services.integrations.notion", sys.modules)
+            self.assertIs(await get_notion(), provider)
+            self.assertIs(integration_providers["notion"], provider)
+
+
+if __name__ == "__main__":
+    unittest.main()
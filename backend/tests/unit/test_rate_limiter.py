@@ -0,0 +1,164 @@
+import asyncio
+import time
+import unittest
+from collections import deque
+from unittest.mock import patch
+
+import fakeredis
+import httpx
+
+from config.constants import HTTP_METHODS
+from utils.http import http_client
+from utils.http.http_client import HttpClientRegistry
+from utils.http.rate_limiter import Priority, RateLimitExceeded, RateLimiter
+from utils.redis.redis_client import redis_client
+
+UPSTREAM_MAX = 20
+UPSTREAM_INTERVAL_MS = 500
+
+
+class QuotaEnforcingUpstream:
+    """Sliding-window quota like HubSpot's burst limit, answering 429 once it is exceeded."""
+
+    def __init__(self, max_requests: int = UPSTREAM_MAX, interval_ms: int = UPSTREAM_INTERVAL_MS):
+        self.max_requests = max_requests
+        self.interval = interval_ms / 1000
+        self.sent = deque()
+        self.accepted = 0
+        self.rejected = 0
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        now = time.monotonic()
+        while self.sent and self.sent[0] <= now - self.interval:
+            self.sent.popleft()
+        headers = {
+            "X-HubSpot-RateLimit-Max": str(self.max_requests),
+            "X-HubSpot-RateLimit-Interval-Milliseconds": str(int(self.interval * 1000)),
+        }
+        if len(self.sent) >= self.max_requests:
+            self.rejected += 1
+            return httpx.Response(429, headers={**headers, "Retry-After": "1"}, json={})
+        self.sent.append(now)
+        self.accepted += 1
+        headers["X-HubSpot-RateLimit-Remaining"] = str(self.max_requests - len(self.sent))
+        return httpx.Response(200, headers=headers, json={"results": []})
+
+
+class RateLimiterTestCase(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+        p = patch.object(redis_client, "redis_client", self.redis)
+        p.start()
+        self.addCleanup(p.stop)
+
+
+class TestRateLimiter(RateLimiterTestCase):
+
+    async def test_calls_beyond_the_window_wait_for_a_slot(self):
+        limiter = RateLimiter("test", max_requests=5, interval_seconds=0.3, headroom=0)
+        bucket = limiter.bucket("org", "user")
+
+        started = time.monotonic()
+        for _ in range(5):
+            await bucket.acquire()
+        self.assertLess(time.monotonic() - started, 0.1)
+
+        await bucket.acquire()
+        self.assertGreaterEqual(time.monotonic() - started, 0.25)
+
+    async def test_background_calls_leave_the_reserve_to_interactive_ones(self):
+        limiter = RateLimiter("test", max_requests=10, interval_seconds=60, headroom=0, background_reserve=0.5,
+                              max_wait_seconds=0.1)
+        background = limiter.bucket("org", "user", Priority.BACKGROUND)
+        interactive = limiter.bucket("org", "user", Priority.INTERACTIVE)
+
+        for _ in range(5):
+            await background.acquire()
+        with self.assertRaises(RateLimitExceeded):
+            await background.acquire()
+        for _ in range(5):
+            await interactive.acquire()
+        with self.assertRaises(RateLimitExceeded):
+            await interactive.acquire()
+
+    async def test_tenants_have_separate_windows(self):
+        limiter = RateLimiter("test", max_requests=1, interval_seconds=60, headroom=0, max_wait_seconds=0.1)
+        await limiter.bucket("org", "a").acquire()
+        await limiter.bucket("org", "b").acquire()
+        with self.assertRaises(RateLimitExceeded):
+            await limiter.bucket("org", "a").acquire()
+
+    async def test_retry_after_blocks_every_worker(self):
+        limiter = RateLimiter("test", max_requests=10, interval_seconds=60, headroom=0, max_wait_seconds=5)
+        other_worker = RateLimiter("test", max_requests=10, interval_seconds=60, headroom=0, max_wait_seconds=0.5)
+
+        await limiter.bucket("org", "user").observe(httpx.Response(429, headers={"Retry-After": "2"}))
+
+        with self.assertRaises(RateLimitExceeded) as raised:
+            await other_worker.bucket("org", "user").acquire()
+        self.assertAlmostEqual(raised.exception.retry_after, 2, delta=0.2)
+
+    async def test_window_follows_upstream_headers(self):
+        limiter = RateLimiter("test", max_requests=100, interval_seconds=60, headroom=0, max_wait_seconds=0.1)
+        bucket = limiter.bucket("org", "user")
+
+        # the upstream says 3 per minute and that 1 call is left, e.g. because another client used the rest
+        await bucket.observe(httpx.Response(200, headers={
+            "X-HubSpot-RateLimit-Max": "3",
+            "X-HubSpot-RateLimit-Interval-Milliseconds": "60000",
+            "X-HubSpot-RateLimit-Remaining": "1",
+        }))
+
+        await bucket.acquire()
+        with self.assertRaises(RateLimitExceeded):
+            await bucket.acquire()
+
+
+class TestRateLimitedFetch(RateLimiterTestCase):
+
+    async def test_saturating_load_gets_no_429s(self):
+        upstream = QuotaEnforcingUpstream()
+        registry = HttpClientRegistry(transport=httpx.MockTransport(upstream))
+        registry.start()
+        self.addAsyncCleanup(registry.aclose)
+        p = patch.object(http_client, "http_client_registry", registry)
+        p.start()
+        self.addCleanup(p.stop)
+
+        # defaults are far above the upstream quota; the first responses teach the limiter the real one
+        limiter = RateLimiter("test", max_requests=UPSTREAM_MAX, interval_seconds=UPSTREAM_INTERVAL_MS / 1000)
+        total = 3 * UPSTREAM_MAX
+
+        async def call(priority: Priority):
+            await http_client.fetch(
+                HTTP_METHODS.GET, "https://api.test/contacts", rate_limit=limiter.bucket("org", "user", priority)
+            )
+
+        started = time.monotonic()
+        await asyncio.gather(*(
+            call(Priority.BACKGROUND if index % 2 else Priority.INTERACTIVE) for index in range(total)
+        ))
+        elapsed = time.monotonic() - started
+
+        self.assertEqual(upstream.rejected, 0)
+        self.assertEqual(upstream.accepted, total)
+        # 90% of a 20-per-500ms quota: 60 calls fit in a little over three windows
+        self.assertLess(elapsed, 4 * UPSTREAM_INTERVAL_MS / 1000)
+
+    async def test_upstream_429_becomes_rate_limit_exceeded(self):
+        upstream = QuotaEnforcingUpstream(max_requests=0)
+        registry = HttpClientRegistry(transport=httpx.MockTransport(upstream))
+        registry.start()
+        self.addAsyncCleanup(registry.aclose)
+        p = patch.object(http_client, "http_client_registry", registry)
+        p.start()
+        self.addCleanup(p.stop)
+
+        limiter = RateLimiter("test")
+        with self.assertRaises(RateLimitExceeded) as raised:
+            await http_client.fetch(HTTP_METHODS.GET, "https://api.test/contacts", rate_limit=limiter.bucket("o", "u"))
+        self.assertEqual(raised.exception.retry_after, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
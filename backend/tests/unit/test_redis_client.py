@@ -0,0 +1,53 @@
+import unittest
+from unittest.mock import patch
+
+import fakeredis
+
+from utils.redis.redis_client import REDIS_COMMAND_LATENCY, redis_client
+
+
+class TestRedisClientBatchOps(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+        p = patch.object(redis_client, "redis_client", self.redis)
+        p.start()
+        self.addCleanup(p.stop)
+
+    async def test_add_key_sets_value_and_expiry_together(self):
+        await redis_client.add_key("token", "abc", expire_seconds=600)
+
+        self.assertEqual(await self.redis.get("token"), "abc")
+        self.assertGreater(await self.redis.ttl("token"), 0)
+
+    async def test_consume_key_returns_value_once(self):
+        await redis_client.add_key("nonce", "n1")
+
+        self.assertEqual(await redis_client.consume_key("nonce"), "n1")
+        self.assertIsNone(await redis_client.consume_key("nonce"))
+
+    async def test_batch_get_and_set(self):
+        await redis_client.add_keys({"a": "1", "b": "2"}, expire_seconds=60)
+
+        self.assertEqual(await redis_client.get_keys("a", "missing", "b"), ["1", None, "2"])
+        self.assertGreater(await self.redis.ttl("b"), 0)
+
+    async def test_batch_set_with_expiry_is_timed_once(self):
+        before = REDIS_COMMAND_LATENCY.count("mset"), REDIS_COMMAND_LATENCY.count("pipeline")
+
+        await redis_client.add_keys({"a": "1", "b": "2"}, expire_seconds=60)
+
+        after = REDIS_COMMAND_LATENCY.count("mset"), REDIS_COMMAND_LATENCY.count("pipeline")
+        self.assertEqual((after[0] - before[0], after[1] - before[1]), (1, 0))
+
+    async def test_pipeline_applies_queued_commands(self):
+        async with redis_client.pipeline() as pipe:
+            pipe.set("a", "1", ex=60)
+            pipe.zadd("schedule", {"org:user": 10})
+            await pipe.execute()
+
+        self.assertEqual(await self.redis.get("a"), "1")
+        self.assertEqual(await self.redis.zscore("schedule", "org:user"), 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
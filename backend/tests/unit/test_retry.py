@@ -0,0 +1,186 @@
+import asyncio
+import time
+import unittest
+from unittest.mock import patch
+
+import httpx
+
+from config.constants import HTTP_METHODS
+from utils.http import http_client
+from utils.http.http_client import OUTBOUND_REQUESTS, HttpClientRegistry
+from utils.http.retry import LatencyTracker, RetryBudget, RetryPolicy
+
+URL = "https://api.test/contacts"
+
+
+class FaultInjectingUpstream:
+    """Answers from a script of faults, then succeeds: 'ok', a status code, 'connect_error', 'read_error' or a delay."""
+
+    def __init__(self, *script):
+        self.script = list(script)
+        self.calls = 0
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.calls += 1
+        fault = self.script.pop(0) if self.script else "ok"
+        if fault == "connect_error":
+            raise httpx.ConnectError("connection refused", request=request)
+        if fault == "read_error":
+            raise httpx.ReadError("connection reset", request=request)
+        if isinstance(fault, float):
+            await asyncio.sleep(fault)
+        elif isinstance(fault, int):
+            return httpx.Response(fault, json={})
+        return httpx.Response(200, json={"call": self.calls})
+
+
+def _policy(**overrides) -> RetryPolicy:
+    settings = dict(max_attempts=3, base_delay_seconds=0.001, max_delay_seconds=0.01, deadline_seconds=5,
+                    hedging_enabled=False)
+    settings.update(overrides)
+    return RetryPolicy(**settings)
+
+
+class HttpClientTestCase(unittest.IsolatedAsyncioTestCase):
+    def use_upstream(self, upstream: FaultInjectingUpstream) -> None:
+        registry = HttpClientRegistry(transport=httpx.MockTransport(upstream))
+        registry.start()
+        self.addAsyncCleanup(registry.aclose)
+        p = patch.object(http_client, "http_client_registry", registry)
+        p.start()
+        self.addCleanup(p.stop)
+
+
+class TestRetries(HttpClientTestCase):
+
+    async def test_idempotent_request_is_retried_on_transient_failures(self):
+        upstream = FaultInjectingUpstream(503, "read_error")
+        self.use_upstream(upstream)
+
+        result = await http_client.fetch(HTTP_METHODS.GET, URL, retry_policy=_policy())
+
+        self.assertEqual(result, {"call": 3})
+
+    async def test_gives_up_after_max_attempts(self):
+        upstream = FaultInjectingUpstream(503, 503, 503, 503)
+        self.use_upstream(upstream)
+
+        with self.assertRaises(httpx.HTTPStatusError):
+            await http_client.fetch(HTTP_METHODS.GET, URL, retry_policy=_policy())
+        self.assertEqual(upstream.calls, 3)
+
+    async def test_non_idempotent_request_is_only_retried_when_never_sent(self):
+        upstream = FaultInjectingUpstream("connect_error", 503)
+        self.use_upstream(upstream)
+
+        with self.assertRaises(httpx.HTTPStatusError):
+            await http_client.fetch(HTTP_METHODS.POST, URL, body={}, retry_policy=_policy())
+        self.assertEqual(upstream.calls, 2)
+
+    async def test_post_marked_idempotent_is_retried(self):
+        upstream = FaultInjectingUpstream(502)
+        self.use_upstream(upstream)
+
+        result = await http_client.fetch(HTTP_METHODS.POST, URL, body={}, idempotent=True, retry_policy=_policy())
+
+        self.assertEqual(result, {"call": 2})
+
+    async def test_client_errors_are_not_retried(self):
+        upstream = FaultInjectingUpstream(404)
+        self.use_upstream(upstream)
+
+        with self.assertRaises(httpx.HTTPStatusError):
+            await http_client.fetch(HTTP_METHODS.GET, URL, retry_policy=_policy())
+        self.assertEqual(upstream.calls, 1)
+
+    async def test_retries_stop_at_the_deadline(self):
+        upstream = FaultInjectingUpstream(1.0, 1.0, 1.0)
+        self.use_upstream(upstream)
+
+        started = time.monotonic()
+        with self.assertRaises(httpx.TimeoutException):
+            await http_client.fetch(HTTP_METHODS.GET, URL, timeout=10, retry_policy=_policy(deadline_seconds=0.3))
+        self.assertLess(time.monotonic() - started, 0.5)
+
+    async def test_budget_caps_retry_amplification(self):
+        upstream = FaultInjectingUpstream(*([503] * 100))
+        self.use_upstream(upstream)
+        policy = _policy(budget=RetryBudget(ratio=0.1, max_tokens=2))
+
+        for _ in range(20):
+            with self.assertRaises(httpx.HTTPStatusError):
+                await http_client.fetch(HTTP_METHODS.GET, URL, retry_policy=policy)
+
+        # 20 first attempts plus at most the 2 initial tokens and 0.1 earned per call
+        self.assertLessEqual(upstream.calls, 24)
+
+    async def test_log_url_keeps_secrets_in_the_url_out_of_logs_and_errors(self):
+        upstream = FaultInjectingUpstream(503, 401)
+        self.use_upstream(upstream)
+
+        with self.assertLogs(http_client.logger, level="DEBUG") as logs, \
+                self.assertRaises(httpx.HTTPStatusError) as raised:
+            await http_client.fetch(
+                HTTP_METHODS.GET, f"{URL}/secret-token", log_url=f"{URL}/<token>", retry_policy=_policy()
+            )
+
+        self.assertIn(f"{URL}/<token>", str(raised.exception))
+        self.assertNotIn("secret-token", str(raised.exception))
+        self.assertEqual(len(logs.output), 3)
+        self.assertFalse([line for line in logs.output if "secret-token" in line])
+
+    def test_backoff_uses_full_jitter_under_the_cap(self):
+        policy = _policy(base_delay_seconds=0.1, max_delay_seconds=0.3)
+        delays = [policy.backoff(attempt) for attempt in (1, 2, 3, 4) for _ in range(200)]
+        self.assertTrue(all(0 <= delay <= 0.3 for delay in delays))
+        self.assertLess(min(delays), 0.01)
+
+
+class TestHedging(HttpClientTestCase):
+
+    def _warmed_policy(self, p95: float) -> RetryPolicy:
+        latencies = LatencyTracker(min_samples=1)
+        latencies.record("api.test", p95)
+        return _policy(hedging_enabled=True, latencies=latencies)
+
+    async def test_slow_request_is_hedged_and_the_fast_copy_wins(self):
+        upstream = FaultInjectingUpstream(1.0)
+        self.use_upstream(upstream)
+
+        started = time.monotonic()
+        result = await http_client.fetch(HTTP_METHODS.GET, URL, hedge=True, retry_policy=self._warmed_policy(0.05))
+
+        self.assertEqual(result, {"call": 2})
+        self.assertLess(time.monotonic() - started, 0.5)
+
+    async def test_losing_copy_is_counted_as_cancelled(self):
+        self.use_upstream(FaultInjectingUpstream(1.0))
+
+        def outcomes():
+            return [OUTBOUND_REQUESTS.value("api.test", "GET", status) for status in ("cancelled", "error")]
+
+        before = outcomes()
+        await http_client.fetch(HTTP_METHODS.GET, URL, hedge=True, retry_policy=self._warmed_policy(0.05))
+        await asyncio.sleep(0.01)  # let the cancelled copy unwind
+
+        self.assertEqual([now - then for now, then in zip(outcomes(), before)], [1, 0])
+
+    async def test_fast_request_is_not_hedged(self):
+        upstream = FaultInjectingUpstream()
+        self.use_upstream(upstream)
+
+        await http_client.fetch(HTTP_METHODS.GET, URL, hedge=True, retry_policy=self._warmed_policy(0.5))
+
+        self.assertEqual(upstream.calls, 1)
+
+    async def test_non_idempotent_requests_are_never_hedged(self):
+        upstream = FaultInjectingUpstream(0.2)
+        self.use_upstream(upstream)
+
+        await http_client.fetch(HTTP_METHODS.POST, URL, body={}, hedge=True, retry_policy=self._warmed_policy(0.01))
+
+        self.assertEqual(upstream.calls, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
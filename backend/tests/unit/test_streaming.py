@@ -0,0 +1,149 @@
+import asyncio
+import json
+import unittest
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+from fastapi import HTTPException
+
+from dtos.standard import IntegrationItem
+from utils.http import columnar, streaming
+
+
+def _item(index: int) -> IntegrationItem:
+    return IntegrationItem(
+        id=str(index),
+        name=f"Contact {index}",
+        type="hubspot_contact",
+        creation_time=datetime(2024, 1, 2, 3, 4, 5, 123000, tzinfo=timezone.utc),
+        children=["a"],
+    )
+
+
+class TestItemEncoding(unittest.TestCase):
+
+    def test_items_have_no_instance_dict(self):
+        self.assertFalse(hasattr(_item(1), "__dict__"))
+
+    def test_encoded_item_round_trips_through_from_dict(self):
+        item = _item(1)
+        self.assertEqual(IntegrationItem.from_dict(json.loads(streaming.encode_item(item))), item)
+
+    def test_stdlib_fallback_matches_fast_encoder(self):
+        items = [_item(1), IntegrationItem(id="2", name="Zoë Ñúñez 東京 🚀")]
+        record = {"org_id": "org", "items": items}
+        fast = [streaming.encode_item(item) for item in items], streaming.encode_record(record)
+        with patch.object(streaming, "orjson", None):
+            fallback = [streaming.encode_item(item) for item in items], streaming.encode_record(record)
+        self.assertEqual(fallback, fast)
+
+    def test_sparse_item_holds_only_its_fields_in_order(self):
+        item = _item(1)
+        fast = streaming.encode_item(item, ("name", "id", "creation_time"))
+        with patch.object(streaming, "orjson", None):
+            self.assertEqual(streaming.encode_item(item, ("name", "id", "creation_time")), fast)
+        self.assertEqual(list(json.loads(fast)), ["name", "id", "creation_time"])
+        self.assertEqual(
+            IntegrationItem.from_dict(json.loads(fast)),
+            IntegrationItem(id="1", name="Contact 1", creation_time=item.creation_time),
+        )
+
+    def test_ndjson_stream_emits_one_line_per_item(self):
+        async def pages():
+            yield [_item(1), _item(2)]
+            yield []
+            yield [_item(3)]
+
+        async def collect():
+            return [chunk async for chunk in streaming.ndjson_stream(pages())]
+
+        chunks = asyncio.run(collect())
+        self.assertEqual(len(chunks), 2)
+        lines = b"".join(chunks).splitlines()
+        self.assertEqual([json.loads(line)["id"] for line in lines], ["1", "2", "3"])
+
+
+async def _pages():
+    yield [_item(1), _item(2)]
+    yield []
+    yield [_item(3)]
+
+
+def _encode(media_type: str) -> bytes:
+    async def collect():
+        return b"".join([chunk async for chunk in streaming.encode_item_pages(_pages(), media_type)])
+
+    return asyncio.run(collect())
+
+
+class TestItemFieldSelection(unittest.TestCase):
+
+    def test_fields_are_deduplicated_in_request_order(self):
+        self.assertEqual(streaming.parse_item_fields(" name,id,,name "), ("name", "id"))
+        self.assertIsNone(streaming.parse_item_fields(None))
+        self.assertIsNone(streaming.parse_item_fields(" , "))
+
+    def test_unknown_fields_are_rejected(self):
+        with self.assertRaises(HTTPException) as raised:
+            streaming.parse_item_fields("id,email")
+        self.assertEqual(raised.exception.status_code, 422)
+        self.assertIn("email", raised.exception.detail)
+
+    def test_from_dict_reads_only_the_selected_fields(self):
+        item = IntegrationItem.from_dict(_item(1).to_dict(), ("id", "children"))
+        self.assertEqual(item, IntegrationItem(id="1", children=["a"]))
+
+
+class TestItemFormatNegotiation(unittest.TestCase):
+
+    def test_clients_naming_no_item_format_get_ndjson(self):
+        for accept in (None, "", "*/*", "application/json", "text/html, application/*;q=0.5"):
+            self.assertEqual(streaming.negotiate_item_media_type(accept), streaming.NDJSON_MEDIA_TYPE)
+
+    def test_most_preferred_available_format_wins(self):
+        accept = "application/x-ndjson;q=0.5, application/vnd.apache.arrow.stream, application/vnd.apache.parquet;q=0"
+        with patch.object(columnar, "AVAILABLE", True):
+            self.assertEqual(streaming.negotiate_item_media_type(accept), columnar.ARROW_STREAM_MEDIA_TYPE)
+
+    def test_columnar_formats_fall_back_or_are_refused_without_pyarrow(self):
+        with patch.object(columnar, "AVAILABLE", False):
+            self.assertEqual(
+                streaming.negotiate_item_media_type("application/vnd.apache.arrow.stream, */*;q=0.1"),
+                streaming.NDJSON_MEDIA_TYPE,
+            )
+            with self.assertRaises(HTTPException) as raised:
+                streaming.negotiate_item_media_type("application/vnd.apache.arrow.stream")
+        self.assertEqual(raised.exception.status_code, 406)
+
+
+@unittest.skipUnless(columnar.AVAILABLE, "pyarrow is not installed")
+class TestColumnarEncoding(unittest.TestCase):
+
+    def setUp(self):
+        self.pa = columnar.load_pyarrow()
+
+    def test_arrow_stream_round_trips_every_page(self):
+        table = self.pa.ipc.open_stream(_encode(columnar.ARROW_STREAM_MEDIA_TYPE)).read_all()
+
+        self.assertEqual(table.schema, columnar.ITEM_SCHEMA)
+        self.assertEqual(table.column("id").to_pylist(), ["1", "2", "3"])
+        self.assertEqual(table.column("children").to_pylist(), [["a"]] * 3)
+        self.assertEqual(table.column("creation_time")[0].as_py(), _item(1).creation_time)
+
+    def test_arrow_stream_carries_only_the_selected_columns(self):
+        async def collect():
+            chunks = streaming.encode_item_pages(_pages(), columnar.ARROW_STREAM_MEDIA_TYPE, ("name", "id"))
+            return b"".join([chunk async for chunk in chunks])
+
+        table = self.pa.ipc.open_stream(asyncio.run(collect())).read_all()
+
+        self.assertEqual(table.column_names, ["name", "id"])
+
+    def test_parquet_file_holds_every_item(self):
+        table = columnar.pq.read_table(self.pa.BufferReader(_encode(columnar.PARQUET_MEDIA_TYPE)))
+
+        self.assertEqual(table.column("name").to_pylist(), ["Contact 1", "Contact 2", "Contact 3"])
+
+
+if __name__ == "__main__":
+    unittest.main()
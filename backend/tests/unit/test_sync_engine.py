@@ -0,0 +1,255 @@
+import datetime
+import os
+import time
+import unittest
+from unittest.mock import AsyncMock, patch
+
+import fakeredis
+
+os.environ.setdefault("HUBSPOT_CLIENT_ID", "test_client_id")
+os.environ.setdefault("HUBSPOT_CLIENT_SECRET", "test_client_secret")
+os.environ.setdefault("HUBSPOT_CALLBACK_ENDPOINT", "http://localhost:8000/v1/hubspot/oauth2/callback")
+
+from config.constants import HUBSPOT_CONSTS
+from dtos.standard import IntegrationItem
+from services.integrations import hubspot
+from services.integrations.hubspot import HubspotService
+from services.sync_engine import SyncCheckpoint, SyncEngine
+from utils.cache.items_cache import CachedItems, ItemsCache
+
+ORG_ID = "org123"
+USER_ID = "user456"
+BASE_MS = 1_700_000_000_000
+
+
+def _iso(ms: int) -> str:
+    return datetime.datetime.fromtimestamp(ms / 1000, datetime.timezone.utc).isoformat()
+
+
+class FakeCrm:
+    """Contacts list and search endpoints over an in-memory table, paging by offset like HubSpot's search."""
+
+    def __init__(self):
+        self.contacts = {}
+        self.list_calls = 0
+        self.search_calls = 0
+
+    def put(self, contact_id: int, modified_ms: int, name: str = "Jane") -> None:
+        self.contacts[str(contact_id)] = {"firstname": name, "lastmodifieddate": _iso(modified_ms), "ms": modified_ms}
+
+    def _result(self, contact_id: str) -> dict:
+        properties = {k: v for k, v in self.contacts[contact_id].items() if k != "ms"}
+        return {"id": contact_id, "properties": properties}
+
+    @staticmethod
+    def _page(rows, offset: int, limit: int) -> dict:
+        page = {"total": len(rows), "results": rows[offset:offset + limit]}
+        if offset + limit < len(rows):
+            page["paging"] = {"next": {"after": str(offset + limit)}}
+        return page
+
+    def _matches(self, contact_id: str, f: dict) -> bool:
+        actual = self.contacts[contact_id]["ms"] if f["propertyName"] == "lastmodifieddate" else int(contact_id)
+        value = int(f["value"])
+        return {"GTE": actual >= value, "GT": actual > value, "EQ": actual == value}[f["operator"]]
+
+    async def fetch(self, method, url, params=None, body=None, headers=None, **kwargs):
+        if url == HUBSPOT_CONSTS.CONTACTS_SEARCH_API_URL:
+            self.search_calls += 1
+            offset = int(body.get("after", 0))
+            assert offset < HUBSPOT_CONSTS.SEARCH_RESULTS_LIMIT, "searched past the result limit"
+            groups = [group["filters"] for group in body["filterGroups"]]
+            ids = [i for i in self.contacts if any(all(self._matches(i, f) for f in g) for g in groups)]
+            if body["sorts"][0]["propertyName"] == "hs_object_id":
+                ids.sort(key=int)
+            else:
+                ids.sort(key=lambda i: self.contacts[i]["ms"])
+            return self._page([self._result(i) for i in ids], offset, body["limit"])
+        self.list_calls += 1
+        ids = sorted(self.contacts, key=int)
+        return self._page([self._result(i) for i in ids], int(params.get("after", 0)), params["limit"])
+
+
+class SyncEngineTestCase(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+        self.crm = FakeCrm()
+        patches = [
+            patch.object(hubspot, "fetch", self.crm.fetch),
+            patch.object(hubspot.redis_client, "redis_client", self.redis),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+        await self.redis.set(
+            hubspot.redis_client.KeyNamer.get_access_token_key(ORG_ID, USER_ID, HUBSPOT_CONSTS.INTEGRATION_NAME),
+            "access_token",
+        )
+        self.service = HubspotService()
+        self.service.contact_sync.lookback_seconds = 0
+        self.service.items_cache.get = AsyncMock(return_value=None)
+        self.service.items_cache.set = AsyncMock()
+
+    async def sync(self) -> dict:
+        items = await self.service.get_items(ORG_ID, USER_ID)
+        return {item.id: item for item in items}
+
+
+class TestIncrementalSync(SyncEngineTestCase):
+
+    async def test_after_the_first_run_only_changes_are_fetched(self):
+        for contact_id in range(1, 251):
+            self.crm.put(contact_id, BASE_MS + contact_id)
+        self.assertEqual(len(await self.sync()), 250)
+        self.assertEqual((self.crm.list_calls, self.crm.search_calls), (3, 0))
+
+        self.crm.put(7, BASE_MS + 1000, name="Changed")
+        self.crm.put(251, BASE_MS + 1001)
+        items = await self.sync()
+
+        self.assertEqual((self.crm.list_calls, self.crm.search_calls), (3, 1))
+        self.assertEqual(len(items), 251)
+        self.assertEqual(items["7"].name, "Changed")
+
+    async def test_unchanged_tenant_costs_one_search_call(self):
+        self.crm.put(1, BASE_MS)
+        await self.sync()
+
+        await self.sync()
+        await self.sync()
+
+        self.assertEqual((self.crm.list_calls, self.crm.search_calls), (1, 2))
+
+    async def test_changes_beyond_the_search_limit_are_all_applied(self):
+        self.crm.put(1, BASE_MS)
+        await self.sync()
+        # 7 contacts share one millisecond, more than a whole search query returns
+        for contact_id in range(2, 9):
+            self.crm.put(contact_id, BASE_MS + 10)
+        for contact_id in range(9, 14):
+            self.crm.put(contact_id, BASE_MS + 10 + contact_id)
+
+        with patch.object(HUBSPOT_CONSTS, "SEARCH_RESULTS_LIMIT", 3):
+            items = await self.sync()
+
+        self.assertEqual(sorted(items, key=int), [str(contact_id) for contact_id in range(1, 14)])
+        checkpoint = await self.service.contact_sync.get_checkpoint(ORG_ID, USER_ID)
+        self.assertEqual((checkpoint.modified_ms, checkpoint.last_id), (BASE_MS + 23, "13"))
+
+    async def test_changes_made_during_the_first_listing_are_picked_up_next(self):
+        for contact_id in range(1, 251):
+            self.crm.put(contact_id, BASE_MS + contact_id)
+        list_contacts = self.crm.fetch
+
+        async def edit_between_pages(method, url, params=None, **kwargs):
+            if url != HUBSPOT_CONSTS.CONTACTS_SEARCH_API_URL and params.get("after"):
+                # contact 1 was on the first page; contact 250 is on the last, read after both edits
+                edited_ms = int(time.time() * 1000)
+                self.crm.put(1, edited_ms, name="Edited")
+                self.crm.put(250, edited_ms + 1)
+            return await list_contacts(method, url, params=params, **kwargs)
+
+        with patch.object(hubspot, "fetch", edit_between_pages):
+            await self.sync()
+        items = await self.sync()
+
+        self.assertEqual(items["1"].name, "Edited")
+
+    async def test_reconciling_drops_deleted_contacts(self):
+        for contact_id in range(1, 4):
+            self.crm.put(contact_id, BASE_MS)
+        await self.sync()
+        del self.crm.contacts["2"]
+
+        self.service.contact_sync.reconcile_seconds = 0
+        items = await self.sync()
+
+        self.assertEqual(sorted(items), ["1", "3"])
+        self.assertEqual(sorted(await self.service.contact_sync.store.ids(ORG_ID, USER_ID)), ["1", "3"])
+
+    async def test_failed_full_sync_keeps_no_checkpoint(self):
+        self.crm.put(1, BASE_MS)
+        self.crm.fetch = AsyncMock(side_effect=RuntimeError("upstream down"))
+
+        with patch.object(hubspot, "fetch", self.crm.fetch), self.assertRaises(RuntimeError):
+            await self.sync()
+
+        self.assertIsNone(await self.service.contact_sync.get_checkpoint(ORG_ID, USER_ID))
+
+    async def test_background_sync_reports_progress_and_requests_read_the_store(self):
+        for contact_id in range(1, 151):
+            self.crm.put(contact_id, BASE_MS + contact_id)
+        progress = []
+
+        async def on_progress(synced):
+            progress.append(synced)
+
+        self.assertEqual(await self.service.sync_contacts(ORG_ID, USER_ID, on_progress), 150)
+        self.assertEqual(progress, [100, 150])
+
+        items = await self.sync()
+        self.assertEqual(len(items), 150)
+        self.assertEqual((self.crm.list_calls, self.crm.search_calls), (2, 1))
+
+
+class TestCachedItemsRevalidation(SyncEngineTestCase):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        self.service.items_cache = ItemsCache(HUBSPOT_CONSTS.INTEGRATION_NAME)
+        for contact_id in range(1, 4):
+            self.crm.put(contact_id, BASE_MS + contact_id)
+        await self.sync()
+
+    async def make_stale(self) -> None:
+        cached = await self.service.items_cache.get(ORG_ID, USER_ID)
+        stale = CachedItems(items=cached.items, fetched_at=time.time() - self.service.items_cache.fresh_seconds - 1)
+        await self.service.items_cache.set(ORG_ID, USER_ID, stale)
+
+    async def test_fresh_entry_is_served_without_calling_hubspot(self):
+        items = await self.sync()
+
+        self.assertEqual(len(items), 3)
+        self.assertEqual((self.crm.list_calls, self.crm.search_calls), (1, 0))
+
+    async def test_stale_entry_is_revalidated_with_only_the_changes(self):
+        await self.make_stale()
+        self.crm.put(2, BASE_MS + 100, name="Changed")
+        cache_key = hubspot.redis_client.KeyNamer.get_items_cache_key(ORG_ID, USER_ID, HUBSPOT_CONSTS.INTEGRATION_NAME)
+        await self.redis.expire(cache_key, 5)
+
+        items = await self.sync()
+
+        self.assertEqual((self.crm.list_calls, self.crm.search_calls), (1, 1))
+        self.assertEqual(items["2"].name, "Changed")
+        self.assertEqual(self.service.items_cache.stats.revalidations, 1)
+        revalidated = await ItemsCache(HUBSPOT_CONSTS.INTEGRATION_NAME).get(ORG_ID, USER_ID)
+        self.assertTrue(revalidated.is_fresh(self.service.items_cache.fresh_seconds))
+        self.assertEqual({item["id"]: item["name"] for item in revalidated.items}["2"], "Changed")
+        self.assertGreater(await self.redis.ttl(cache_key), 5)
+
+        await self.sync()
+        self.assertEqual((self.crm.list_calls, self.crm.search_calls), (1, 1))
+
+
+class TestSyncCheckpoint(unittest.TestCase):
+
+    def _item(self, item_id: str, ms: int) -> IntegrationItem:
+        return IntegrationItem(
+            id=item_id, last_modified_time=datetime.datetime.fromtimestamp(ms / 1000, datetime.timezone.utc)
+        )
+
+    def test_advances_to_the_newest_change_and_highest_id_at_that_time(self):
+        checkpoint = SyncCheckpoint(synced_at=0, reconciled_at=0)
+        checkpoint.advance([self._item("9", BASE_MS), self._item("100", BASE_MS + 5), self._item("11", BASE_MS + 5)])
+
+        self.assertEqual((checkpoint.modified_ms, checkpoint.last_id), (BASE_MS + 5, "100"))
+
+    def test_resume_point_looks_back_when_configured(self):
+        checkpoint = SyncCheckpoint(modified_ms=BASE_MS, last_id="42", synced_at=0, reconciled_at=0)
+
+        self.assertEqual(SyncEngine("test", lookback_seconds=0).resume_point(checkpoint), (BASE_MS, "42"))
+        self.assertEqual(SyncEngine("test", lookback_seconds=10).resume_point(checkpoint), (BASE_MS - 10_000, None))
+
+
+if __name__ == "__main__":
+    unittest.main()
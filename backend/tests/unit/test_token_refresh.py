@@ -0,0 +1,165 @@
+import asyncio
+import os
+import unittest
+from unittest.mock import AsyncMock, patch
+
+import fakeredis
+import httpx
+
+os.environ.setdefault("HUBSPOT_CLIENT_ID", "test_client_id")
+os.environ.setdefault("HUBSPOT_CLIENT_SECRET", "test_client_secret")
+os.environ.setdefault("HUBSPOT_CALLBACK_ENDPOINT", "http://localhost:8000/v1/hubspot/oauth2/callback")
+
+from config.constants import HUBSPOT_CONSTS
+from services.integrations import base, hubspot
+from services import token_refresh_scheduler
+from services.integrations.hubspot import HubspotService
+from services.token_refresh_scheduler import TokenRefreshScheduler
+from utils.concurrency.single_flight import SingleFlight
+
+ORG_ID = "org123"
+USER_ID = "user456"
+
+
+class FakeHubspot:
+    """Token endpoint plus a contacts endpoint that rejects every token except the latest one."""
+
+    def __init__(self):
+        self.refresh_calls = 0
+        self.valid_token = "fresh_access_token"
+
+    async def fetch(self, method, url, params=None, body=None, headers=None, **kwargs):
+        if url == HUBSPOT_CONSTS.TOKEN_URL:
+            self.refresh_calls += 1
+            await asyncio.sleep(0.01)
+            return {
+                "token_type": "bearer",
+                "access_token": self.valid_token,
+                "refresh_token": "new_refresh_token",
+                "expires_in": 1800,
+            }
+        if headers["Authorization"] != f"Bearer {self.valid_token}":
+            request = httpx.Request("GET", url)
+            raise httpx.HTTPStatusError("401", request=request, response=httpx.Response(401, request=request))
+        return {"results": [{"id": "1", "properties": {"firstname": "John", "lastname": "Doe"}}]}
+
+
+class TestSingleFlightTokenRefresh(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+        self.upstream = FakeHubspot()
+        key_namer = hubspot.redis_client.KeyNamer
+        await self.redis.set(
+            key_namer.get_access_token_key(ORG_ID, USER_ID, HUBSPOT_CONSTS.INTEGRATION_NAME), "expired_access_token"
+        )
+        await self.redis.set(
+            key_namer.get_refresh_token_key(ORG_ID, USER_ID, HUBSPOT_CONSTS.INTEGRATION_NAME), "refresh_token"
+        )
+
+        patches = [
+            patch.object(hubspot, "fetch", self.upstream.fetch),
+            patch.object(base, "fetch", self.upstream.fetch),
+            patch.object(hubspot.redis_client, "redis_client", self.redis),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    def _service(self):
+        service = HubspotService()
+        service.items_cache.get = AsyncMock(return_value=None)
+        service.items_cache.set = AsyncMock()
+        return service
+
+    async def test_500_parallel_requests_refresh_once(self):
+        service = self._service()
+
+        results = await asyncio.gather(*(service.get_items(ORG_ID, USER_ID) for _ in range(500)))
+
+        self.assertEqual(self.upstream.refresh_calls, 1)
+        self.assertTrue(all(len(items) == 1 for items in results))
+
+    async def test_workers_reuse_token_refreshed_behind_the_lock(self):
+        # separate service instances model separate worker processes sharing Redis
+        workers = [self._service() for _ in range(5)]
+
+        await asyncio.gather(*(worker.get_items(ORG_ID, USER_ID) for worker in workers for _ in range(20)))
+
+        self.assertEqual(self.upstream.refresh_calls, 1)
+
+
+class TestTokenRefreshScheduler(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+        p = patch.object(token_refresh_scheduler.redis_client, "redis_client", self.redis)
+        p.start()
+        self.addCleanup(p.stop)
+
+    async def test_refreshes_only_tokens_inside_the_margin(self):
+        refreshed = []
+
+        async def refresh(org_id, user_id):
+            refreshed.append((org_id, user_id))
+
+        scheduler = TokenRefreshScheduler("hubspot", refresh, margin_seconds=300)
+        await scheduler.schedule("org1", "user1", expires_in=60)
+        await scheduler.schedule("org2", "user2", expires_in=3600)
+
+        self.assertEqual(await scheduler.run_once(), 1)
+        self.assertEqual(refreshed, [("org1", "user1")])
+        self.assertEqual(await self.redis.zrange(scheduler.schedule_key, 0, -1), ["org2:user2"])
+
+    async def test_failed_refresh_is_retried_while_the_token_is_valid(self):
+        async def refresh(org_id, user_id):
+            raise RuntimeError("token endpoint unavailable")
+
+        scheduler = TokenRefreshScheduler("hubspot", refresh, margin_seconds=300, retry_seconds=60)
+        await scheduler.schedule("org1", "user1", expires_in=200)
+        await scheduler.schedule("org2", "user2", expires_in=30)
+
+        await scheduler.run_once()
+
+        self.assertEqual(await self.redis.zrange(scheduler.schedule_key, 0, -1), ["org1:user1"])
+
+
+class TestSingleFlight(unittest.IsolatedAsyncioTestCase):
+    async def test_waiters_share_the_leaders_error(self):
+        flight = SingleFlight()
+        calls = 0
+
+        async def failing():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            raise RuntimeError("refresh failed")
+
+        results = await asyncio.gather(*(flight.do("key", failing) for _ in range(10)), return_exceptions=True)
+
+        self.assertEqual(calls, 1)
+        self.assertTrue(all(isinstance(result, RuntimeError) for result in results))
+        self.assertFalse(flight.in_flight("key"))
+
+    async def test_cancelling_the_leader_leaves_waiters_their_result(self):
+        flight = SingleFlight()
+        release = asyncio.Event()
+
+        async def refresh():
+            await release.wait()
+            return "token"
+
+        leader = asyncio.create_task(flight.do("key", refresh))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(flight.do("key", refresh))
+        await asyncio.sleep(0)
+        leader.cancel()
+        await asyncio.sleep(0)
+        release.set()
+
+        self.assertEqual(await waiter, "token")
+        with self.assertRaises(asyncio.CancelledError):
+            await leader
+        self.assertFalse(flight.in_flight("key"))
+
+
+if __name__ == "__main__":
+    unittest.main()
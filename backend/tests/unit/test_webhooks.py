@@ -0,0 +1,201 @@
+import base64
+import hashlib
+import hmac
+import json
+import os
+import time
+import unittest
+from unittest.mock import patch
+
+import fakeredis
+import httpx
+from fastapi import FastAPI, HTTPException
+
+os.environ.setdefault("HUBSPOT_CLIENT_ID", "test_client_id")
+os.environ.setdefault("HUBSPOT_CLIENT_SECRET", "test_client_secret")
+os.environ.setdefault("HUBSPOT_CALLBACK_ENDPOINT", "http://localhost:8000/v1/hubspot/oauth2/callback")
+
+from config.constants import HUBSPOT_CONSTS
+from controllers import hubspot as hubspot_controller
+from services.integrations import hubspot
+from services.integrations.hubspot import HubspotService, get_hubspot_service
+from utils.cache.items_cache import CachedItems
+
+PORTAL_ID = 62515
+ORG_ID = "org123"
+USER_ID = "user456"
+WEBHOOK_URL = "http://testserver/v1/hubspot/webhooks"
+
+
+def _sign(body: bytes, timestamp: str, url: str = WEBHOOK_URL, method: str = "POST") -> str:
+    message = method.encode() + url.encode() + body + timestamp.encode()
+    digest = hmac.new(os.environ["HUBSPOT_CLIENT_SECRET"].encode(), message, hashlib.sha256).digest()
+    return base64.b64encode(digest).decode()
+
+
+def _event(subscription_type: str, object_id: int, occurred_at: int = 1, **extra) -> dict:
+    return {"subscriptionType": subscription_type, "objectId": object_id, "portalId": PORTAL_ID,
+            "occurredAt": occurred_at, **extra}
+
+
+class FakeCrm:
+    def __init__(self):
+        self.contacts = {"1": "Ada", "2": "Grace", "3": "Alan"}
+        self.batch_reads = []
+
+    async def fetch(self, method, url, params=None, body=None, headers=None, **kwargs):
+        assert url == HUBSPOT_CONSTS.CONTACTS_BATCH_READ_API_URL
+        ids = [entry["id"] for entry in body["inputs"]]
+        self.batch_reads.append(ids)
+        return {"results": [
+            {"id": contact_id, "properties": {"firstname": self.contacts[contact_id]}}
+            for contact_id in ids if contact_id in self.contacts
+        ]}
+
+
+class WebhookTestCase(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+        self.crm = FakeCrm()
+        patches = [
+            patch.object(hubspot, "fetch", self.crm.fetch),
+            patch.object(hubspot.redis_client, "redis_client", self.redis),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+        self.service = HubspotService()
+        key_namer = hubspot.redis_client.KeyNamer
+        await self.redis.set(
+            key_namer.get_access_token_key(ORG_ID, USER_ID, HUBSPOT_CONSTS.INTEGRATION_NAME), "access_token"
+        )
+        await self.redis.sadd(
+            key_namer.get_account_tenants_key(str(PORTAL_ID), HUBSPOT_CONSTS.INTEGRATION_NAME), f"{ORG_ID}:{USER_ID}"
+        )
+
+
+class TestWebhookSignature(WebhookTestCase):
+
+    def test_valid_signature_is_accepted(self):
+        body, timestamp = b'[{"objectId": 1}]', str(int(time.time() * 1000))
+        self.service.verify_webhook_signature("POST", WEBHOOK_URL, body, timestamp, _sign(body, timestamp))
+
+    def test_tampered_body_is_rejected(self):
+        body, timestamp = b'[{"objectId": 1}]', str(int(time.time() * 1000))
+        with self.assertRaises(HTTPException) as raised:
+            self.service.verify_webhook_signature("POST", WEBHOOK_URL, b"[]", timestamp, _sign(body, timestamp))
+        self.assertEqual(raised.exception.status_code, 401)
+
+    def test_replayed_delivery_is_rejected(self):
+        body, timestamp = b"[]", str(int((time.time() - 600) * 1000))
+        with self.assertRaises(HTTPException):
+            self.service.verify_webhook_signature("POST", WEBHOOK_URL, body, timestamp, _sign(body, timestamp))
+
+    def test_non_ascii_signature_is_rejected(self):
+        timestamp = str(int(time.time() * 1000))
+        with self.assertRaises(HTTPException) as raised:
+            self.service.verify_webhook_signature("POST", WEBHOOK_URL, b"[]", timestamp, "sïgnature")
+        self.assertEqual(raised.exception.status_code, 401)
+
+    def test_url_is_signed_with_reserved_characters_decoded(self):
+        body, timestamp = b"[]", str(int(time.time() * 1000))
+        signature = _sign(body, timestamp, url=f"{WEBHOOK_URL}?portal=a:b")
+        self.service.verify_webhook_signature("POST", f"{WEBHOOK_URL}?portal=a%3Ab", body, timestamp, signature)
+
+
+class TestWebhookProcessing(WebhookTestCase):
+
+    async def test_endpoint_queues_signed_deliveries(self):
+        app = FastAPI()
+        app.include_router(hubspot_controller.router, prefix="/v1/hubspot")
+        body = json.dumps([_event("contact.creation", 1)]).encode()
+        timestamp = str(int(time.time() * 1000))
+
+        app.dependency_overrides[get_hubspot_service] = lambda: self.service
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://testserver") as client:
+            accepted = await client.post("/v1/hubspot/webhooks", content=body, headers={
+                "X-HubSpot-Request-Timestamp": timestamp,
+                "X-HubSpot-Signature-v3": _sign(body, timestamp),
+            })
+            rejected = await client.post("/v1/hubspot/webhooks", content=body, headers={
+                "X-HubSpot-Request-Timestamp": timestamp,
+                "X-HubSpot-Signature-v3": "forged",
+            })
+
+        self.assertEqual((accepted.status_code, rejected.status_code), (204, 401))
+        self.assertEqual(await self.redis.xlen(self.service.webhook_queue.stream_key), 1)
+
+    async def test_events_are_coalesced_and_applied_to_store_and_cache(self):
+        await self.service.items_cache.set(ORG_ID, USER_ID, CachedItems(items=[
+            {"id": "1", "name": "Old"}, {"id": "2", "name": "Grace"},
+        ], fetched_at=time.time()))
+        queue = self.service.webhook_queue
+        await queue.enqueue(json.dumps([
+            _event("contact.propertyChange", 1, 1, propertyName="firstname"),
+            _event("contact.propertyChange", 1, 2, propertyName="lastname"),
+            _event("contact.creation", 3, 1),
+        ]).encode())
+        await queue.enqueue(json.dumps([_event("contact.deletion", 2, 3)]).encode())
+
+        self.assertEqual(await queue.run_once(block_ms=10), 2)
+
+        self.assertEqual(self.crm.batch_reads, [["1", "3"]])
+        self.assertEqual(sorted(await self.service.contact_sync.store.ids(ORG_ID, USER_ID)), ["1", "3"])
+        cached = await self.service.items_cache.get(ORG_ID, USER_ID)
+        self.assertEqual({item["id"]: item["name"] for item in cached.items}, {"1": "Ada", "3": "Alan"})
+        self.assertEqual(await queue.run_once(block_ms=10), 0)
+
+    async def test_contact_recreated_after_deletion_is_kept(self):
+        await self.service.webhook_queue.enqueue(json.dumps([
+            _event("contact.deletion", 1, 1), _event("contact.restore", 1, 2),
+        ]).encode())
+
+        await self.service.webhook_queue.run_once(block_ms=10)
+
+        self.assertEqual(await self.service.contact_sync.store.ids(ORG_ID, USER_ID), ["1"])
+
+    async def test_unacknowledged_batch_is_claimed_by_another_consumer(self):
+        queue = self.service.webhook_queue
+        await queue.enqueue(json.dumps([_event("contact.creation", 1)]).encode())
+        with patch.object(queue, "handle", side_effect=RuntimeError("worker crashed")):
+            with self.assertRaises(RuntimeError):
+                await queue.run_once(block_ms=10)
+
+        other_worker = HubspotService().webhook_queue
+        other_worker.consumer, other_worker.claim_idle_ms = "other", 0
+
+        self.assertEqual(await other_worker.run_once(block_ms=10), 1)
+        self.assertEqual(await self.service.contact_sync.store.ids(ORG_ID, USER_ID), ["1"])
+
+
+    async def test_batch_failing_for_a_tenant_is_retried(self):
+        queue = self.service.webhook_queue
+        queue.claim_idle_ms = 0
+        await queue.enqueue(json.dumps([_event("contact.creation", 1)]).encode())
+        with patch.object(self.service, "_resolve_access_token", side_effect=RuntimeError("token store down")):
+            with self.assertRaises(RuntimeError):
+                await queue.run_once(block_ms=10)
+
+        self.assertEqual(await queue.run_once(block_ms=10), 1)
+
+        self.assertEqual(await self.service.contact_sync.store.ids(ORG_ID, USER_ID), ["1"])
+        self.assertEqual((await self.redis.xpending(queue.stream_key, queue.group))["pending"], 0)
+
+    async def test_batch_that_keeps_failing_is_dead_lettered(self):
+        queue = self.service.webhook_queue
+        queue.claim_idle_ms, queue.max_deliveries = 0, 2
+        await queue.enqueue(json.dumps([_event("contact.creation", 1)]).encode())
+
+        with patch.object(queue, "handle", side_effect=RuntimeError("poison")):
+            for _ in range(queue.max_deliveries):
+                with self.assertRaises(RuntimeError):
+                    await queue.run_once(block_ms=10)
+            self.assertEqual(await queue.run_once(block_ms=10), 0)
+
+        dead = await self.redis.xrange(queue.dead_letter_key)
+        self.assertEqual([json.loads(fields["body"])[0]["objectId"] for _, fields in dead], [1])
+        self.assertEqual((await self.redis.xpending(queue.stream_key, queue.group))["pending"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
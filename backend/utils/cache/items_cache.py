@@ -0,0 +1,161 @@
+import os
+import time
+from typing import Any, Dict, List
+
+from pydantic import BaseModel, Field, ValidationError
+
+from config.logger import get_logger
+from utils.cache.lru import LRUCache
+from utils.metrics.registry import metrics_registry
+from utils.redis.redis_client import redis_client
+
+logger = get_logger(__name__)
+
+ITEMS_CACHE_TTL_SECONDS = int(os.getenv("ITEMS_CACHE_TTL_SECONDS", "3600"))
+ITEMS_CACHE_FRESH_SECONDS = int(os.getenv("ITEMS_CACHE_FRESH_SECONDS", "60"))
+ITEMS_CACHE_MAX_ENTRIES = int(os.getenv("ITEMS_CACHE_MAX_ENTRIES", "1000"))
+ITEMS_CACHE_MAX_ITEMS_PER_ENTRY = int(os.getenv("ITEMS_CACHE_MAX_ITEMS_PER_ENTRY", "50000"))
+ITEMS_CACHE_LOCAL_MAX_ENTRIES = int(os.getenv("ITEMS_CACHE_LOCAL_MAX_ENTRIES", "128"))
+# Items held in the in-process tier across all its entries, so a few large tenants can't fill a worker's memory
+ITEMS_CACHE_LOCAL_MAX_ITEMS = int(os.getenv("ITEMS_CACHE_LOCAL_MAX_ITEMS", "100000"))
+ITEMS_CACHE_LOCAL_TTL_SECONDS = float(os.getenv("ITEMS_CACHE_LOCAL_TTL_SECONDS", "10"))
+# Serve stale entries, however old, while the upstream's circuit is open instead of failing the request
+ITEMS_CACHE_SERVE_STALE_WHEN_OPEN = os.getenv("ITEMS_CACHE_SERVE_STALE_WHEN_OPEN", "true").lower() == "true"
+
+
+class CachedItems(BaseModel):
+    items: List[Dict[str, Any]] = Field(..., description="Serialized integration items, in upstream order")
+    fetched_at: float = Field(..., description="Unix time the items were last fetched or revalidated")
+
+    def is_fresh(self, fresh_seconds: float) -> bool:
+        return time.time() - self.fetched_at < fresh_seconds
+
+
+class CacheStats:
+    def __init__(self) -> None:
+        self.local_hits = 0
+        self.remote_hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.evictions = 0
+        self.stale_served = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        hits = self.local_hits + self.remote_hits
+        lookups = hits + self.misses
+        return {
+            "local_hits": self.local_hits,
+            "remote_hits": self.remote_hits,
+            "misses": self.misses,
+            "revalidations": self.revalidations,
+            "evictions": self.evictions,
+            "stale_served": self.stale_served,
+            "hit_rate": hits / lookups if lookups else 0.0,
+        }
+
+
+class ItemsCache:
+    """
+    Read-through cache of a tenant's integration items: an in-process LRU, bounded by entries and by
+    total items, in front of Redis.
+    Redis entries expire after `ttl_seconds`; an index sorted set caps the number of cached tenants.
+    Entries older than `fresh_seconds` are still returned so callers can revalidate them incrementally.
+    """
+
+    def __init__(
+        self,
+        integration_name: str,
+        ttl_seconds: int = ITEMS_CACHE_TTL_SECONDS,
+        fresh_seconds: int = ITEMS_CACHE_FRESH_SECONDS,
+        max_entries: int = ITEMS_CACHE_MAX_ENTRIES,
+        max_items_per_entry: int = ITEMS_CACHE_MAX_ITEMS_PER_ENTRY,
+        local_max_entries: int = ITEMS_CACHE_LOCAL_MAX_ENTRIES,
+        local_max_items: int = ITEMS_CACHE_LOCAL_MAX_ITEMS,
+        local_ttl_seconds: float = ITEMS_CACHE_LOCAL_TTL_SECONDS,
+        serve_stale_when_open: bool = ITEMS_CACHE_SERVE_STALE_WHEN_OPEN,
+    ) -> None:
+        self.integration_name = integration_name
+        self.ttl_seconds = ttl_seconds
+        self.fresh_seconds = fresh_seconds
+        self.max_entries = max_entries
+        self.max_items_per_entry = max_items_per_entry
+        self.serve_stale_when_open = serve_stale_when_open
+        self.index_key = redis_client.KeyNamer.get_items_cache_index_key(integration_name)
+        self.stats = CacheStats()
+        _items_caches.append(self)
+        self._local: LRUCache[CachedItems] = LRUCache(
+            local_max_entries, local_ttl_seconds, max_weight=local_max_items, weigh=lambda entry: len(entry.items)
+        )
+
+    def _key(self, org_id: str, user_id: str) -> str:
+        return redis_client.KeyNamer.get_items_cache_key(org_id, user_id, self.integration_name)
+
+    async def get(self, org_id: str, user_id: str) -> CachedItems | None:
+        key = self._key(org_id, user_id)
+        entry = self._local.get(key)
+        if entry is not None:
+            self.stats.local_hits += 1
+            return entry
+
+        raw = await redis_client.get_key(key)
+        if raw:
+            try:
+                entry = CachedItems.model_validate_json(raw)
+            except ValidationError:
+                logger.warning("Discarding unreadable items cache entry '%s'.", key)
+                await redis_client.delete_key(key)
+                entry = None
+
+        if entry is None:
+            self.stats.misses += 1
+            return None
+
+        self.stats.remote_hits += 1
+        self._local.set(key, entry)
+        await redis_client.add_to_sorted_set(self.index_key, key, time.time())
+        return entry
+
+    async def set(self, org_id: str, user_id: str, entry: CachedItems) -> None:
+        if len(entry.items) > self.max_items_per_entry:
+            return
+        key = self._key(org_id, user_id)
+        self._local.set(key, entry)
+        async with redis_client.pipeline(transaction=False) as pipe:
+            pipe.set(key, entry.model_dump_json(), ex=self.ttl_seconds)
+            pipe.zadd(self.index_key, {key: time.time()})
+            pipe.zcard(self.index_key)
+            *_, cached_entries = await pipe.execute()
+        await self._evict_overflow(cached_entries)
+
+    async def invalidate(self, org_id: str, user_id: str) -> None:
+        key = self._key(org_id, user_id)
+        self._local.delete(key)
+        await redis_client.delete_key(key)
+
+    async def _evict_overflow(self, cached_entries: int) -> None:
+        overflow = cached_entries - self.max_entries
+        if overflow <= 0:
+            return
+        evicted = [key for key, _ in await redis_client.pop_min_from_sorted_set(self.index_key, overflow)]
+        for key in evicted:
+            self._local.delete(key)
+        await redis_client.delete_keys(*evicted)
+        self.stats.evictions += len(evicted)
+
+
+_items_caches: List[ItemsCache] = []
+
+
+def _collect_cache_stats():
+    for cache in _items_caches:
+        for event, value in cache.stats.as_dict().items():
+            if event != "hit_rate":
+                yield (cache.integration_name, event), value
+
+
+metrics_registry.gauge(
+    "items_cache_events",
+    "Cumulative items cache lookups and maintenance events per integration.",
+    _collect_cache_stats,
+    ("integration", "event"),
+)
@@ -0,0 +1,61 @@
+import time
+from collections import OrderedDict
+from typing import Callable, Generic, Hashable, Optional, Tuple, TypeVar
+
+V = TypeVar("V")
+
+
+class LRUCache(Generic[V]):
+    """
+    Small in-process LRU with a per-entry TTL, used as a first tier in front of Redis.
+    With `max_weight`, the summed `weigh(value)` of the entries is capped too, and a value heavier than
+    the whole budget is not kept at all.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: float,
+        max_weight: float = float("inf"),
+        weigh: Callable[[V], float] = lambda value: 1,
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_weight = max_weight
+        self.weigh = weigh
+        self.weight = 0.0
+        self._entries: "OrderedDict[Hashable, Tuple[float, V, float]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[V]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value, _ = entry
+        if expires_at < time.monotonic():
+            self.delete(key)
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: V) -> None:
+        self.delete(key)
+        weight = self.weigh(value)
+        if self.max_entries <= 0 or weight > self.max_weight:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value, weight)
+        self.weight += weight
+        while len(self._entries) > self.max_entries or self.weight > self.max_weight:
+            _, (_, _, evicted_weight) = self._entries.popitem(last=False)
+            self.weight -= evicted_weight
+
+    def delete(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.weight -= entry[2]
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.weight = 0.0
@@ -0,0 +1,33 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Generic, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight(Generic[T]):
+    """
+    Coalesces concurrent calls that share a key into a single execution.
+    The first caller starts `fn` in a task of its own; it and everyone arriving while that task is in flight
+    await the same result or error. Cancelling any caller, the first one included, only stops that caller
+    from waiting, so one disconnected client cannot fail the calls coalesced with it.
+    """
+
+    def __init__(self) -> None:
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    def in_flight(self, key: str) -> bool:
+        return key in self._inflight
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(task)
+
+    def _finish(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # every caller may be gone by the time it fails; don't warn about an unretrieved error
+        task.cancelled() or task.exception()
@@ -2,11 +2,15 @@ from fastapi import Request, HTTPException, status
 from fastapi import status
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
-from config.logger import logger
+from config.logger import get_logger
+from utils.http.circuit_breaker import CircuitOpenError
+from utils.http.rate_limiter import RateLimitExceeded
+
+logger = get_logger(__name__)
 
 async def http_exception_handler(req: Request, exc: HTTPException):
     
-    logger.info(f"{exc.status_code} - {exc.detail} - Path: {req.url.path}")
+    logger.info("%s - %s - Path: %s", exc.status_code, exc.detail, req.url.path)
 
     return JSONResponse(
         status_code=exc.status_code,
@@ -18,7 +22,7 @@ async def http_exception_handler(req: Request, exc: HTTPException):
     )
 
 async def Request_validation_error(req: Request, exc: RequestValidationError):
-    logger.info(f"Validation error: {exc.errors()} - Path: {req.url.path}")
+    logger.info("Validation error: %s - Path: %s", exc.errors(), req.url.path)
     return JSONResponse(
         status_code= status.HTTP_422_UNPROCESSABLE_ENTITY,
         content={
@@ -29,9 +33,37 @@ async def Request_validation_error(req: Request, exc: RequestValidationError):
     )
     
     
+async def rate_limit_exceeded_handler(req: Request, exc: RateLimitExceeded):
+    logger.warning("%s - Path: %s", exc, req.url.path)
+    return JSONResponse(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        content={
+            "error": "RateLimitExceeded",
+            "detail": f"{exc.integration_name} is rate limiting requests, please retry later.",
+            "path": req.url.path
+        },
+        headers={"Retry-After": str(max(1, round(exc.retry_after)))},
+    )
+
+
+async def circuit_open_handler(req: Request, exc: CircuitOpenError):
+    logger.warning("%s - Path: %s", exc, req.url.path)
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={
+            "error": "CircuitOpen",
+            "detail": f"{exc.name} is currently unavailable, please retry later.",
+            "path": req.url.path
+        },
+        headers={"Retry-After": str(max(1, round(exc.retry_after)))},
+    )
+
+
 async def general_exception_handler(request: Request, exc: Exception):
     logger.error(
-        f"An unhandled exception occurred for request: {request.method} {request.url}",
+        "An unhandled exception occurred for request: %s %s",
+        request.method,
+        request.url,
         exc_info=exc 
     )
     return JSONResponse(
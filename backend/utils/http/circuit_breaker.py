@@ -0,0 +1,228 @@
+import os
+import time
+from typing import Dict
+
+from config.logger import get_logger
+from utils.metrics.registry import metrics_registry
+from utils.redis.redis_client import redis_client
+
+logger = get_logger(__name__)
+
+CIRCUIT_BREAKER_FAILURE_RATE = float(os.getenv("CIRCUIT_BREAKER_FAILURE_RATE", "0.5"))
+# Below this many calls in the window the failure rate is too noisy to act on
+CIRCUIT_BREAKER_MINIMUM_CALLS = int(os.getenv("CIRCUIT_BREAKER_MINIMUM_CALLS", "20"))
+CIRCUIT_BREAKER_WINDOW_SECONDS = float(os.getenv("CIRCUIT_BREAKER_WINDOW_SECONDS", "30"))
+CIRCUIT_BREAKER_OPEN_SECONDS = float(os.getenv("CIRCUIT_BREAKER_OPEN_SECONDS", "30"))
+CIRCUIT_BREAKER_HALF_OPEN_PROBES = int(os.getenv("CIRCUIT_BREAKER_HALF_OPEN_PROBES", "3"))
+# How long a worker trusts its last view of a closed circuit before asking Redis again
+CIRCUIT_BREAKER_STATE_CACHE_SECONDS = float(os.getenv("CIRCUIT_BREAKER_STATE_CACHE_SECONDS", "1"))
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+# Admission. ARGV: now (ms), half-open probes, open duration (ms).
+# Returns {state, admitted (0/1), ms until the circuit may admit calls again}.
+_ADMIT_SCRIPT = """
+local key = KEYS[1]
+local now = tonumber(ARGV[1])
+local state = redis.call('HGET', key, 'state') or 'closed'
+if state == 'open' then
+    local opened_until = tonumber(redis.call('HGET', key, 'opened_until'))
+    if now < opened_until then
+        return {'open', 0, opened_until - now}
+    end
+    redis.call('HSET', key, 'state', 'half_open', 'probes', 0, 'probe_successes', 0, 'half_opened_at', now)
+    state = 'half_open'
+end
+if state == 'half_open' then
+    if redis.call('HINCRBY', key, 'probes', 1) <= tonumber(ARGV[2]) then
+        return {'half_open', 1, 0}
+    end
+    -- probes that never reported back (e.g. cancelled) must not wedge the circuit half-open
+    if now - tonumber(redis.call('HGET', key, 'half_opened_at')) > tonumber(ARGV[3]) then
+        redis.call('HSET', key, 'probes', 1, 'probe_successes', 0, 'half_opened_at', now)
+        return {'half_open', 1, 0}
+    end
+    return {'half_open', 0, tonumber(ARGV[3])}
+end
+return {'closed', 1, 0}
+"""
+
+# Outcome of one call. ARGV: now (ms), success (1/0), bucket (ms), buckets, minimum calls, failure rate,
+# open duration (ms), half-open probes. The window is a ring of per-bucket counters. Returns the new state.
+_RECORD_SCRIPT = """
+local key = KEYS[1]
+local now = tonumber(ARGV[1])
+local success = ARGV[2] == '1'
+local function trip()
+    redis.call('DEL', key)
+    redis.call('HSET', key, 'state', 'open', 'opened_until', now + tonumber(ARGV[7]))
+    return 'open'
+end
+local state = redis.call('HGET', key, 'state') or 'closed'
+if state == 'open' then
+    return 'open'
+end
+if state == 'half_open' then
+    if not success then
+        return trip()
+    end
+    if redis.call('HINCRBY', key, 'probe_successes', 1) >= tonumber(ARGV[8]) then
+        redis.call('DEL', key)
+        return 'closed'
+    end
+    return 'half_open'
+end
+local buckets = tonumber(ARGV[4])
+local bucket = math.floor(now / tonumber(ARGV[3]))
+local slot = bucket % buckets
+if tonumber(redis.call('HGET', key, 'epoch:' .. slot)) ~= bucket then
+    redis.call('HSET', key, 'epoch:' .. slot, bucket, 'calls:' .. slot, 0, 'failures:' .. slot, 0)
+end
+redis.call('HINCRBY', key, 'calls:' .. slot, 1)
+if not success then
+    redis.call('HINCRBY', key, 'failures:' .. slot, 1)
+end
+local calls, failures = 0, 0
+for i = 0, buckets - 1 do
+    local epoch = tonumber(redis.call('HGET', key, 'epoch:' .. i))
+    if epoch and epoch > bucket - buckets then
+        calls = calls + tonumber(redis.call('HGET', key, 'calls:' .. i))
+        failures = failures + tonumber(redis.call('HGET', key, 'failures:' .. i))
+    end
+end
+if calls >= tonumber(ARGV[5]) and failures >= calls * tonumber(ARGV[6]) then
+    return trip()
+end
+return 'closed'
+"""
+
+
+class CircuitOpenError(Exception):
+    """Calls to the upstream are being short-circuited because it has been failing."""
+
+    def __init__(self, name: str, retry_after: float) -> None:
+        super().__init__(f"Circuit for {name} is open, retry in {retry_after:.1f}s")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Failure-rate circuit breaker for one upstream integration, shared by every worker through a Redis hash.
+    Closed: calls flow and outcomes are counted over a sliding window; once at least `minimum_calls` were made
+    and `failure_rate` of them failed, the circuit opens. Open: calls fail fast with CircuitOpenError for
+    `open_seconds`. Half-open: up to `half_open_probes` calls are let through; if they all succeed the circuit
+    closes, the first failure opens it again.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_rate: float = CIRCUIT_BREAKER_FAILURE_RATE,
+        minimum_calls: int = CIRCUIT_BREAKER_MINIMUM_CALLS,
+        window_seconds: float = CIRCUIT_BREAKER_WINDOW_SECONDS,
+        open_seconds: float = CIRCUIT_BREAKER_OPEN_SECONDS,
+        half_open_probes: int = CIRCUIT_BREAKER_HALF_OPEN_PROBES,
+        state_cache_seconds: float = CIRCUIT_BREAKER_STATE_CACHE_SECONDS,
+        window_buckets: int = 10,
+    ) -> None:
+        self.name = name
+        self.failure_rate = failure_rate
+        self.minimum_calls = minimum_calls
+        self.window_seconds = window_seconds
+        self.window_buckets = window_buckets
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self.state_cache_seconds = state_cache_seconds
+        self.key = redis_client.KeyNamer.get_circuit_breaker_key(name)
+        self.state = CLOSED
+        self._state_seen_at = float("-inf")
+        circuit_breakers[name] = self
+
+    def _remember(self, state: str) -> None:
+        if state != self.state:
+            logger.warning("Circuit for %s changed from %s to %s.", self.name, self.state, state)
+        self.state = state
+        self._state_seen_at = time.monotonic()
+
+    async def before_call(self) -> None:
+        """Raises CircuitOpenError unless the call may go ahead."""
+        if self.state == CLOSED and time.monotonic() - self._state_seen_at < self.state_cache_seconds:
+            return
+        state, admitted, retry_after_ms = await redis_client.run_script(
+            _ADMIT_SCRIPT,
+            [self.key],
+            [int(time.time() * 1000), self.half_open_probes, int(self.open_seconds * 1000)],
+        )
+        self._remember(state)
+        if not admitted:
+            CIRCUIT_REJECTIONS.inc(self.name)
+            raise CircuitOpenError(self.name, retry_after_ms / 1000)
+
+    async def record(self, success: bool) -> None:
+        state = await redis_client.run_script(
+            _RECORD_SCRIPT,
+            [self.key],
+            [
+                int(time.time() * 1000),
+                1 if success else 0,
+                max(1, int(self.window_seconds * 1000 / self.window_buckets)),
+                self.window_buckets,
+                self.minimum_calls,
+                self.failure_rate,
+                int(self.open_seconds * 1000),
+                self.half_open_probes,
+            ],
+        )
+        self._remember(state)
+
+    async def snapshot(self) -> dict:
+        """Shared state as every worker sees it, for the admin API."""
+        fields = await redis_client.get_hash(self.key)
+        state = fields.get("state", CLOSED)
+        calls = failures = 0
+        bucket = int(time.time() * 1000 / max(1, int(self.window_seconds * 1000 / self.window_buckets)))
+        for slot in range(self.window_buckets):
+            epoch = fields.get(f"epoch:{slot}")
+            if epoch is not None and int(epoch) > bucket - self.window_buckets:
+                calls += int(fields[f"calls:{slot}"])
+                failures += int(fields[f"failures:{slot}"])
+        opened_until = fields.get("opened_until")
+        return {
+            "name": self.name,
+            "state": state,
+            "window_calls": calls,
+            "window_failures": failures,
+            "retry_after_seconds": (
+                max(0.0, (float(opened_until) - time.time() * 1000) / 1000) if state == OPEN and opened_until else 0.0
+            ),
+        }
+
+    async def reset(self) -> None:
+        """Force the circuit closed with an empty window, e.g. after an upstream incident is resolved."""
+        await redis_client.delete_key(self.key)
+        self._remember(CLOSED)
+
+
+circuit_breakers: Dict[str, CircuitBreaker] = {}
+
+CIRCUIT_REJECTIONS = metrics_registry.counter(
+    "circuit_breaker_rejections",
+    "Calls failed fast because the upstream's circuit was open.",
+    ("integration",),
+)
+
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+def _collect_states():
+    for breaker in circuit_breakers.values():
+        yield (breaker.name,), _STATE_VALUES[breaker.state]
+
+
+metrics_registry.gauge(
+    "circuit_breaker_state",
+    "Last circuit state this worker saw: 0 closed, 1 half-open, 2 open.",
+    _collect_states,
+    ("integration",),
+)
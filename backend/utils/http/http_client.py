@@ -1,8 +1,98 @@
+import asyncio
+import importlib.util
+import os
+import time
 import httpx # type: ignore
-from typing import Optional, Dict, Any
-from config.logger import logger
+from typing import Any, Awaitable, Callable, Dict, Optional
+from config.logger import get_logger
 from config.constants import HTTP_METHODS, HTTP_CONTENT_TYPE
-from urllib.parse import urlencode
+from urllib.parse import urlencode, urlsplit
+from utils.http.circuit_breaker import CircuitBreaker
+from utils.http.rate_limiter import RateLimitBucket
+from utils.http.retry import IDEMPOTENT_METHODS, RetryPolicy, default_retry_policy, retry_after_seconds
+from utils.metrics.registry import metrics_registry
+
+logger = get_logger(__name__)
+
+OUTBOUND_LATENCY = metrics_registry.histogram(
+    "http_client_request_duration_seconds",
+    "Outbound request latency per upstream host.",
+    ("upstream", "method", "status"),
+)
+OUTBOUND_REQUESTS = metrics_registry.counter(
+    "http_client_requests",
+    "Outbound requests per upstream host and status; status is 'error' when no response arrived.",
+    ("upstream", "method", "status"),
+)
+OUTBOUND_RETRIES = metrics_registry.counter(
+    "http_client_retries",
+    "Outbound requests resent after a transient failure, by upstream host and the status or error that caused it.",
+    ("upstream", "reason"),
+)
+OUTBOUND_HEDGES = metrics_registry.counter(
+    "http_client_hedges",
+    "Second copies of slow idempotent requests sent per upstream host.",
+    ("upstream",),
+)
+
+HTTP_MAX_CONNECTIONS_PER_HOST = int(os.getenv("HTTP_MAX_CONNECTIONS_PER_HOST", "50"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+HTTP_KEEPALIVE_EXPIRY_SECONDS = float(os.getenv("HTTP_KEEPALIVE_EXPIRY_SECONDS", "30"))
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "true").lower() == "true"
+
+
+class HttpClientRegistry:
+    """
+    Keeps one pooled httpx.AsyncClient per upstream origin for the lifetime of the app,
+    so outbound calls reuse warm keep-alive connections instead of paying a new TCP+TLS handshake.
+    """
+
+    def __init__(
+        self,
+        max_connections_per_host: int = HTTP_MAX_CONNECTIONS_PER_HOST,
+        max_keepalive_connections: int = HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry: float = HTTP_KEEPALIVE_EXPIRY_SECONDS,
+        http2: bool = HTTP2_ENABLED,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ) -> None:
+        self.limits = httpx.Limits(
+            max_connections=max_connections_per_host,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        # HTTP/2 needs the optional `h2` package; fall back to HTTP/1.1 keep-alive without it
+        self.http2 = http2 and importlib.util.find_spec("h2") is not None
+        self.transport = transport
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._started = False
+
+    @property
+    def is_started(self) -> bool:
+        return self._started
+
+    def start(self) -> None:
+        self._started = True
+        logger.info("HTTP client registry started (http2=%s).", self.http2)
+
+    async def aclose(self) -> None:
+        clients, self._clients = self._clients, {}
+        self._started = False
+        for client in clients.values():
+            await client.aclose()
+        logger.info("HTTP client registry closed %d client(s).", len(clients))
+
+    def get_client(self, url: str) -> httpx.AsyncClient:
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        client = self._clients.get(origin)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(limits=self.limits, http2=self.http2, transport=self.transport)
+            self._clients[origin] = client
+        return client
+
+
+http_client_registry = HttpClientRegistry()
+
 
 async def fetch(
     method: HTTP_METHODS,
@@ -12,36 +102,195 @@ async def fetch(
     headers: Optional[Dict[str, str]] = None,
     timeout: int = 10,
     content_type: HTTP_CONTENT_TYPE = HTTP_CONTENT_TYPE.JSON,
+    rate_limit: Optional[RateLimitBucket] = None,
+    idempotent: Optional[bool] = None,
+    hedge: bool = False,
+    retry_policy: Optional[RetryPolicy] = None,
+    circuit_breaker: Optional[CircuitBreaker] = None,
+    log_url: Optional[str] = None,
 ):
-    logger.info(f"Out call {method} {url}")
-    try:
-        
-        headers = {**(headers or {}), "content-type": content_type.value}
-        
-        payload = {"data": body}
-        if content_type == HTTP_CONTENT_TYPE.JSON:
-            payload = {"json": body}
-        
-        async with httpx.AsyncClient(timeout=timeout) as client:
-            response = await client.request(
-                method=method.value,
-                url=url,
-                params=params,
-                **payload,
-                headers=headers,
+    """
+    Sends a request and returns the decoded JSON body. `timeout` bounds each attempt; the policy's deadline bounds
+    the whole call. Transient failures are retried per `retry_policy`; `idempotent` overrides the method's default,
+    e.g. for read-only POST searches. With `hedge`, a slow idempotent request gets a second copy once it outlives
+    the upstream's recent p95, and whichever answers first wins.
+    With `rate_limit`, each attempt waits for a slot in the tenant's upstream quota first, feeds the response's
+    quota headers back into it, and a 429 becomes RateLimitExceeded.
+    With `circuit_breaker`, each attempt's outcome is counted against the upstream, and while its circuit is open
+    the call fails fast with CircuitOpenError instead of waiting out timeouts.
+    With `log_url`, for URLs that carry a secret, logs and raised errors show it instead of `url`.
+    """
+    shown_url = log_url or url
+    logger.debug("Out call %s %s", method.value, shown_url)
+    policy = retry_policy or default_retry_policy
+    if idempotent is None:
+        idempotent = method in IDEMPOTENT_METHODS
+    upstream = urlsplit(url).netloc
+
+    headers = {**(headers or {}), "content-type": content_type.value}
+
+    payload = {"data": body}
+    if content_type == HTTP_CONTENT_TYPE.JSON:
+        payload = {"json": body}
+
+    request_kwargs = dict(
+        method=method.value,
+        url=url,
+        params=params,
+        **payload,
+        headers=headers,
+    )
+
+    deadline = time.monotonic() + policy.deadline_seconds
+    policy.budget.deposit(upstream)
+
+    async def send() -> httpx.Response:
+        remaining = deadline - time.monotonic()
+        try:
+            # httpx timeouts apply per phase, so enforce the overall deadline around the whole attempt
+            return await asyncio.wait_for(
+                _send(upstream, request_kwargs, min(timeout, remaining), rate_limit, policy, circuit_breaker),
+                max(remaining, 0),
             )
+        except asyncio.TimeoutError:
+            if circuit_breaker is not None:
+                await circuit_breaker.record(success=False)
+            raise httpx.TimeoutException(f"Deadline exceeded for {method.value} {shown_url}")
+
+    def can_retry(attempt: int, delay: float) -> bool:
+        return (
+            attempt < policy.max_attempts
+            and time.monotonic() + delay < deadline
+            and policy.budget.try_spend(upstream)
+        )
+
+    hedge_delay = policy.hedge_delay(upstream) if hedge and idempotent else None
+    attempt = 1
+    while True:
+        try:
+            if hedge_delay is None:
+                response = await send()
+            else:
+                response = await _send_hedged(send, hedge_delay, upstream, policy)
+        except httpx.RequestError as e:
+            _redact(e, url, log_url)
+            delay = policy.backoff(attempt)
+            if policy.should_retry_error(e, idempotent) and can_retry(attempt, delay):
+                logger.warning("Retrying %s %s in %.2fs after request error: %s", method.value, shown_url, delay, e)
+                OUTBOUND_RETRIES.inc(upstream, "error")
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+            logger.error("Request error while requesting %s: %s", shown_url, e)
+            raise
+
+        if rate_limit is not None and response.status_code == 429:
+            raise rate_limit.exceeded(response)
+        if policy.should_retry_response(response, idempotent):
+            delay = max(policy.backoff(attempt), retry_after_seconds(response) or 0.0)
+            if can_retry(attempt, delay):
+                logger.warning(
+                    "Retrying %s %s in %.2fs after HTTP %s.", method.value, shown_url, delay, response.status_code
+                )
+                OUTBOUND_RETRIES.inc(upstream, str(response.status_code))
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+
+        try:
             response.raise_for_status()
-            return response.json()
+        except httpx.HTTPStatusError as e:
+            _redact(e, url, log_url)
+            logger.error("HTTP error %s while requesting %s: %s", e.response.status_code, shown_url, e)
+            raise
+        return response.json()
+
+
+def _redact(error: Exception, url: str, log_url: Optional[str]) -> None:
+    """Swaps `url` for `log_url` in the error's message, which httpx builds from the full request URL."""
+    if log_url is not None:
+        error.args = tuple(arg.replace(url, log_url) if isinstance(arg, str) else arg for arg in error.args)
+
+
+async def _send(
+    upstream: str,
+    request_kwargs: Dict[str, Any],
+    timeout: float,
+    rate_limit: Optional[RateLimitBucket],
+    policy: RetryPolicy,
+    circuit_breaker: Optional[CircuitBreaker] = None,
+) -> httpx.Response:
+    """One attempt: checks the circuit, waits for the rate limit, sends, and records latency and outcome."""
+    if circuit_breaker is not None:
+        await circuit_breaker.before_call()
+    if rate_limit is not None:
+        await rate_limit.acquire()
 
-    except httpx.HTTPStatusError as e:
-        logger.error(f"HTTP error {e.response.status_code} while requesting {url}: {e}")
+    status = "error"
+    started = time.perf_counter()
+    try:
+        if http_client_registry.is_started:
+            response = await http_client_registry.get_client(request_kwargs["url"]).request(
+                **request_kwargs, timeout=timeout
+            )
+        else:
+            # No app lifespan (scripts, tests): fall back to a short-lived client
+            async with httpx.AsyncClient() as client:
+                response = await client.request(**request_kwargs, timeout=timeout)
+        status = str(response.status_code)
+    except asyncio.CancelledError:
+        # e.g. the losing copy of a hedged request; nothing went wrong upstream
+        status = "cancelled"
         raise
-    except httpx.RequestError as e:
-        logger.error(f"Request error while requesting {url}: {e}")
+    except Exception:
+        if circuit_breaker is not None:
+            await circuit_breaker.record(success=False)
         raise
+    finally:
+        elapsed = time.perf_counter() - started
+        OUTBOUND_LATENCY.observe(elapsed, upstream, request_kwargs["method"], status)
+        OUTBOUND_REQUESTS.inc(upstream, request_kwargs["method"], status)
+
+    if response.is_success:
+        policy.latencies.record(upstream, elapsed)
+    if circuit_breaker is not None:
+        # 4xx are the caller's problem, not a sign the upstream is unhealthy
+        await circuit_breaker.record(success=response.status_code < 500)
+    if rate_limit is not None:
+        await rate_limit.observe(response)
+    return response
+
+
+async def _send_hedged(
+    send: Callable[[], Awaitable[httpx.Response]],
+    hedge_delay: float,
+    upstream: str,
+    policy: RetryPolicy,
+) -> httpx.Response:
+    """Starts a second copy of the request if the first is slower than `hedge_delay`; the first answer wins."""
+    first = asyncio.ensure_future(send())
+    done, _ = await asyncio.wait({first}, timeout=hedge_delay)
+    if done or not policy.budget.try_spend(upstream):
+        return await first
+
+    OUTBOUND_HEDGES.inc(upstream)
+    pending = {first, asyncio.ensure_future(send())}
+    error: BaseException | None = None
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
+
 
 def build_url_with_params(url: str, params: dict) -> str:
     if not params:
         return url
     query_string = urlencode(params)
-    return f"{url}?{query_string}"
\ No newline at end of file
+    return f"{url}?{query_string}"
\ No newline at end of file
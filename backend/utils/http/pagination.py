@@ -0,0 +1,94 @@
+import asyncio
+from contextlib import suppress
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, TypeVar
+
+T = TypeVar("T")
+
+_DONE = object()
+
+
+class _ProducerError:
+    def __init__(self, error: Exception) -> None:
+        self.error = error
+
+
+async def paginate_cursor(
+    fetch_page: Callable[[Optional[str]], Awaitable[Dict[str, Any]]],
+    next_cursor: Callable[[Dict[str, Any]], Optional[str]],
+    first_page: Optional[Dict[str, Any]] = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Yields pages by following a cursor until the upstream stops returning one.
+    `first_page` lets callers fetch the first page eagerly (e.g. to surface auth errors) and hand it over.
+    """
+    page = first_page if first_page is not None else await fetch_page(None)
+    while True:
+        yield page
+        cursor = next_cursor(page)
+        if not cursor:
+            return
+        page = await fetch_page(cursor)
+
+
+async def merge(*sources: AsyncIterator[T]) -> AsyncIterator[T]:
+    """
+    Drives every source from its own task and yields their items as they arrive, so independent walks, such as
+    one cursor per search filter, run concurrently. The first error raised by a source cancels the others.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, len(sources)))
+
+    async def produce(source: AsyncIterator[T]) -> None:
+        try:
+            async for item in source:
+                await queue.put(item)
+        except Exception as e:
+            await queue.put(_ProducerError(e))
+        else:
+            await queue.put(_DONE)
+
+    producers = [asyncio.create_task(produce(source)) for source in sources]
+    try:
+        running = len(producers)
+        while running:
+            item = await queue.get()
+            if item is _DONE:
+                running -= 1
+                continue
+            if isinstance(item, _ProducerError):
+                raise item.error
+            yield item
+    finally:
+        for producer in producers:
+            producer.cancel()
+        await asyncio.gather(*producers, return_exceptions=True)
+
+
+async def prefetch(source: AsyncIterator[T], depth: int) -> AsyncIterator[T]:
+    """
+    Drives `source` from a background task, keeping at most `depth` items buffered ahead of the consumer,
+    so the next upstream call overlaps with processing the current page without unbounded memory.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=depth)
+
+    async def produce() -> None:
+        try:
+            async for item in source:
+                await queue.put(item)
+        except Exception as e:
+            await queue.put(_ProducerError(e))
+        else:
+            await queue.put(_DONE)
+
+    producer = asyncio.create_task(produce())
+    try:
+        while True:
+            item = await queue.get()
+            if item is _DONE:
+                return
+            if isinstance(item, _ProducerError):
+                raise item.error
+            yield item
+    finally:
+        producer.cancel()
+        with suppress(asyncio.CancelledError):
+            await producer
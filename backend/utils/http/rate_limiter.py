@@ -0,0 +1,222 @@
+import asyncio
+import datetime
+import os
+import random
+import secrets
+import time
+from enum import Enum
+from typing import Optional, Tuple
+
+import httpx # type: ignore
+
+from config.logger import get_logger
+from utils.cache.lru import LRUCache
+from utils.http.retry import retry_after_seconds
+from utils.metrics.registry import metrics_registry
+from utils.redis.redis_client import redis_client
+
+logger = get_logger(__name__)
+
+RATE_LIMIT_WAIT = metrics_registry.histogram(
+    "rate_limiter_wait_seconds",
+    "Time outbound calls spent waiting for a rate limit slot.",
+    ("integration", "priority"),
+)
+RATE_LIMIT_HITS = metrics_registry.counter(
+    "rate_limiter_upstream_429",
+    "Responses the upstream rejected with 429 despite the limiter.",
+    ("integration",),
+)
+
+# Fallback quota until the upstream's rate limit headers have been seen for a tenant
+RATE_LIMIT_MAX_REQUESTS = int(os.getenv("RATE_LIMIT_MAX_REQUESTS", "100"))
+RATE_LIMIT_INTERVAL_SECONDS = float(os.getenv("RATE_LIMIT_INTERVAL_SECONDS", "10"))
+# Share of the quota left unused, for other clients of the same account and clock skew between workers
+RATE_LIMIT_HEADROOM = float(os.getenv("RATE_LIMIT_HEADROOM", "0.1"))
+# Share of the quota only interactive calls may spend, so background work can't starve user requests
+RATE_LIMIT_BACKGROUND_RESERVE = float(os.getenv("RATE_LIMIT_BACKGROUND_RESERVE", "0.3"))
+RATE_LIMIT_MAX_WAIT_SECONDS = float(os.getenv("RATE_LIMIT_MAX_WAIT_SECONDS", "30"))
+RATE_LIMIT_QUOTA_CACHE_ENTRIES = int(os.getenv("RATE_LIMIT_QUOTA_CACHE_ENTRIES", "10000"))
+
+# Sliding window log in a sorted set scored by send time (ms). ARGV: now, interval, limit, member.
+# Returns 0 once a slot was taken, otherwise the milliseconds until one frees up.
+_ACQUIRE_SCRIPT = """
+local now = tonumber(ARGV[1])
+local interval = tonumber(ARGV[2])
+local limit = tonumber(ARGV[3])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - interval)
+local count = redis.call('ZCARD', KEYS[1])
+if count < limit then
+    redis.call('ZADD', KEYS[1], now, ARGV[4])
+    local newest = redis.call('ZRANGE', KEYS[1], -1, -1, 'WITHSCORES')
+    redis.call('PEXPIRE', KEYS[1], math.max(1, tonumber(newest[2]) + interval - now))
+    return 0
+end
+local blocker = redis.call('ZRANGE', KEYS[1], count - limit, count - limit, 'WITHSCORES')
+return math.max(1, math.ceil(tonumber(blocker[2]) + interval - now))
+"""
+
+# Reconciles the window with the upstream's view. ARGV: now, interval, limit, remaining (calls the upstream
+# still accepts, or ''), blocked_until (ms, or ''), nonce.
+_OBSERVE_SCRIPT = """
+local now = tonumber(ARGV[1])
+local interval = tonumber(ARGV[2])
+local limit = tonumber(ARGV[3])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - interval)
+if ARGV[5] ~= '' then
+    -- fill the window with entries that only leave it once the upstream block is over
+    local score = tonumber(ARGV[5]) - interval
+    for i = 1, limit do
+        redis.call('ZADD', KEYS[1], 'GT', score, 'blocked:' .. i)
+    end
+elseif ARGV[4] ~= '' then
+    local missing = (limit - redis.call('ZCARD', KEYS[1])) - tonumber(ARGV[4])
+    for i = 1, missing do
+        redis.call('ZADD', KEYS[1], now, 'sync:' .. ARGV[6] .. ':' .. i)
+    end
+end
+local newest = redis.call('ZRANGE', KEYS[1], -1, -1, 'WITHSCORES')
+if newest[2] then
+    redis.call('PEXPIRE', KEYS[1], math.max(1, tonumber(newest[2]) + interval - now))
+end
+return 0
+"""
+
+
+class Priority(Enum):
+    INTERACTIVE = "interactive"
+    BACKGROUND = "background"
+
+
+class RateLimitExceeded(Exception):
+    """The upstream quota is exhausted for longer than the caller is willing to wait."""
+
+    def __init__(self, integration_name: str, retry_after: float) -> None:
+        super().__init__(f"{integration_name} rate limit reached, retry in {retry_after:.1f}s")
+        self.integration_name = integration_name
+        self.retry_after = retry_after
+
+
+class RateLimiter:
+    """
+    Per-tenant outbound rate limiter shared by every worker through Redis.
+    Each tenant has a sliding window of send times; a call waits until the window has room. The window size
+    follows the upstream's X-HubSpot-RateLimit-* headers, the window is topped up when the upstream reports
+    fewer remaining calls than we think, and a 429's Retry-After blocks the window for every worker.
+    Background calls may only use the quota above `background_reserve`, which keeps interactive calls moving.
+    """
+
+    def __init__(
+        self,
+        integration_name: str,
+        max_requests: int = RATE_LIMIT_MAX_REQUESTS,
+        interval_seconds: float = RATE_LIMIT_INTERVAL_SECONDS,
+        headroom: float = RATE_LIMIT_HEADROOM,
+        background_reserve: float = RATE_LIMIT_BACKGROUND_RESERVE,
+        max_wait_seconds: float = RATE_LIMIT_MAX_WAIT_SECONDS,
+    ) -> None:
+        self.integration_name = integration_name
+        self.default_quota = (max_requests, int(interval_seconds * 1000))
+        self.headroom = headroom
+        self.background_reserve = background_reserve
+        self.max_wait_seconds = max_wait_seconds
+        # quotas learned from response headers; they change rarely, so per-worker copies are enough
+        self._quotas: LRUCache[Tuple[int, int]] = LRUCache(RATE_LIMIT_QUOTA_CACHE_ENTRIES, 3600)
+
+    def bucket(self, org_id: str, user_id: str, priority: Priority = Priority.INTERACTIVE) -> "RateLimitBucket":
+        key = redis_client.KeyNamer.get_rate_limit_key(org_id, user_id, self.integration_name)
+        return RateLimitBucket(self, key, priority)
+
+    def scoped_bucket(self, scope: str, priority: Priority = Priority.INTERACTIVE) -> "RateLimitBucket":
+        """A quota shared by every tenant, for upstreams that also limit per resource, e.g. per Airtable base."""
+        key = redis_client.KeyNamer.get_scoped_rate_limit_key(scope, self.integration_name)
+        return RateLimitBucket(self, key, priority)
+
+    def _window(self, key: str) -> Tuple[int, int, int]:
+        """(upstream max, our limit, interval ms) for a tenant."""
+        max_requests, interval_ms = self._quotas.get(key) or self.default_quota
+        return max_requests, max(1, int(max_requests * (1 - self.headroom))), interval_ms
+
+    async def acquire(self, key: str, priority: Priority) -> None:
+        _, limit, interval_ms = self._window(key)
+        if priority is Priority.BACKGROUND:
+            limit = max(1, int(limit * (1 - self.background_reserve)))
+
+        started = time.monotonic()
+        while True:
+            member = f"{time.time_ns()}:{secrets.token_hex(4)}"
+            wait_ms = await redis_client.run_script(
+                _ACQUIRE_SCRIPT, [key], [int(time.time() * 1000), interval_ms, limit, member]
+            )
+            waited = time.monotonic() - started
+            if not wait_ms:
+                RATE_LIMIT_WAIT.observe(waited, self.integration_name, priority.value)
+                return
+            if waited + wait_ms / 1000 > self.max_wait_seconds:
+                raise RateLimitExceeded(self.integration_name, wait_ms / 1000)
+            # small jitter so waiters across workers don't all retry on the same millisecond
+            await asyncio.sleep(wait_ms / 1000 + random.uniform(0, 0.05))
+
+    def retry_after(self, key: str, response: httpx.Response) -> float:
+        return retry_after_seconds(response) or self._window(key)[2] / 1000
+
+    async def observe(self, key: str, response: httpx.Response) -> None:
+        headers = response.headers
+        max_requests = _int_header(headers, "X-HubSpot-RateLimit-Max")
+        interval_ms = _int_header(headers, "X-HubSpot-RateLimit-Interval-Milliseconds")
+        if max_requests and interval_ms:
+            self._quotas.set(key, (max_requests, interval_ms))
+        _, limit, interval_ms = self._window(key)
+
+        now = time.time()
+        blocked_until: Optional[float] = None
+        if response.status_code == 429:
+            RATE_LIMIT_HITS.inc(self.integration_name)
+            blocked_until = now + self.retry_after(key, response)
+        elif _int_header(headers, "X-HubSpot-RateLimit-Daily-Remaining") == 0:
+            # the daily quota resets at midnight; UTC is the conservative guess without the portal's time zone
+            tomorrow = datetime.datetime.now(datetime.timezone.utc).date() + datetime.timedelta(days=1)
+            blocked_until = datetime.datetime.combine(tomorrow, datetime.time(), datetime.timezone.utc).timestamp()
+            logger.warning("%s daily quota exhausted for %s.", self.integration_name, key)
+
+        # Only top up when the upstream has fewer calls left than our whole window; smaller gaps are in-flight
+        # calls and clock skew, which the headroom already covers
+        remaining = _int_header(headers, "X-HubSpot-RateLimit-Remaining")
+        await redis_client.run_script(
+            _OBSERVE_SCRIPT,
+            [key],
+            [
+                int(now * 1000),
+                interval_ms,
+                limit,
+                "" if remaining is None else remaining,
+                "" if blocked_until is None else int(blocked_until * 1000),
+                secrets.token_hex(4),
+            ],
+        )
+
+
+class RateLimitBucket:
+    """One tenant's quota as seen by one class of callers; pass it to `fetch(rate_limit=...)`."""
+
+    def __init__(self, limiter: RateLimiter, key: str, priority: Priority) -> None:
+        self.limiter = limiter
+        self.key = key
+        self.priority = priority
+
+    async def acquire(self) -> None:
+        await self.limiter.acquire(self.key, self.priority)
+
+    async def observe(self, response: httpx.Response) -> None:
+        await self.limiter.observe(self.key, response)
+
+    def exceeded(self, response: httpx.Response) -> RateLimitExceeded:
+        """The error for a 429 from the upstream, so callers can back off instead of failing with a 500."""
+        return RateLimitExceeded(self.limiter.integration_name, self.limiter.retry_after(self.key, response))
+
+
+def _int_header(headers: httpx.Headers, name: str) -> Optional[int]:
+    try:
+        return int(headers[name])
+    except (KeyError, ValueError):
+        return None
@@ -0,0 +1,126 @@
+import os
+import random
+from collections import deque
+from typing import Deque, Dict, Optional
+
+import httpx # type: ignore
+
+from config.constants import HTTP_METHODS
+
+HTTP_RETRY_MAX_ATTEMPTS = int(os.getenv("HTTP_RETRY_MAX_ATTEMPTS", "3"))
+HTTP_RETRY_BASE_DELAY_SECONDS = float(os.getenv("HTTP_RETRY_BASE_DELAY_SECONDS", "0.1"))
+HTTP_RETRY_MAX_DELAY_SECONDS = float(os.getenv("HTTP_RETRY_MAX_DELAY_SECONDS", "2"))
+# Wall-clock budget for a call across all attempts, backoff and hedges
+HTTP_DEADLINE_SECONDS = float(os.getenv("HTTP_DEADLINE_SECONDS", "30"))
+# Retries and hedges may add at most this fraction of extra load per upstream, so they can't snowball an outage
+HTTP_RETRY_BUDGET_RATIO = float(os.getenv("HTTP_RETRY_BUDGET_RATIO", "0.2"))
+HTTP_RETRY_BUDGET_MAX_TOKENS = float(os.getenv("HTTP_RETRY_BUDGET_MAX_TOKENS", "10"))
+HTTP_HEDGING_ENABLED = os.getenv("HTTP_HEDGING_ENABLED", "true").lower() == "true"
+HTTP_HEDGE_QUANTILE = float(os.getenv("HTTP_HEDGE_QUANTILE", "0.95"))
+
+IDEMPOTENT_METHODS = frozenset(
+    {HTTP_METHODS.GET, HTTP_METHODS.HEAD, HTTP_METHODS.OPTIONS, HTTP_METHODS.PUT, HTTP_METHODS.DELETE}
+)
+RETRYABLE_STATUSES = frozenset({429, 502, 503, 504})
+# The request never reached the upstream, so even non-idempotent calls are safe to resend
+_NOT_SENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+class RetryBudget:
+    """
+    Per-upstream token bucket for retries: every first attempt deposits `ratio` tokens, every retry or hedge
+    spends one. Under a full outage retries stop at `ratio` of normal traffic instead of multiplying it.
+    """
+
+    def __init__(self, ratio: float = HTTP_RETRY_BUDGET_RATIO, max_tokens: float = HTTP_RETRY_BUDGET_MAX_TOKENS) -> None:
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self._tokens: Dict[str, float] = {}
+
+    def deposit(self, upstream: str) -> None:
+        self._tokens[upstream] = min(self.max_tokens, self._tokens.get(upstream, self.max_tokens) + self.ratio)
+
+    def try_spend(self, upstream: str) -> bool:
+        tokens = self._tokens.get(upstream, self.max_tokens)
+        if tokens < 1:
+            return False
+        self._tokens[upstream] = tokens - 1
+        return True
+
+
+class LatencyTracker:
+    """Recent successful response times per upstream, to place hedges at the observed tail."""
+
+    def __init__(self, window: int = 200, min_samples: int = 20) -> None:
+        self.window = window
+        self.min_samples = min_samples
+        self._samples: Dict[str, Deque[float]] = {}
+
+    def record(self, upstream: str, seconds: float) -> None:
+        samples = self._samples.get(upstream)
+        if samples is None:
+            samples = self._samples[upstream] = deque(maxlen=self.window)
+        samples.append(seconds)
+
+    def quantile(self, upstream: str, q: float) -> Optional[float]:
+        samples = self._samples.get(upstream)
+        if samples is None or len(samples) < self.min_samples:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class RetryPolicy:
+    """
+    When and how long `fetch` waits before resending a request.
+    Idempotent requests are retried on transport errors and on RETRYABLE_STATUSES; other requests only when
+    they never left this process. Backoff is exponential with full jitter, capped at `max_delay_seconds`.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = HTTP_RETRY_MAX_ATTEMPTS,
+        base_delay_seconds: float = HTTP_RETRY_BASE_DELAY_SECONDS,
+        max_delay_seconds: float = HTTP_RETRY_MAX_DELAY_SECONDS,
+        deadline_seconds: float = HTTP_DEADLINE_SECONDS,
+        hedging_enabled: bool = HTTP_HEDGING_ENABLED,
+        hedge_quantile: float = HTTP_HEDGE_QUANTILE,
+        budget: Optional[RetryBudget] = None,
+        latencies: Optional[LatencyTracker] = None,
+    ) -> None:
+        self.max_attempts = max_attempts
+        self.base_delay_seconds = base_delay_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self.deadline_seconds = deadline_seconds
+        self.hedging_enabled = hedging_enabled
+        self.hedge_quantile = hedge_quantile
+        self.budget = budget or RetryBudget()
+        self.latencies = latencies or LatencyTracker()
+
+    def backoff(self, attempt: int) -> float:
+        """Full jitter: uniform over [0, min(cap, base * 2^attempt)], attempt counting from 1."""
+        return random.uniform(0, min(self.max_delay_seconds, self.base_delay_seconds * 2 ** (attempt - 1)))
+
+    def should_retry_error(self, error: Exception, idempotent: bool) -> bool:
+        if isinstance(error, _NOT_SENT_ERRORS):
+            return True
+        return idempotent and isinstance(error, httpx.TransportError)
+
+    def should_retry_response(self, response: httpx.Response, idempotent: bool) -> bool:
+        return idempotent and response.status_code in RETRYABLE_STATUSES
+
+    def hedge_delay(self, upstream: str) -> Optional[float]:
+        if not self.hedging_enabled:
+            return None
+        return self.latencies.quantile(upstream, self.hedge_quantile)
+
+
+def retry_after_seconds(response: httpx.Response) -> Optional[float]:
+    # only the delta-seconds form; the upstreams we call don't send HTTP dates here
+    try:
+        return max(0.0, float(response.headers["Retry-After"]))
+    except (KeyError, ValueError):
+        return None
+
+
+default_retry_policy = RetryPolicy()
@@ -0,0 +1,129 @@
+import json
+from dataclasses import fields as dataclass_fields
+from functools import partial
+from typing import Any, AsyncIterator, Dict, List, Sequence
+
+from fastapi import HTTPException, status
+
+from dtos.standard import IntegrationItem
+from utils.http import columnar
+
+try:
+    import orjson # type: ignore
+except ImportError:  # optional speed-up; the stdlib encoder produces the same output
+    orjson = None
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+ITEM_FIELDS = tuple(field.name for field in dataclass_fields(IntegrationItem))
+
+
+def parse_item_fields(fields: str | None) -> tuple[str, ...] | None:
+    """
+    A sparse fieldset from a comma-separated `fields` parameter, in the order given; None, meaning every field,
+    when it is missing or blank. Unknown names are rejected with a 422 listing the valid ones.
+    """
+    selected = tuple(dict.fromkeys(name.strip() for name in (fields or "").split(",") if name.strip()))
+    if not selected:
+        return None
+    unknown = [name for name in selected if name not in ITEM_FIELDS]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Unknown item fields: {', '.join(unknown)}. Valid fields are {', '.join(ITEM_FIELDS)}.",
+        )
+    return selected
+
+
+def encode_item(item: IntegrationItem, fields: Sequence[str] | None = None) -> bytes:
+    """
+    One item as compact JSON, limited to `fields` when given. orjson reads the slotted dataclass directly,
+    skipping `to_dict`, and a sparse item as a dict of just its selected slots.
+    """
+    if orjson is not None:
+        return orjson.dumps(item if fields is None else {name: getattr(item, name) for name in fields})
+    data = item.to_dict()
+    if fields is not None:
+        data = {name: data[name] for name in fields}
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, IntegrationItem):
+        return value.to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def encode_record(record: Dict[str, Any]) -> bytes:
+    """A JSON object that may nest items, e.g. one tenant of a batch response."""
+    if orjson is not None:
+        return orjson.dumps(record)
+    return json.dumps(record, default=_default, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+async def ndjson_stream(
+    item_pages: AsyncIterator[List[IntegrationItem]], fields: Sequence[str] | None = None
+) -> AsyncIterator[bytes]:
+    """Encodes pages of items as newline-delimited JSON, one chunk per page, limited to `fields` when given."""
+    encode = encode_item if fields is None else partial(encode_item, fields=fields)
+    async for page in item_pages:
+        if page:
+            yield b"\n".join(map(encode, page)) + b"\n"
+
+
+async def ndjson_record_stream(records: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[bytes]:
+    """Encodes records as newline-delimited JSON, one chunk per record."""
+    async for record in records:
+        yield encode_record(record) + b"\n"
+
+
+# Formats the items endpoints answer in, negotiated through `Accept`
+ITEM_STREAM_ENCODERS = {
+    NDJSON_MEDIA_TYPE: ndjson_stream,
+    columnar.ARROW_STREAM_MEDIA_TYPE: columnar.arrow_stream,
+    columnar.PARQUET_MEDIA_TYPE: columnar.parquet_stream,
+}
+_WILDCARDS = ("*/*", "application/*")
+
+
+def negotiate_item_media_type(accept: str | None) -> str:
+    """
+    The item format to answer an `Accept` header with: the most preferred one we can encode, NDJSON for clients
+    that name none of them. Columnar formats need pyarrow; a client accepting nothing else without it gets a 406.
+    """
+    preferences = []
+    for position, media_range in enumerate((accept or "").split(",")):
+        media_type, *params = (part.strip() for part in media_range.split(";"))
+        media_type = NDJSON_MEDIA_TYPE if media_type in _WILDCARDS else media_type
+        if media_type not in ITEM_STREAM_ENCODERS:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    pass
+        if quality > 0:
+            preferences.append((-quality, position, media_type))
+
+    if not preferences:
+        return NDJSON_MEDIA_TYPE
+    for _, _, media_type in sorted(preferences):
+        if media_type == NDJSON_MEDIA_TYPE or columnar.AVAILABLE:
+            return media_type
+    raise HTTPException(
+        status_code=status.HTTP_406_NOT_ACCEPTABLE,
+        detail=f"Columnar exports are not available on this server; accept {NDJSON_MEDIA_TYPE} instead.",
+    )
+
+
+def encode_item_pages(
+    item_pages: AsyncIterator[List[IntegrationItem]], media_type: str, fields: Sequence[str] | None = None
+) -> AsyncIterator[bytes]:
+    """
+    Encodes pages of items in a format returned by `negotiate_item_media_type`, limited to the fieldset from
+    `parse_item_fields` when given.
+    """
+    return ITEM_STREAM_ENCODERS[media_type](item_pages, fields)
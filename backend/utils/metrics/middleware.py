@@ -0,0 +1,66 @@
+import functools
+import re
+import time
+
+from utils.metrics.registry import metrics_registry
+
+REQUEST_LATENCY = metrics_registry.histogram(
+    "http_server_request_duration_seconds",
+    "Time to serve a request, until the last body chunk is sent.",
+    ("method", "route", "status"),
+)
+
+
+@functools.lru_cache(maxsize=None)
+def _suffix_pattern(path_regex: str) -> re.Pattern:
+    return re.compile(path_regex.lstrip("^"))
+
+
+def _route_label(scope) -> str:
+    route = scope.get("route")
+    if route is None:
+        return "unmatched"
+    # Depending on the FastAPI version, routes of an included router carry either the full template
+    # or only their own part; recover the static router prefix from the concrete path in the latter case.
+    match = _suffix_pattern(route.path_regex.pattern).search(scope["path"])
+    prefix = scope["path"][: match.start()] if match else ""
+    return prefix + route.path
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording per-route latency. Labels use the route template (e.g. /v1/hubspot/items)
+    rather than the raw path so query strings and ids don't explode cardinality.
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+        recorded = False
+
+        def record() -> None:
+            nonlocal recorded
+            if recorded:
+                return
+            recorded = True
+            REQUEST_LATENCY.observe(time.perf_counter() - started, scope["method"], _route_label(scope), str(status_code))
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                record()
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            record()
@@ -1,7 +1,37 @@
-import os
+import functools
+import time
+from urllib.parse import quote
 import redis.asyncio as redis # type: ignore
-from config.logger import logger
-from kombu.utils.url import safequote # type: ignore
+from redis.asyncio.cluster import RedisCluster # type: ignore
+from redis.asyncio.retry import Retry # type: ignore
+from redis.asyncio.sentinel import Sentinel # type: ignore
+from redis.backoff import ExponentialBackoff # type: ignore
+from redis.exceptions import ConnectionError as RedisConnectionError, ResponseError, TimeoutError as RedisTimeoutError # type: ignore
+from config.logger import get_logger
+from utils.metrics.registry import metrics_registry
+from utils.redis.redis_config import RedisConfig
+
+logger = get_logger(__name__)
+
+REDIS_COMMAND_LATENCY = metrics_registry.histogram(
+    "redis_command_duration_seconds",
+    "Redis round-trip latency per RedisClient operation.",
+    ("command",),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+
+
+def _timed(command: str):
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await fn(*args, **kwargs)
+            finally:
+                REDIS_COMMAND_LATENCY.observe(time.perf_counter() - started, command)
+        return wrapper
+    return decorator
 
 class RedisClient:
 
@@ -18,30 +48,367 @@ class RedisClient:
         def get_state_token_key(org_id: str, user_id: str, integration_name:str) -> str:
             return f"{integration_name}:{org_id}:{user_id}:oauth_state_nonce"
 
-    def __init__(self, host: str | None = None, port: int = 6379, db: int = 0):
-        redis_host = host or os.environ.get('REDIS_HOST', 'localhost')
-        safe_host = safequote(redis_host)
-        self.redis_client = redis.Redis(host=safe_host, port=port, db=db, decode_responses=True)
-        logger.info("Redis client initialized.")
+        @staticmethod
+        def get_token_refresh_lock_key(org_id: str, user_id: str, integration_name:str) -> str:
+            return f"{integration_name}:{org_id}:{user_id}:token_refresh_lock"
+
+        @staticmethod
+        def get_token_expiry_schedule_key(integration_name:str) -> str:
+            return f"{integration_name}:token_expiry_schedule"
+
+        @staticmethod
+        def get_rate_limit_key(org_id: str, user_id: str, integration_name:str) -> str:
+            return f"{integration_name}:{org_id}:{user_id}:rate_limit"
+
+        @staticmethod
+        def get_scoped_rate_limit_key(scope: str, integration_name:str) -> str:
+            return f"{integration_name}:{scope}:rate_limit"
+
+        @staticmethod
+        def get_circuit_breaker_key(integration_name:str) -> str:
+            return f"{integration_name}:circuit_breaker"
+
+        @staticmethod
+        def get_items_cache_key(org_id: str, user_id: str, integration_name:str) -> str:
+            return f"{integration_name}:{org_id}:{user_id}:items_cache"
+
+        @staticmethod
+        def get_items_cache_index_key(integration_name:str) -> str:
+            return f"{integration_name}:items_cache_index"
+
+        @staticmethod
+        def get_item_store_key(org_id: str, user_id: str, integration_name:str) -> str:
+            return f"{integration_name}:{org_id}:{user_id}:item_store"
+
+        @staticmethod
+        def get_sync_checkpoint_key(org_id: str, user_id: str, integration_name:str) -> str:
+            return f"{integration_name}:{org_id}:{user_id}:sync_checkpoint"
+
+        @staticmethod
+        def get_account_tenants_key(account_id: str, integration_name:str) -> str:
+            return f"{integration_name}:account:{account_id}:tenants"
+
+        @staticmethod
+        def get_tenant_account_key(org_id: str, user_id: str, integration_name:str) -> str:
+            return f"{integration_name}:{org_id}:{user_id}:account"
+
+        @staticmethod
+        def get_webhook_stream_key(integration_name:str) -> str:
+            return f"{integration_name}:webhook_events"
+
+        @staticmethod
+        def get_webhook_dead_letter_key(integration_name:str) -> str:
+            return f"{integration_name}:webhook_events:dead_letter"
+
+        @staticmethod
+        def get_job_key(job_id: str) -> str:
+            return f"jobs:{job_id}"
+
+        # A queue's keys share the {queue_name} hash tag, so scripts can move jobs between them in cluster mode
+
+        @staticmethod
+        def get_job_stream_key(queue_name: str) -> str:
+            return f"job_queue:{{{queue_name}}}"
+
+        @staticmethod
+        def get_job_delayed_key(queue_name: str) -> str:
+            return f"job_queue:{{{queue_name}}}:delayed"
+
+        @staticmethod
+        def get_job_dead_letter_key(queue_name: str) -> str:
+            return f"job_queue:{{{queue_name}}}:dead_letter"
+
+        @staticmethod
+        def get_job_tenant_slots_key(org_id: str, user_id: str, queue_name: str) -> str:
+            return f"job_queue:{{{queue_name}}}:{org_id}:{user_id}:slots"
+
+    def __init__(self, config: RedisConfig | None = None):
+        self.config = config or RedisConfig()
+        self.is_cluster = self.config.mode == "cluster"
+        self._scripts: dict = {}
 
+    def __getattr__(self, name: str):
+        # the underlying client is built on first use, so importing a module that uses Redis costs nothing
+        if name != "redis_client":
+            raise AttributeError(name)
+        self.redis_client = self._build_client(self.config)
+        logger.info("Redis client initialized (%s mode).", self.config.mode)
+        return self.redis_client
+
+    @staticmethod
+    def _build_client(config: RedisConfig):
+        connection_kwargs = dict(
+            password=config.password,
+            decode_responses=True,
+            socket_timeout=config.socket_timeout,
+            socket_connect_timeout=config.socket_connect_timeout,
+            health_check_interval=config.health_check_interval,
+            retry=Retry(
+                ExponentialBackoff(cap=config.retry_backoff_cap, base=config.retry_backoff_base),
+                config.retry_attempts,
+            ),
+            retry_on_error=[RedisConnectionError, RedisTimeoutError],
+        )
+
+        if config.mode == "cluster":
+            return RedisCluster(
+                host=quote(config.host, safe=""),
+                port=config.port,
+                max_connections=config.max_connections,
+                **connection_kwargs,
+            )
+
+        if config.mode == "sentinel":
+            sentinel = Sentinel(
+                config.sentinels,
+                socket_timeout=config.socket_timeout,
+                socket_connect_timeout=config.socket_connect_timeout,
+            )
+            return sentinel.master_for(
+                config.sentinel_master,
+                db=config.db,
+                max_connections=config.max_connections,
+                **connection_kwargs,
+            )
+
+        # Blocking pool: under saturation callers wait up to pool_timeout for a free connection
+        # instead of failing immediately with "Too many connections"
+        pool = redis.BlockingConnectionPool(
+            host=quote(config.host, safe=""),
+            port=config.port,
+            db=config.db,
+            max_connections=config.max_connections,
+            timeout=config.pool_timeout,
+            **connection_kwargs,
+        )
+        return redis.Redis(connection_pool=pool)
+
+    def pool_stats(self) -> dict:
+        """Connection pool usage for this worker, to size REDIS_MAX_CONNECTIONS."""
+        if self.is_cluster:
+            nodes = self.redis_client.get_nodes()
+            in_use = sum(len(node._connections) - len(node._free) for node in nodes)
+            idle = sum(len(node._free) for node in nodes)
+            max_connections = self.config.max_connections * max(len(nodes), 1)
+        else:
+            pool = self.redis_client.connection_pool
+            in_use = len(pool._in_use_connections)
+            idle = len(pool._available_connections)
+            max_connections = pool.max_connections
+        return {
+            "mode": self.config.mode,
+            "max_connections": max_connections,
+            "in_use_connections": in_use,
+            "idle_connections": idle,
+            "utilization": in_use / max_connections if max_connections else 0.0,
+        }
+
+    @_timed("set")
     async def add_key(self, key: str, value: str, expire_seconds: int | None = None):
-        await self.redis_client.set(key, value)
+        await self.redis_client.set(key, value, ex=expire_seconds or None)
+        logger.debug("Added key '%s' to Redis.", key)
+
+    @_timed("mset")
+    async def add_keys(self, mapping: dict[str, str], expire_seconds: int | None = None):
+        if not mapping:
+            return
         if expire_seconds:
-            await self.redis_client.expire(key, expire_seconds)
-        logger.info(f"Added key '{key}' to Redis.")    
+            # untimed, so the batch is observed once, as "mset"
+            async with self._pipeline() as pipe:
+                for key, value in mapping.items():
+                    pipe.set(key, value, ex=expire_seconds)
+                await pipe.execute()
+        else:
+            await (self.redis_client.mset_nonatomic if self.is_cluster else self.redis_client.mset)(mapping)
+        logger.debug("Added %d key(s) to Redis.", len(mapping))
 
+    @_timed("get")
     async def get_key(self, key: str) -> str | None:
         value = await self.redis_client.get(key)
         if value:
-            logger.info(f"Retrieved key '{key}' from Redis.")
+            logger.debug("Retrieved key '%s' from Redis.", key)
         else:
-            logger.warning(f"Attempted to get non-existent key '{key}'.")
+            logger.debug("Attempted to get non-existent key '%s'.", key)
         return value
 
+    @_timed("mget")
+    async def get_keys(self, *keys: str) -> list[str | None]:
+        if not keys:
+            return []
+        if self.is_cluster:
+            # keys may live in different hash slots
+            return await self.redis_client.mget_nonatomic(keys)
+        return await self.redis_client.mget(keys)
+
+    @_timed("hgetall")
+    async def get_hash(self, key: str) -> dict[str, str]:
+        return await self.redis_client.hgetall(key)
+
+    @_timed("hkeys")
+    async def get_hash_fields(self, key: str) -> list[str]:
+        return await self.redis_client.hkeys(key)
+
+    @_timed("hscan")
+    async def scan_hash(self, key: str, cursor: int = 0, count: int = 100) -> tuple[int, dict[str, str]]:
+        """One HSCAN step; call again with the returned cursor until it comes back as 0."""
+        return await self.redis_client.hscan(key, cursor=cursor, count=count)
+
+    @_timed("hset")
+    async def set_hash_fields(self, key: str, mapping: dict[str, str]) -> int:
+        if not mapping:
+            return 0
+        return await self.redis_client.hset(key, mapping=mapping)
+
+    @_timed("hdel")
+    async def delete_hash_fields(self, key: str, *fields: str) -> int:
+        if not fields:
+            return 0
+        return await self.redis_client.hdel(key, *fields)
+
+    @_timed("getdel")
+    async def consume_key(self, key: str) -> str | None:
+        """Atomically reads and deletes a key (GETDEL), e.g. for single-use nonces."""
+        value = await self.redis_client.getdel(key)
+        if value:
+            logger.debug("Consumed key '%s' from Redis.", key)
+        else:
+            logger.warning("Attempted to consume non-existent key '%s'.", key)
+        return value
+
+    @_timed("del")
     async def delete_key(self, key: str) -> int:
         result = await self.redis_client.delete(key)
         if result > 0:
-            logger.info(f"Deleted key '{key}' from Redis.")
+            logger.debug("Deleted key '%s' from Redis.", key)
+        return result
+
+    @_timed("del")
+    async def delete_keys(self, *keys: str) -> int:
+        if not keys:
+            return 0
+        result = await self.redis_client.delete(*keys)
+        logger.debug("Deleted %d key(s) from Redis.", result)
         return result
+
+    def pipeline(self, transaction: bool = True):
+        """
+        Buffers commands and sends them in one round-trip; with `transaction` they apply atomically (MULTI/EXEC).
+        Use as `async with redis_client.pipeline() as pipe: pipe.set(...); await pipe.execute()`.
+        In cluster mode our keys span hash slots, so pipelines are always sent as plain batches.
+        """
+        pipe = self._pipeline(transaction)
+        pipe.execute = _timed("pipeline")(pipe.execute)
+        return pipe
+
+    def _pipeline(self, transaction: bool = True):
+        if self.is_cluster:
+            return self.redis_client.pipeline()
+        return self.redis_client.pipeline(transaction=transaction)
+
+    def lock(self, key: str, timeout: float, blocking_timeout: float):
+        """Distributed lock shared by every worker; use as `async with redis_client.lock(...)`."""
+        return self.redis_client.lock(key, timeout=timeout, blocking_timeout=blocking_timeout)
+
+    @_timed("evalsha")
+    async def run_script(self, source: str, keys: list[str], args: list):
+        """Runs a Lua script by SHA, loading it on first use or after the server's script cache was flushed."""
+        script = self._scripts.get(source)
+        if script is None:
+            script = self._scripts[source] = self.redis_client.register_script(source)
+        return await script(keys=keys, args=args, client=self.redis_client)
+
+    @_timed("sadd")
+    async def add_to_set(self, key: str, *members: str) -> int:
+        return await self.redis_client.sadd(key, *members)
+
+    @_timed("smembers")
+    async def get_set_members(self, key: str) -> set[str]:
+        return await self.redis_client.smembers(key)
+
+    @_timed("xadd")
+    async def add_to_stream(self, key: str, fields: dict[str, str], max_len: int | None = None) -> str:
+        return await self.redis_client.xadd(key, fields, maxlen=max_len, approximate=True)
+
+    @_timed("xgroup_create")
+    async def create_stream_group(self, key: str, group: str) -> None:
+        """Creates the consumer group (and the stream) unless it already exists."""
+        try:
+            await self.redis_client.xgroup_create(key, group, id="0", mkstream=True)
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    @_timed("xreadgroup")
+    async def read_stream_group(
+        self, key: str, group: str, consumer: str, count: int, block_ms: int | None = None
+    ) -> list[tuple[str, dict[str, str]]]:
+        """New entries for this consumer; they stay pending in the group until acknowledged."""
+        response = await self.redis_client.xreadgroup(group, consumer, {key: ">"}, count=count, block=block_ms)
+        return response[0][1] if response else []
+
+    @_timed("xautoclaim")
+    async def claim_stream_entries(
+        self, key: str, group: str, consumer: str, min_idle_ms: int, count: int
+    ) -> list[tuple[str, dict[str, str]]]:
+        """Takes over entries another consumer read but never acknowledged, e.g. because it crashed."""
+        _, entries, *_ = await self.redis_client.xautoclaim(
+            key, group, consumer, min_idle_time=min_idle_ms, start_id="0-0", count=count
+        )
+        return entries
+
+    @_timed("xclaim")
+    async def touch_stream_entries(self, key: str, group: str, consumer: str, *entry_ids: str) -> None:
+        """Resets the idle time of entries this consumer is still working on, so nobody claims them."""
+        await self.redis_client.xclaim(key, group, consumer, min_idle_time=0, message_ids=list(entry_ids), justid=True)
+
+    async def get_stream_delivery_counts(self, key: str, group: str, *entry_ids: str) -> dict[str, int]:
+        """How often each pending entry has been delivered, the first read and every claim included."""
+        async with self.pipeline(transaction=False) as pipe:
+            for entry_id in entry_ids:
+                pipe.xpending_range(key, group, min=entry_id, max=entry_id, count=1)
+            responses = await pipe.execute()
+        return {pending["message_id"]: pending["times_delivered"] for response in responses for pending in response}
+
+    @_timed("xack")
+    async def ack_stream_entries(self, key: str, group: str, *entry_ids: str) -> int:
+        if not entry_ids:
+            return 0
+        return await self.redis_client.xack(key, group, *entry_ids)
+
+    @_timed("zadd")
+    async def add_to_sorted_set(self, key: str, member: str, score: float) -> int:
+        return await self.redis_client.zadd(key, {member: score})
+
+    @_timed("zrem")
+    async def remove_from_sorted_set(self, key: str, *members: str) -> int:
+        return await self.redis_client.zrem(key, *members)
+
+    @_timed("zrangebyscore")
+    async def get_sorted_set_range_by_score(
+        self, key: str, min_score: float, max_score: float, count: int
+    ) -> list[tuple[str, float]]:
+        return await self.redis_client.zrangebyscore(
+            key, min_score, max_score, start=0, num=count, withscores=True
+        )
+
+    @_timed("zpopmin")
+    async def pop_min_from_sorted_set(self, key: str, count: int = 1) -> list[tuple[str, float]]:
+        return await self.redis_client.zpopmin(key, count)
     
+
 redis_client = RedisClient()
+
+def _collect_pool_stats():
+    stats = redis_client.pool_stats()
+    return [
+        (("in_use",), stats["in_use_connections"]),
+        (("idle",), stats["idle_connections"]),
+        (("max",), stats["max_connections"]),
+    ]
+
+metrics_registry.gauge(
+    "redis_pool_connections",
+    "Connections in this worker's Redis pool by state.",
+    _collect_pool_stats,
+    ("state",),
+)
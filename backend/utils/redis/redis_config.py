@@ -0,0 +1,39 @@
+import os
+
+REDIS_MODES = ("standalone", "sentinel", "cluster")
+
+
+class RedisConfig:
+    """Connection settings for RedisClient, read from the environment."""
+
+    def __init__(self) -> None:
+        self.mode = os.getenv("REDIS_MODE", "standalone").lower()
+        if self.mode not in REDIS_MODES:
+            raise ValueError(f"REDIS_MODE must be one of {', '.join(REDIS_MODES)}, got '{self.mode}'")
+
+        self.host = os.getenv("REDIS_HOST", "localhost")
+        self.port = int(os.getenv("REDIS_PORT", "6379"))
+        self.db = int(os.getenv("REDIS_DB", "0"))
+        self.password = os.getenv("REDIS_PASSWORD") or None
+
+        # Pool sizing is per worker process
+        self.max_connections = int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
+        self.pool_timeout = float(os.getenv("REDIS_POOL_TIMEOUT_SECONDS", "5"))
+        self.socket_timeout = float(os.getenv("REDIS_SOCKET_TIMEOUT_SECONDS", "5"))
+        self.socket_connect_timeout = float(os.getenv("REDIS_SOCKET_CONNECT_TIMEOUT_SECONDS", "2"))
+        self.health_check_interval = int(os.getenv("REDIS_HEALTH_CHECK_INTERVAL_SECONDS", "30"))
+
+        self.retry_attempts = int(os.getenv("REDIS_RETRY_ATTEMPTS", "3"))
+        self.retry_backoff_base = float(os.getenv("REDIS_RETRY_BACKOFF_BASE_SECONDS", "0.05"))
+        self.retry_backoff_cap = float(os.getenv("REDIS_RETRY_BACKOFF_CAP_SECONDS", "1"))
+
+        # Sentinel mode: comma separated host:port list and the monitored master name
+        self.sentinels = [
+            (host, int(port))
+            for host, _, port in (
+                node.strip().rpartition(":")
+                for node in os.getenv("REDIS_SENTINELS", "").split(",")
+                if node.strip()
+            )
+        ]
+        self.sentinel_master = os.getenv("REDIS_SENTINEL_MASTER", "mymaster")
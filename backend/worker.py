@@ -0,0 +1,41 @@
+from dotenv import load_dotenv
+load_dotenv()
+import asyncio
+import os
+import signal
+from config.logger import get_logger
+from services.integrations.hubspot import get_hubspot_service
+from services.job_queue import JobWorker, job_queue
+from utils.http.http_client import http_client_registry
+
+logger = get_logger(__name__)
+
+WEBHOOK_CONSUMER_ENABLED = os.getenv("WEBHOOK_CONSUMER_ENABLED", "true").lower() == "true"
+
+
+async def main() -> None:
+    """
+    Background worker, run next to the API as `python worker.py`: executes queued jobs such as full syncs
+    and, unless disabled, consumes webhook events. SIGTERM lets running jobs finish before exiting.
+    """
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    http_client_registry.start()
+    # registers the HubSpot job handlers
+    hubspot_service = await get_hubspot_service()
+    if WEBHOOK_CONSUMER_ENABLED:
+        hubspot_service.webhook_queue.start()
+    logger.info("Worker started for job types: %s", ", ".join(sorted(job_queue.handlers)))
+    try:
+        await JobWorker(job_queue).run(stop)
+    finally:
+        await hubspot_service.webhook_queue.stop()
+        await http_client_registry.aclose()
+    logger.info("Worker stopped.")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
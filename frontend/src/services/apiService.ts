@@ -4,7 +4,11 @@ import { IntegrationItem, AuthorizeRequest, IntegrationPlatform } from '../types
 const API_BASE_URL = import.meta.env.VITE_API_BASE_URL || "http://localhost:8000/v1";
 
 class ApiService {
-  private async makeRequest<T>(endpoint: string, options: RequestInit = {}): Promise<T> {
+  private async makeRequest<T>(
+    endpoint: string,
+    options: RequestInit = {},
+    parse: (text: string) => T = (text) => (text ? JSON.parse(text) : ({} as T)),
+  ): Promise<T> {
     const url = `${API_BASE_URL}${endpoint}`;
     try {
       const response = await fetch(url, {
@@ -18,7 +22,7 @@ class ApiService {
       }
       
       const text = await response.text();
-      return text ? JSON.parse(text) : ({} as T);
+      return parse(text);
 
     } catch (error) {
       console.error(`API request failed: ${endpoint}`, error);
@@ -44,7 +48,10 @@ class ApiService {
     }
 
     const endpoint = `/hubspot/items?user_id=${encodeURIComponent(userId)}&org_id=${encodeURIComponent(orgId)}`;
-    return this.makeRequest<IntegrationItem[]>(endpoint);
+    // The items endpoint streams newline-delimited JSON, one item per line
+    return this.makeRequest<IntegrationItem[]>(endpoint, {}, (text) =>
+      text.split('\n').filter((line) => line.trim()).map((line) => JSON.parse(line) as IntegrationItem),
+    );
   }
 }
 